@@ -1,14 +1,26 @@
-from services.llm_client import GeminiClient
+from services.llm_client import LLMUnavailable, get_gemini_client
 from models.order import Order
-from services.fuzzy_service import fuzzy_match_item
+from services.fuzzy_service import fuzzy_match_items
+from services.question_templates import build_question
+from services.semantic_search import search_items
+from utils.config import CLARIFY_WITH_LLM, CLARIFY_LOCALE, SEMANTIC_SEARCH_ENABLED, SEMANTIC_TOP_K
 
 class ClarificationAgent:
     name = "missing_info"
 
-    def __init__(self):
-        self.gemini = GeminiClient()
+    def __init__(self, use_llm: bool = CLARIFY_WITH_LLM):
+        self.gemini = get_gemini_client()
+        self.use_llm = use_llm
 
     async def run(self, state: dict) -> dict:
+        return await self.phrase(self.resolve(state))
+
+    def resolve(self, state: dict) -> dict:
+        """
+        Everything but phrasing the question: fuzzy/semantic resolution of
+        item names and the missing-field check. Local work only; a question
+        still to be phrased is left as assistant_message None.
+        """
         # Load order from state
         order = Order(**state.get("order", {}))
         missing = []
@@ -16,8 +28,14 @@ class ClarificationAgent:
 
         # --- Handle item name fuzzy matching ---
         corrected_items = []
-        for item in order.items:
-            status, best, suggestions = fuzzy_match_item(item.name)
+        matches = fuzzy_match_items([item.name for item in order.items], shop_id=state.get("shop_id"))
+        # Names without a confident match ("dry fruit sweets") are searched
+        # by category and description too, all in one batch
+        unmatched = [item.name for item, (status, _, _) in zip(order.items, matches) if status != "high_confidence"]
+        related = {}
+        if unmatched and SEMANTIC_SEARCH_ENABLED:
+            related = dict(zip(unmatched, search_items(unmatched, shop_id=state.get("shop_id"))))
+        for item, (status, best, suggestions) in zip(order.items, matches):
 
             if status == "high_confidence":
                 # ✅ best is a string → use directly
@@ -25,6 +43,8 @@ class ClarificationAgent:
 
             elif status == "suggest":
                 missing.append("items.name")
+                suggestions = suggestions + [name for name, _ in related.get(item.name, []) if name not in suggestions]
+                suggestions = suggestions[:max(3, SEMANTIC_TOP_K)]
                 assistant_messages.append(
                     f"I couldn’t find an exact match for **{item.name}**. "
                     f"Did you mean one of these?\n" +
@@ -33,6 +53,11 @@ class ClarificationAgent:
 
             else:
                 missing.append("items.name")
+                if related.get(item.name):
+                    assistant_messages.append(
+                        f"I couldn’t find **{item.name}** on our menu. You might like:\n" +
+                        "\n".join(f"- {name}" for name, _ in related[item.name])
+                    )
 
             corrected_items.append(item)
         order.items = corrected_items
@@ -51,19 +76,13 @@ class ClarificationAgent:
         if not order.contact.address:
             missing.append("contact.address")
 
-        # --- Generate assistant message for missing fields ---
+        # --- Suggestions are the message; other questions are phrased later ---
         if missing:
-            if not assistant_messages:
-                # Ask via Gemini for missing fields
-                message = await self.gemini.clarify(order, missing)
-            else:
-                message = " ".join(assistant_messages)
-
             return {
                 **state,
                 "status": "needs_clarification",
                 "missing_fields": missing,
-                "assistant_message": message,
+                "assistant_message": " ".join(assistant_messages) if assistant_messages else None,
                 "order": order.model_dump()
             }
 
@@ -74,3 +93,27 @@ class ClarificationAgent:
             "order": order.model_dump(),
             "assistant_message": "✅ All information received."
         }
+
+    def _to_phrase(self, state: dict) -> bool:
+        return state["status"] == "needs_clarification" and state["assistant_message"] is None
+
+    def asks_llm(self, state: dict) -> bool:
+        """Whether phrasing this resolved state's question awaits a Gemini call."""
+        # The streaming endpoint phrases the question token by token itself
+        return self._to_phrase(state) and self.use_llm and not state.get("stream_clarify")
+
+    async def phrase(self, state: dict) -> dict:
+        """Fill in the question for the missing fields of a `resolve`d state."""
+        if self._to_phrase(state) and not (self.use_llm and state.get("stream_clarify")):
+            order = Order(**state["order"])
+            state["assistant_message"] = await self._ask(order, state["missing_fields"], state)
+        return state
+
+    async def _ask(self, order: Order, missing: list, state: dict) -> str:
+        """Question for the missing fields: Gemini if opted in, else templates."""
+        if self.use_llm:
+            try:
+                return await self.gemini.clarify(order, missing)
+            except LLMUnavailable:
+                pass  # fall back to the local templates
+        return build_question(order, missing, state.get("locale", CLARIFY_LOCALE), state.get("shop_id"))
@@ -1,11 +1,22 @@
+import re
+
+# Only an explicit CONFIRM reply places the order ("confirm", "CONFIRM!")
+_CONFIRM_RE = re.compile(r"\s*confirm\s*[.!]*\s*", re.IGNORECASE)
+
+
+def is_confirmation(message: str) -> bool:
+    return bool(_CONFIRM_RE.fullmatch(message or ""))
+
+
 class ConfirmationAgent:
     name = "confirmation"
     async def run(self, state: dict) -> dict:
         p = state["pricing"]
         lines = "\n".join([f"- {l['name']} {l['size']} × {l['qty']} = {l['total']}" for l in p["lines"]])
+        discounts = f", Discounts: -{p['discounts']}" if p.get("discounts") else ""
         msg = f"""Here’s your order summary:
 {lines}
-Subtotal: {p['subtotal']}, Taxes: {p['taxes']}, Delivery: {p['delivery']}
+Subtotal: {p['subtotal']}{discounts}, Taxes: {p['taxes']}, Delivery: {p['delivery']}
 Grand Total: {p['grand_total']}
 Reply CONFIRM to place the order or say what to change."""
         return {**state, "assistant_message": msg, "status": "awaiting_confirmation"}
\ No newline at end of file
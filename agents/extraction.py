@@ -1,16 +1,86 @@
 import copy
 from typing import Dict, Any, Optional, List
 from models.order import Order, OrderItem
-from services.llm_client import GeminiClient
+from services.llm_client import LLMUnavailable, get_gemini_client
+from services.rule_extractor import RuleExtractor
+from utils.config import EXTRACTION_MODE, FAST_PATH_ENABLED
+from utils.logger import get_logger
+from utils.order_delta import apply_order_delta
+
+logger = get_logger(__name__)
 
 
 class ExtractionAgent:
     name = "extraction"
 
-    def __init__(self):
-        self.gemini = GeminiClient()
+    def __init__(self, mode: str = EXTRACTION_MODE, fast_path: bool = FAST_PATH_ENABLED):
+        self.gemini = get_gemini_client()
+        self.mode = mode
+        self.fast_path = fast_path
+        self.rules = RuleExtractor()
 
     async def run(self, state: dict) -> dict:
+        fast = self._extract_fast(state)
+        try:
+            if fast is not None:
+                current_order = fast
+            elif self.mode == "incremental":
+                current_order = await self._extract_incremental(state)
+            else:
+                current_order = await self._extract_full(state)
+        except LLMUnavailable as e:
+            logger.warning(f"LLM unavailable, using local extraction: {e}")
+            current_order = self._extract_local(state)
+
+        # Detect missing fields
+        missing_fields = []
+        for field in ["items", "delivery_date", "payment_method", "contact"]:
+            if not current_order.get(field):
+                missing_fields.append(field)
+
+        # Update state
+        state["order"] = current_order
+        state["missing_fields"] = missing_fields
+        state["status"] = "needs_clarification" if missing_fields else "ready_for_validation"
+
+        return state
+
+    def _extract_fast(self, state: dict) -> Optional[dict]:
+        """Answer simple follow-ups locally; None means ask the LLM."""
+        transcript = state.get("transcript", [])
+        if not self.fast_path or not transcript:
+            return None
+
+        order = Order(**state.get("order", {}))
+        delta = self.rules.extract(transcript[-1], order, state.get("missing_fields"),
+                                   shop_id=state.get("shop_id"))
+        if delta is None:
+            return None
+        return apply_order_delta(order, delta).model_dump()
+
+    def _extract_local(self, state: dict) -> dict:
+        """Fallback when the LLM is down: keep whatever the rules recognise."""
+        transcript = state.get("transcript", [])
+        order = Order(**state.get("order", {}))
+        if not transcript:
+            return order.model_dump()
+
+        delta = self.rules.extract_best_effort(transcript[-1], order, state.get("missing_fields"),
+                                               shop_id=state.get("shop_id"))
+        return apply_order_delta(order, delta).model_dump()
+
+    async def _extract_incremental(self, state: dict) -> dict:
+        """Send the current order + latest message and merge the returned delta."""
+        transcript = state.get("transcript", [])
+        order = Order(**state.get("order", {}))
+        if not transcript:
+            return order.model_dump()
+
+        delta = await self.gemini.extract_order_delta(order, transcript[-1])
+        return apply_order_delta(order, delta).model_dump()
+
+    async def _extract_full(self, state: dict) -> dict:
+        """Re-extract the whole order from the full transcript."""
         # Combine all previous messages into one text
         all_text = " ".join(state.get("transcript", []))
 
@@ -28,15 +98,4 @@ class ExtractionAgent:
                 else:
                     current_order[k] = v
 
-        # Detect missing fields
-        missing_fields = []
-        for field in ["items", "delivery_date", "payment_method", "contact"]:
-            if not current_order.get(field):
-                missing_fields.append(field)
-
-        # Update state
-        state["order"] = current_order
-        state["missing_fields"] = missing_fields
-        state["status"] = "needs_clarification" if missing_fields else "ready_for_validation"
-
-        return state
+        return current_order
@@ -1,7 +1,70 @@
-from typing import Dict, Any
+import json
+import uuid
+import hashlib
+import sqlite3
+from typing import Dict, Any, Optional
+from services.order_store import get_order_store
+from utils.order_log import get_order_log
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def idempotency_key(state: Dict[str, Any]) -> str:
+    """
+    The request's Idempotency-Key when the client sent one; otherwise the
+    session plus a digest of the confirmed order, so re-sending CONFIRM
+    for the same order never places it twice.
+    """
+    if state.get("idempotency_key"):
+        return state["idempotency_key"]
+    content = json.dumps([state.get("order"), state.get("pricing")], sort_keys=True, default=str)
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:32]
+    return f"{state.get('shop_id') or ''}:{state.get('session_id')}:{digest}"
+
+
+def unplaceable(state: Dict[str, Any]) -> Optional[str]:
+    """Why the order cannot be placed, or None when it can."""
+    if not (state.get("order") or {}).get("items"):
+        return "it has no items"
+    lines = (state.get("pricing") or {}).get("lines") or []
+    if not lines or any(line.get("total") is None for line in lines):
+        return "not every item is priced"
+    return None
 
 
 class FulfillmentAgent:
     name = "fulfillment"
     async def run(self, state: dict) -> dict:
-        return {**state, "assistant_message": "✅ Order placed! You’ll get delivery updates soon.", "status": "fulfilled"}
+        reason = unplaceable(state)
+        if reason:
+            logger.warning(f"Not placing order for session {state.get('session_id')}: {reason}")
+            return {**state, "status": "not_placed",
+                    "assistant_message": f"I can’t place this order yet: {reason}. Tell me what you’d like to order."}
+
+        order_id = uuid.uuid4().hex
+        created = True
+        try:
+            placed = await get_order_store().place(order_id, idempotency_key(state), state)
+            order_id, created = placed["order_id"], placed["created"]
+        except sqlite3.Error as e:
+            # Still recorded in the order log below, so the order is not lost
+            logger.error(f"Could not store order {order_id}: {e}")
+
+        if created:
+            record = {
+                "order_id": order_id,
+                "session_id": state.get("session_id"),
+                "shop_id": state.get("shop_id"),
+                "order": state.get("order"),
+                "pricing": state.get("pricing"),
+            }
+            try:
+                # Durable before we tell the customer it is placed
+                await get_order_log().append_durable("order.placed", record, key=order_id)
+            except OSError as e:
+                logger.error(f"Could not log order {order_id}: {e}")
+        else:
+            logger.info(f"Order {order_id} already placed, not placing it again")
+        return {**state, "order_id": order_id,
+                "assistant_message": "✅ Order placed! You’ll get delivery updates soon.", "status": "fulfilled"}
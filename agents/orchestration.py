@@ -1,12 +1,15 @@
-from typing import Dict, Any
-from langgraph.graph import StateGraph, END
+import asyncio
+from typing import Dict, Any, Optional
+from langgraph.constants import END
 from models.order import Order
 from agents.extraction import ExtractionAgent
 from agents.validation import ValidationAgent
 from agents.clarification import ClarificationAgent
-from agents.confirmation import ConfirmationAgent
+from agents.confirmation import ConfirmationAgent, is_confirmation
 from agents.pricing import PricingAgent
 from agents.fullfilment import FulfillmentAgent
+from utils.config import GRAPH_MODE
+from utils.metrics import instrument_node
 
 # Instantiate agents
 extract = ExtractionAgent()
@@ -16,7 +19,47 @@ price = PricingAgent()
 confirm = ConfirmationAgent()
 fulfill = FulfillmentAgent()
 
+# ---- Speculative fan-out ----
+def _join_speculative(clarified: Dict[str, Any], partial: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reducer for the parallel branch: clarification's state wins, the
+    running subtotal is attached (and mentioned while still asking questions).
+    """
+    state = {**clarified, "partial_pricing": partial}
+    message = state.get("assistant_message")
+    if state.get("status") == "needs_clarification" and message and partial["subtotal"]:
+        state["assistant_message"] = (
+            f"{message}\n\nRunning subtotal: {partial['subtotal']} "
+            f"({partial['priced_items']} of {partial['total_items']} items priced)."
+        )
+    return state
+
+async def speculate(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Clarification plus a running subtotal. Fuzzy resolution runs once and
+    partial pricing reuses its names; only when the question needs a
+    Gemini call is pricing overlapped with it (local work has no await to
+    overlap with).
+    """
+    resolved = clarifier.resolve(state)
+    partial = price.run_partial(resolved, fuzzy=False)
+    if clarifier.asks_llm(resolved):
+        clarified, partial = await asyncio.gather(clarifier.phrase(resolved), partial)
+    else:
+        clarified, partial = await clarifier.phrase(resolved), await partial
+    return _join_speculative(clarified, partial)
+
 # ---- Transition functions ----
+def _entry(state: Dict[str, Any]):
+    """
+    A CONFIRM reply to the order summary goes straight to fulfillment;
+    anything else (including edits after the summary) is extracted as usual.
+    """
+    transcript = state.get("transcript") or []
+    if state.get("status") == "awaiting_confirmation" and transcript and is_confirmation(transcript[-1]):
+        return "fulfillment"
+    return "extraction"
+
 def _after_clarification(state: Dict[str, Any]):
     """
     After clarification:
@@ -36,19 +79,33 @@ def _after_pricing(state: Dict[str, Any]):
     return "confirmation" if state.get("status") == "priced" else END
 
 # ---- Build graph ----
-def build_graph():
+def build_graph(mode: str = GRAPH_MODE):
+    """
+    mode="sequential" runs one node after another; mode="parallel" swaps the
+    clarification node for `speculate`, which also computes a running subtotal.
+    """
+    # langgraph (and langchain_core under it) is slow to import; only
+    # compiling the graph needs it
+    from langgraph.graph import StateGraph
+
     g = StateGraph(dict)
 
-    # Nodes
-    g.add_node("extraction", extract.run)
-    g.add_node("clarification", clarifier.run)
-    g.add_node("validation", validate.run)
-    g.add_node("pricing", price.run)
-    g.add_node("confirmation", confirm.run)
-    g.add_node("fulfillment", fulfill.run)
+    # Nodes (timed per node, see utils/metrics.py)
+    nodes = {
+        "extraction": extract.run,
+        "clarification": speculate if mode == "parallel" else clarifier.run,
+        "validation": validate.run,
+        "pricing": price.run,
+        "confirmation": confirm.run,
+        "fulfillment": fulfill.run,
+    }
+    for name, run in nodes.items():
+        g.add_node(name, instrument_node(name, run))
 
     # Entry
-    g.set_entry_point("extraction")
+    g.set_conditional_entry_point(
+        _entry, {"extraction": "extraction", "fulfillment": "fulfillment"}
+    )
 
     # Flow
     g.add_edge("extraction", "clarification")
@@ -68,10 +125,18 @@ def build_graph():
         {"confirmation": "confirmation", END: END}
     )
 
-    g.add_edge("confirmation", "fulfillment")
+    # The summary ends the turn; fulfillment runs on a later CONFIRM (see _entry)
+    g.add_edge("confirmation", END)
     g.add_edge("fulfillment", END)
 
     return g.compile()
 
-# Compiled graph ready to use in FastAPI
-GRAPH = build_graph()
\ No newline at end of file
+# Compiled graph, built at startup by the FastAPI lifespan (or on first use)
+_GRAPH: Optional[Any] = None
+
+def get_graph():
+    """The process-wide compiled graph."""
+    global _GRAPH
+    if _GRAPH is None:
+        _GRAPH = build_graph()
+    return _GRAPH
@@ -1,40 +1,87 @@
-from models.order import Order
-from services.menu_service import find_price
+from typing import List, Optional, Tuple
+from models.order import Order, OrderItem
+from services.menu_service import resolve_price
+from services.pricing_rules import get_pricing_rules
+from services.question_templates import build_price_issues
+from utils.config import CLARIFY_LOCALE
 
 class PricingAgent:
     name = "pricing"
 
-    async def run(self, state: dict) -> dict:
-        order = Order(**state["order"])
+    def price_lines(self, items: List[OrderItem], shop_id: Optional[str] = None,
+                    fuzzy: bool = True) -> Tuple[List[dict], int, List[dict]]:
+        """
+        Price each item; returns (lines, subtotal, misses). A line whose
+        item or size is not on the menu gets unit/total None and a miss
+        entry, instead of silently counting as 0. With `fuzzy` off, names
+        must already be menu names.
+        """
         subtotal = 0
         lines = []
+        misses = []
 
-        for it in order.items:
-            unit = find_price(it.name, it.size_or_weight)
+        for it in items:
+            found = resolve_price(it.name, it.size_or_weight, shop_id, fuzzy)
             qty = it.qty or 0
-            line_total = unit * qty
-            subtotal += line_total
+            if found.miss:
+                misses.append({
+                    "name": found.item_name or it.name,
+                    "size": found.size or it.size_or_weight,
+                    "reason": found.miss,
+                    "sizes": list(found.sizes),
+                })
+                line_total = None
+            else:
+                line_total = found.price * qty
+                subtotal += line_total
             lines.append({
                 "name": it.name,
-                "size": it.size_or_weight,
+                "size": found.size or it.size_or_weight,
                 "qty": qty,
-                "unit": unit,
-                "total": line_total
+                "unit": found.price,
+                "total": line_total,
+                "category": found.category
             })
 
-        taxes = round(subtotal * 0.05)
-        delivery = 40 if subtotal < 1000 else 0
-        grand = subtotal + taxes + delivery
+        return lines, subtotal, misses
+
+    async def run(self, state: dict) -> dict:
+        order = Order(**state["order"])
+        lines, subtotal, misses = self.price_lines(order.items, state.get("shop_id"))
+
+        if misses:
+            # Ask about the unresolved lines rather than quoting a wrong total
+            return {
+                **state,
+                "pricing": {"lines": lines, "subtotal": subtotal, "unresolved": misses},
+                "status": "price_unresolved",
+                "assistant_message": build_price_issues(misses, state.get("locale", CLARIFY_LOCALE)),
+            }
+
+        # Tax, discounts, coupon and delivery come from the shop's rule set
+        rules = get_pricing_rules(state.get("shop_id"))
+        pricing = rules.price(lines, order.coupon_code, order.contact.address)
+        grand = pricing["grand_total"]
 
         return {
             **state,
-            "pricing": {
-                "lines": lines,
-                "subtotal": subtotal,
-                "taxes": taxes,
-                "delivery": delivery,
-                "grand_total": grand
-            },
+            "pricing": pricing,
             "status": "priced",
             "assistant_message": f"Your order total is {grand} (incl. taxes & delivery)."
         }
+
+    async def run_partial(self, state: dict, fuzzy: bool = True) -> dict:
+        """
+        Running subtotal of the items that already have qty and size. On a
+        state clarification has resolved, `fuzzy=False` prices the names it
+        matched and counts the rest as unpriced, without matching them again.
+        """
+        order = Order(**state.get("order", {}))
+        ready = [it for it in order.items if it.qty and it.size_or_weight]
+        lines, subtotal, misses = self.price_lines(ready, state.get("shop_id"), fuzzy)
+        return {
+            "lines": lines,
+            "subtotal": subtotal,
+            "priced_items": len(ready) - len(misses),
+            "total_items": len(order.items)
+        }
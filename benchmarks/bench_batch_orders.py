@@ -0,0 +1,65 @@
+"""
+Throughput of the batch ingestion pipeline (services/batch_orders.py).
+
+Generates a CSV of N order lines from parsed_menu.json (real item names,
+with typos and casing changes on a share of them, real sizes, 1-5 lines
+per order) and runs process_batch over it three ways: one chunk in a
+thread, all chunks on a thread pool, and all chunks on the process pool.
+Reports rows/sec for each.
+
+    python -m benchmarks.bench_batch_orders [rows]
+"""
+import asyncio
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator
+from services.batch_orders import get_batch_pool, process_batch, shutdown_batch_pool
+from services.menu_index import get_menu_index
+
+
+def make_csv(rows: int, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    index = get_menu_index()
+    menu = [(item["ItemName"], index.sizes(item)) for item in index.items]
+    lines, order = ["order_ref,item,qty,size,coupon_code,address"], 0
+    while len(lines) <= rows:
+        order += 1
+        for name, sizes in rng.sample(menu, rng.randint(1, 5)):
+            if rng.random() < 0.3:
+                name = name.lower()
+            if rng.random() < 0.2 and len(name) > 4:
+                cut = rng.randrange(1, len(name) - 1)
+                name = name[:cut] + name[cut + 1:]
+            size = rng.choice(sizes) if sizes else ""
+            lines.append(f'ORD-{order},"{name}",{rng.choice([1, 2, 5, 12])},{size},,"Adajan, Surat 395009"')
+    return ("\n".join(lines[:rows + 1]) + "\n").encode("utf-8")
+
+
+async def stream(body: bytes, chunk: int = 64 * 1024) -> AsyncIterator[bytes]:
+    for i in range(0, len(body), chunk):
+        yield body[i:i + chunk]
+
+
+async def run(rows: int = 20_000) -> None:
+    body = make_csv(rows)
+    pool = get_batch_pool()
+    # Warm the workers (imports + menu load) so the timing is steady state
+    await process_batch(stream(make_csv(2000, seed=1)), executor=pool, rows_per_chunk=50)
+
+    modes = [
+        ("single thread", dict(rows_per_chunk=rows + 1)),
+        ("thread pool", dict(executor=ThreadPoolExecutor())),
+        ("process pool", dict(executor=pool)),
+    ]
+    print(f"{rows} rows, {len(body) / 1024:.0f} KiB")
+    print(f"{'mode':<16} {'elapsed s':>10} {'rows/s':>10} {'failed':>8}")
+    for name, kwargs in modes:
+        result = await process_batch(stream(body), **kwargs)
+        print(f"{name:<16} {result['elapsed_ms'] / 1000:>10.2f} {result['rows_per_sec']:>10} "
+              f"{result['rows_failed']:>8}")
+    shutdown_batch_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000))
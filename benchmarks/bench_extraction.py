@@ -0,0 +1,81 @@
+"""
+Full vs incremental extraction: prompt bytes and turn latency for
+conversations of 1–30 turns, against a stubbed local model.
+
+    python -m benchmarks.bench_extraction
+"""
+import asyncio
+import json
+import time
+from agents.extraction import ExtractionAgent
+from benchmarks.fake_llm import FakeModel
+from services.menu_index import load_menu_index
+from services.session_store import new_session_state
+
+TURNS = (1, 5, 10, 20, 30)
+
+# Typical follow-ups after the opening order message
+REPLIES = [
+    "Make it 2 boxes please, and the 500 gm pack",
+    "Deliver it on 25th October, morning if possible",
+    "Cash on delivery",
+    "My name is Riya Shah, phone 9876543210",
+    "Address is 12 Shanti Kunj, Ring Road, Surat 395002",
+    "Actually also add one more box of the same sweet for my office",
+]
+
+
+def _messages(names, turns):
+    opener = f"Hi, I want 1 kg {names[0]} and 2 boxes of {names[1]} for Diwali"
+    return [opener] + [REPLIES[t % len(REPLIES)] for t in range(turns - 1)]
+
+
+def _responder(names):
+    """Answer in the shape the prompt asks for; contents do not affect sizes."""
+    items = [{"name": names[0], "qty": 1, "size_or_weight": "1 kg"},
+             {"name": names[1], "qty": 2, "size_or_weight": "500 gm"}]
+
+    def respond(prompt: str) -> str:
+        if "add_items" in prompt:
+            return json.dumps({"add_items": items} if '"items":[]' in prompt else {})
+        return json.dumps({"items": items})
+    return respond
+
+
+async def run_conversation(mode: str, turns: int, names) -> dict:
+    agent = ExtractionAgent(mode=mode)
+    agent.gemini.model = FakeModel(_responder(names), base_latency=0.002, per_kb_latency=0.001)
+    # Every prompt must reach the model to be measured, not the response cache
+    agent.gemini.cache = None
+    state = new_session_state()
+
+    latencies = []
+    for message in _messages(names, turns):
+        state["transcript"].append(message)
+        start = time.perf_counter()
+        state = await agent.run(state)
+        latencies.append(time.perf_counter() - start)
+
+    sizes = agent.gemini.model.prompt_bytes
+    return {
+        "mode": mode,
+        "turns": turns,
+        "last_prompt_bytes": sizes[-1],
+        "total_prompt_bytes": sum(sizes),
+        "last_turn_ms": round(latencies[-1] * 1000, 2),
+        "mean_turn_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+    }
+
+
+async def main() -> None:
+    names = load_menu_index().names
+    print(f"{'mode':<12} {'turns':>5} {'last B':>8} {'total B':>9} {'last ms':>8} {'mean ms':>8}")
+    for turns in TURNS:
+        for mode in ("full", "incremental"):
+            r = await run_conversation(mode, turns, names)
+            print(f"{r['mode']:<12} {r['turns']:>5} {r['last_prompt_bytes']:>8} "
+                  f"{r['total_prompt_bytes']:>9} {r['last_turn_ms']:>8} {r['mean_turn_ms']:>8}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+"""
+Micro-benchmark: accuracy and latency of each fuzzy scorer on the real menu.
+
+Queries are synthetic but deterministic variants of every menu name
+(lowercase, typo, dropped word, appended pack size, shuffled words).
+A hit means the top match has the same preprocessed name as the source item.
+
+    python -m benchmarks.bench_fuzzy_scorers
+"""
+import random
+import time
+from collections import defaultdict
+from typing import List, Tuple
+from rapidfuzz import process
+from services.fuzzy_service import SCORERS, classify_query
+from services.menu_index import load_menu_index, preprocess_name
+
+
+def make_queries(names: List[str], seed: int = 0) -> List[Tuple[str, str, str]]:
+    """Return (variant kind, query, expected preprocessed name) triples."""
+    rng = random.Random(seed)
+    queries = []
+    for name in names:
+        target = preprocess_name(name)
+        words = target.split()
+        queries.append(("lower", name.lower(), target))
+
+        w = rng.randrange(len(words))
+        if len(words[w]) > 3:
+            c = rng.randrange(len(words[w]))
+            typo = words[:w] + [words[w][:c] + words[w][c + 1:]] + words[w + 1:]
+            queries.append(("typo", " ".join(typo).lower(), target))
+
+        if len(words) >= 3:
+            drop = rng.randrange(len(words))
+            queries.append(("dropped_word", " ".join(words[:drop] + words[drop + 1:]).lower(), target))
+
+        queries.append(("with_size", f"{name.lower()} {rng.choice(['1 kg', '500 gm', '250gm'])}", target))
+
+        if len(words) >= 2:
+            shuffled = words[:]
+            rng.shuffle(shuffled)
+            queries.append(("shuffled", " ".join(shuffled).lower(), target))
+    return queries
+
+
+def run() -> None:
+    index = load_menu_index()
+    queries = make_queries(index.names)
+    print(f"{len(index)} menu items, {len(queries)} queries\n")
+
+    print(f"{'scorer':<16} {'class':<12} {'n':>5} {'top1':>7} {'us/query':>9}")
+    for scorer_name, scorer in SCORERS.items():
+        by_class = defaultdict(lambda: [0, 0, 0.0])
+        for _, query, target in queries:
+            q = preprocess_name(query)
+            start = time.perf_counter()
+            best = process.extractOne(q, index.choices, scorer=scorer, processor=None)
+            elapsed = time.perf_counter() - start
+            stats = by_class[classify_query(q)]
+            stats[0] += 1
+            stats[1] += best is not None and best[0] == target
+            stats[2] += elapsed
+        for cls, (n, hits, secs) in sorted(by_class.items()):
+            print(f"{scorer_name:<16} {cls:<12} {n:>5} {hits / n:>7.1%} {secs / n * 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    run()
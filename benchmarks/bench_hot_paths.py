@@ -0,0 +1,91 @@
+"""
+Micro-benchmarks of the per-turn hot paths: find_price (exact name,
+lowercased name, misspelt name that needs the fuzzy fallback),
+fuzzy_match_item and compute_missing (complete and empty orders).
+
+Inputs are drawn from parsed_menu.json. Each case runs in `--repeat`
+batches and the best batch's mean is reported (least scheduler noise).
+Results go to benchmarks/results/ as JSON (see benchmarks/results.py).
+
+    python -m benchmarks.bench_hot_paths [--number 2000] [--compare old.json]
+"""
+import argparse
+import random
+import time
+from typing import Any, Callable, Dict, List
+
+from benchmarks.results import compare, load_results, write_results
+from models.order import Order
+from services.fuzzy_service import fuzzy_match_item
+from services.menu_index import get_menu_index
+from services.menu_service import find_price
+from utils.missing import compute_missing
+
+
+def typo(rng: random.Random, name: str) -> str:
+    cut = rng.randrange(1, len(name) - 1)
+    return name[:cut] + name[cut + 1:]
+
+
+def bench(fn: Callable[[Any], Any], inputs: List[Any], number: int, repeat: int) -> float:
+    """Best-of-`repeat` mean seconds per call over `number` calls cycling through `inputs`."""
+    calls = [inputs[i % len(inputs)] for i in range(number)]
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for arg in calls:
+            fn(arg)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def cases(rng: random.Random) -> Dict[str, tuple]:
+    index = get_menu_index()
+    sized = [(item["ItemName"], sizes) for item in index.items
+             if (sizes := index.sizes(item))]
+    picks = [rng.choice(sized) for _ in range(200)]
+    exact = [(name, rng.choice(sizes)) for name, sizes in picks]
+    misspelt = [(typo(rng, name), size) for name, size in exact if len(name) > 4]
+
+    complete = Order.model_validate({
+        "items": [{"name": n, "qty": 2, "size_or_weight": s} for n, s in exact[:3]],
+        "delivery_date": "2025-10-25", "payment_method": "UPI",
+        "contact": {"name": "Riya Shah", "phone": "9876543210", "address": "Adajan, Surat"},
+    })
+    return {
+        "find_price_exact": (lambda a: find_price(*a), exact),
+        "find_price_lowercase": (lambda a: find_price(a[0].lower(), a[1]), exact),
+        "find_price_fuzzy": (lambda a: find_price(*a), misspelt),
+        "fuzzy_match_item_exact": (fuzzy_match_item, [name for name, _ in exact]),
+        "fuzzy_match_item_misspelt": (fuzzy_match_item, [name for name, _ in misspelt]),
+        "compute_missing_complete": (compute_missing, [complete]),
+        "compute_missing_empty": (compute_missing, [Order()]),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=2000, help="calls per batch")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="result file (default benchmarks/results/hot_paths-<time>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    metrics: Dict[str, float] = {}
+    print(f"{'case':<28} {'us/call':>9} {'calls/s':>10}")
+    for name, (fn, inputs) in cases(random.Random(args.seed)).items():
+        fn(inputs[0])  # warm caches (menu index load)
+        seconds = bench(fn, inputs, args.number, args.repeat)
+        metrics[f"{name}_us"] = round(seconds * 1e6, 3)
+        print(f"{name:<28} {seconds * 1e6:>9.2f} {1 / seconds:>10.0f}")
+
+    params = {k: v for k, v in vars(args).items() if k not in ("out", "compare")}
+    path = write_results("hot_paths", metrics, params, args.out)
+    print(f"wrote {path}")
+    if args.compare:
+        compare(load_results(args.compare), load_results(path))
+
+
+if __name__ == "__main__":
+    main()
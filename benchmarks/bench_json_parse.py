@@ -0,0 +1,67 @@
+"""
+Raw Gemini output → Order: legacy regex path vs single-pass extractor.
+
+The samples mirror outputs captured from the "RAW Gemini output" log:
+fenced JSON, prose around the object, native JSON mode and a response
+truncated at the token limit (inside the third item's name, so only the
+first two items are kept).
+
+    python -m benchmarks.bench_json_parse
+"""
+import json
+import re
+import timeit
+from pydantic import ValidationError
+from models.order import Order
+from utils.json_extract import extract_json_object
+
+ORDER_JSON = json.dumps({
+    "items": [
+        {"name": "Kaju Katri", "qty": 1, "size_or_weight": "1 kg"},
+        {"name": "ROYAL SPECIAL GIFT BOX", "qty": 12, "size_or_weight": "500 gm"},
+        {"name": "Mysore Pak", "qty": 2, "size_or_weight": "250 gm"},
+    ],
+    "delivery_date": "25th October",
+    "payment_method": "cash on delivery",
+    "contact": {"name": "Riya Shah", "phone": "9876543210", "address": "12 Shanti Kunj, Surat"},
+}, indent=2)
+
+SAMPLES = {
+    "fenced": f"```json\n{ORDER_JSON}\n```",
+    "prose": f"Sure! Here is the extracted order:\n{ORDER_JSON}\nLet me know if {{anything}} changes.",
+    "native_json": ORDER_JSON,
+    "truncated": ORDER_JSON[: ORDER_JSON.index('"Mysore Pak"') + 8],
+}
+
+
+def legacy_parse(raw: str) -> Order:
+    """The pre-change GeminiClient.clean_json + model_validate_json path."""
+    raw = re.sub(r"```json|```", "", raw).strip()
+    match = re.search(r"\{.*\}", raw, re.DOTALL)
+    text = "{}"
+    if match:
+        try:
+            text = json.dumps(json.loads(match.group(0)))
+        except json.JSONDecodeError:
+            text = "{}"
+    return Order.model_validate_json(text)
+
+
+def single_pass_parse(raw: str) -> Order:
+    return Order.model_validate(extract_json_object(raw))
+
+
+def run(number: int = 5000) -> None:
+    print(f"{'sample':<12} {'parser':<12} {'items':>5} {'us/parse':>9}")
+    for name, raw in SAMPLES.items():
+        for label, parse in (("legacy", legacy_parse), ("single_pass", single_pass_parse)):
+            try:
+                items = len(parse(raw).items)
+            except ValidationError:
+                items = "err"
+            secs = timeit.timeit(lambda: parse(raw), number=number)
+            print(f"{name:<12} {label:<12} {items:>5} {secs / number * 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    run()
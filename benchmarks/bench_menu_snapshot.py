@@ -0,0 +1,105 @@
+"""
+Menu load: parsed_menu.json (json.load + MenuIndex) vs the mmap snapshot.
+
+The real menu is replicated into a large synthetic catalog (renamed items,
+same shape), written both ways, then each loader runs in a fresh
+interpreter so RSS is not polluted by the others:
+
+  - json:           read_json + MenuIndex, then exact lookups
+  - snapshot:       MenuSnapshot.open, then zero-copy find/price lookups
+  - snapshot_index: load_menu_index via the snapshot (SnapshotMenuIndex:
+                    names decoded for fuzzy matching, lookups read the map)
+
+json and snapshot_index are the paths the app takes; snapshot is the
+floor, with no fuzzy-matching columns at all.
+
+    python -m benchmarks.bench_menu_snapshot [items]
+"""
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+from services.menu_index import MenuIndex, load_menu_index
+from services.menu_snapshot import MenuSnapshot, snapshot_path, write_snapshot
+from utils.file_manager import read_json, write_json, MENU_DATA
+
+LOOKUPS = 2000
+
+
+def make_catalog(size: int) -> List[Dict[str, Any]]:
+    base = read_json(MENU_DATA) or []
+    items = []
+    for i in range(size):
+        item = json.loads(json.dumps(base[i % len(base)]))
+        item["ItemId"] = i + 1
+        item["ItemName"] = f"{item['ItemName']} {i // len(base)}"
+        items.append(item)
+    return items
+
+
+def rss_kb() -> int:
+    """Current resident set size (falls back to peak RSS off Linux)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def child(mode: str, path: str) -> None:
+    """Runs in its own interpreter; prints one JSON result line."""
+    before = rss_kb()
+    start = time.perf_counter()
+    if mode == "json":
+        index = MenuIndex(read_json(path))
+        names = index.names
+        lookup = lambda name: index.price_for(index.get(name), "1 kg")  # noqa: E731
+    elif mode == "snapshot":
+        snap = MenuSnapshot.open(snapshot_path(path))
+        names = [snap.name(i) for i in range(0, len(snap), max(1, len(snap) // LOOKUPS))]
+        lookup = lambda name: snap.price(name, "1 kg")  # noqa: E731
+    else:
+        index = load_menu_index(Path(path))
+        names = index.names
+        lookup = lambda name: index.price_for(index.get(name), "1 kg")  # noqa: E731
+    load_ms = (time.perf_counter() - start) * 1000
+    loaded = rss_kb()
+
+    sample = names[::max(1, len(names) // LOOKUPS)][:LOOKUPS]
+    start = time.perf_counter()
+    for name in sample:
+        lookup(name)
+    lookup_us = (time.perf_counter() - start) / len(sample) * 1e6
+    print(json.dumps({"load_ms": load_ms, "rss_kb": loaded - before, "lookup_us": lookup_us}))
+
+
+def run(size: int = 50_000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "parsed_menu.json"
+        items = make_catalog(size)
+        index = MenuIndex(items)
+        write_json(path, items)
+        write_snapshot(snapshot_path(path), items, index.content_hash)
+        print(f"{size} items: json {path.stat().st_size / 1e6:.1f} MB, "
+              f"snapshot {snapshot_path(path).stat().st_size / 1e6:.1f} MB\n")
+
+        print(f"{'loader':<15} {'load ms':>9} {'RSS +MB':>9} {'us/lookup':>10}")
+        for mode in ("json", "snapshot", "snapshot_index"):
+            out = subprocess.run([sys.executable, "-m", "benchmarks.bench_menu_snapshot", "--child", mode, str(path)],
+                                 capture_output=True, text=True, check=True).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            print(f"{mode:<15} {result['load_ms']:>9.1f} {result['rss_kb'] / 1024:>9.1f} {result['lookup_us']:>10.2f}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(sys.argv[2], sys.argv[3])
+    else:
+        run(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -0,0 +1,62 @@
+"""
+Cost of the latency instrumentation (utils/metrics.py) per use.
+
+Times an empty `timed()` block, an instrumented no-op node against the
+bare coroutine, and a full turn of trace_turn + six nodes + a few timed
+blocks, then renders /metrics once with every series populated.
+
+    python -m benchmarks.bench_metrics [iterations]
+"""
+import asyncio
+import sys
+import time
+from utils.metrics import instrument_node, render_metrics, timed, trace_turn
+
+NODES = ["extraction", "clarification", "validation", "pricing", "confirmation", "fulfillment"]
+
+
+async def noop(state: dict) -> dict:
+    return state
+
+
+async def run(iterations: int = 100_000) -> None:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with timed("fuzzy"):
+            pass
+    timed_us = (time.perf_counter() - start) / iterations * 1e6
+
+    wrapped = instrument_node("bench", noop)
+    results = {}
+    for name, fn in (("bare node", noop), ("instrumented node", wrapped)):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await fn({})
+        results[name] = (time.perf_counter() - start) / iterations * 1e6
+
+    nodes = [instrument_node(name, noop) for name in NODES]
+    turns = iterations // 10
+    start = time.perf_counter()
+    for _ in range(turns):
+        with trace_turn("bench") as trace:
+            for node in nodes:
+                await node({})
+            with timed("llm"), timed("fuzzy"):
+                pass
+            trace.status = "priced"
+    turn_us = (time.perf_counter() - start) / turns * 1e6
+
+    start = time.perf_counter()
+    text = render_metrics()
+    render_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{'measure':<28} {'us':>8}")
+    print(f"{'timed() block':<28} {timed_us:>8.2f}")
+    for name, us in results.items():
+        print(f"{name:<28} {us:>8.2f}")
+    print(f"{'traced turn (6 nodes)':<28} {turn_us:>8.2f}")
+    print(f"render /metrics: {render_ms:.2f} ms for {len(text.splitlines())} lines")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
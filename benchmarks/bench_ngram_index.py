@@ -0,0 +1,107 @@
+"""
+Recall and latency of the trigram shortlist (services/ngram_index.py).
+
+Recall check: for every query variant of every menu name (the variants
+of bench_fuzzy_scorers plus Hinglish respellings such as katri → katli,
+barfi → burfi, laddu → ladoo), the best match of a full scan must be in
+the query's shortlist. Run on parsed_menu.json and on a synthetic
+catalog of a few thousand names built from the menu's words. Exits
+non-zero if any true best match is dropped.
+
+Latency: one query scored by a full scan (plain and folded comparisons
+against every name) against score_candidates, which prunes to the
+shortlist on menus of FUZZY_PRUNE_MIN_ITEMS or more.
+
+    python -m benchmarks.bench_ngram_index [catalog_size]
+"""
+import random
+import re
+import sys
+import time
+from typing import List, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from benchmarks.bench_fuzzy_scorers import make_queries
+from services.fuzzy_service import FOLDED_WEIGHT, score_candidates
+from services.menu_index import MenuIndex, load_menu_index, preprocess_name
+from services.ngram_index import fold_spelling
+from utils.config import FUZZY_SHORTLIST_SIZE
+
+# Menu spelling → how customers also write it
+RESPELLINGS = [("KATRI", "katli"), ("BARFI", "burfi"), ("LADDU", "ladoo"), ("PEDA", "pedha"),
+               ("CHUR", "choor"), ("KESAR", "kesar"), ("BHOG", "bog"), ("PISTA", "pistaa")]
+
+
+def hinglish_queries(names: List[str]) -> List[Tuple[str, str, str]]:
+    queries = []
+    for name in names:
+        target = preprocess_name(name)
+        respelt = target
+        for menu_form, spoken in RESPELLINGS:
+            respelt = re.sub(menu_form, spoken, respelt, flags=re.IGNORECASE)
+        if respelt != target:
+            queries.append(("hinglish", respelt.lower(), target))
+    return queries
+
+
+def synthetic_catalog(index: MenuIndex, size: int, seed: int = 0) -> MenuIndex:
+    rng = random.Random(seed)
+    words = sorted({w for name in index.choices for w in name.split() if len(w) > 2})
+    names = set(index.choices)
+    while len(names) < size:
+        names.add(" ".join(rng.sample(words, rng.randint(2, 4))))
+    items = [{"ItemId": i, "ItemName": name, "CategoryName": "Synthetic", "Price": 100, "SizeListWidget": []}
+             for i, name in enumerate(sorted(names))]
+    return MenuIndex(items)
+
+
+def full_scores(index: MenuIndex, q: str) -> np.ndarray:
+    """Unpruned reference: every name, plain and folded, folded weighted like score_candidates."""
+    plain = process.cdist([q], index.choices, scorer=fuzz.WRatio, processor=None, workers=1)[0]
+    folded = process.cdist([fold_spelling(q)], index.folded, scorer=fuzz.WRatio, processor=None, workers=1)[0]
+    return np.maximum(plain, folded * FOLDED_WEIGHT)
+
+
+def recall(label: str, index: MenuIndex, queries: List[Tuple[str, str, str]], limit: int) -> int:
+    dropped = []
+    full_s = pruned_s = 0.0
+    for kind, query, _ in queries:
+        q = preprocess_name(query)
+        start = time.perf_counter()
+        scores = full_scores(index, q)
+        full_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        pruned, _ = score_candidates(index, [q])
+        pruned_s += time.perf_counter() - start
+
+        best = scores.max()
+        shortlist = index.ngrams.shortlist(fold_spelling(q), limit)
+        # Any name tied for the best score counts as the true best
+        if best and not np.isin(np.flatnonzero(scores == best), shortlist).any() or pruned.max() < best:
+            dropped.append((kind, query, index.names[int(np.argmax(scores))], float(best)))
+
+    n = len(queries)
+    print(f"{label:<22} {len(index):>6} {n:>7} {1 - len(dropped) / n:>8.2%} "
+          f"{full_s / n * 1e6:>9.1f} {pruned_s / n * 1e6:>9.1f}")
+    for kind, query, name, score in dropped[:10]:
+        print(f"  dropped [{kind}] {query!r} → {name!r} ({score:.1f})")
+    return len(dropped)
+
+
+def run(catalog_size: int = 5000) -> int:
+    index = load_menu_index()
+    queries = make_queries(index.names) + hinglish_queries(index.names)
+    catalog = synthetic_catalog(index, catalog_size)
+
+    print(f"shortlist size {FUZZY_SHORTLIST_SIZE}")
+    print(f"{'catalog':<22} {'items':>6} {'queries':>7} {'recall':>8} {'full us':>9} {'pruned us':>9}")
+    dropped = recall("parsed_menu.json", index, queries, FUZZY_SHORTLIST_SIZE)
+    dropped += recall("synthetic", catalog, queries, FUZZY_SHORTLIST_SIZE)
+    return 1 if dropped else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
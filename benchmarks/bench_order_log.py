@@ -0,0 +1,77 @@
+"""
+Cost of recording one order as history grows: the old read-modify-write
+JSON array vs the group-committed order log.
+
+For each history size the file is pre-filled, then 200 orders are
+appended one at a time (sequential, like one customer after another) and
+as one concurrent burst (orders placed at the same time share an fsync).
+
+    python -m benchmarks.bench_order_log
+"""
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+from utils.order_log import OrderLog
+
+ORDER = {
+    "order_id": "0" * 32, "session_id": "bench", "shop_id": "1833",
+    "order": {"items": [{"name": "Kaju Katri", "qty": 2, "size_or_weight": "1 kg"}],
+              "delivery_date": "2025-10-25", "payment_method": "UPI",
+              "contact": {"name": "Riya Shah", "phone": "9876543210", "address": "12 Shanti Kunj, Surat"}},
+    "pricing": {"subtotal": 2200, "taxes": 110.0, "delivery": 0, "grand_total": 2310.0},
+}
+APPENDS = 200
+
+
+def legacy_append_json(file_path: Path, new_data: dict) -> None:
+    """The pre-change utils.file_manager.append_json."""
+    if not file_path.exists():
+        file_path.write_text("[]", encoding="utf-8")
+    data = json.loads(file_path.read_text(encoding="utf-8"))
+    data.append(new_data)
+    file_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+def bench_legacy(history: int, tmp: Path) -> float:
+    path = tmp / "orders.json"
+    path.write_text(json.dumps([ORDER] * history, indent=2), encoding="utf-8")
+    start = time.perf_counter()
+    for _ in range(APPENDS):
+        legacy_append_json(path, ORDER)
+    return (time.perf_counter() - start) / APPENDS * 1e6
+
+
+async def bench_log(history: int, tmp: Path, concurrent: bool) -> float:
+    directory = tmp / f"log-{history}-{concurrent}"
+    directory.mkdir()
+    line = json.dumps({"seq": 0, "ts": 0, "kind": "order.placed", "key": None, "data": ORDER}) + "\n"
+    (directory / "orders-000001.jsonl").write_text(line * history, encoding="utf-8")
+
+    log = OrderLog(directory, flush_interval=0.002 if concurrent else 0)
+    log.start()
+    start = time.perf_counter()
+    if concurrent:
+        await asyncio.gather(*[log.append_durable("order.placed", ORDER) for _ in range(APPENDS)])
+    else:
+        for _ in range(APPENDS):
+            await log.append_durable("order.placed", ORDER)
+    elapsed = time.perf_counter() - start
+    await log.stop()
+    return elapsed / APPENDS * 1e6
+
+
+def run() -> None:
+    print(f"{'history':>9} {'legacy us':>11} {'log us':>9} {'log burst us':>13}")
+    for history in (100, 1_000, 10_000, 50_000):
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            legacy = bench_legacy(history, tmp) if history <= 10_000 else float("nan")
+            sequential = asyncio.run(bench_log(history, tmp, concurrent=False))
+            burst = asyncio.run(bench_log(history, tmp, concurrent=True))
+            print(f"{history:>9} {legacy:>11.0f} {sequential:>9.0f} {burst:>13.0f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,76 @@
+"""
+Latency added to the fulfillment turn by persisting an order.
+
+Places orders through OrderStore.place (WAL, worker-thread connections)
+one at a time and in concurrent bursts, on top of an already populated
+table, and reports p50/p99 per placement plus lookup latency by phone.
+
+    python -m benchmarks.bench_order_store
+"""
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from services.order_store import OrderStore
+
+PRELOAD = 20_000
+
+
+def make_state(i: int) -> dict:
+    return {
+        "session_id": f"s{i}", "shop_id": "1833",
+        "order": {"items": [], "delivery_date": f"2025-10-{i % 28 + 1:02d}", "payment_method": "UPI",
+                  "contact": {"name": "Riya Shah", "phone": f"98{i % 100_000:08d}", "address": "Surat"}},
+        "pricing": {"lines": [{"name": "Kaju Katri", "size": "1 kg", "qty": 2, "unit": 1100, "total": 2200},
+                              {"name": "Mysore Pak", "size": "500 gm", "qty": 1, "unit": 300, "total": 300}],
+                    "subtotal": 2500, "taxes": 125, "delivery": 0, "grand_total": 2625},
+    }
+
+
+def pct(samples, q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+
+
+async def timed(store: OrderStore, i: int) -> float:
+    start = time.perf_counter()
+    await store.place(f"order-{i}", f"key-{i}", make_state(i))
+    return time.perf_counter() - start
+
+
+async def run() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        store = OrderStore(Path(tmp) / "orders.db")
+        for i in range(PRELOAD):
+            await store.place(f"order-{i}", f"key-{i}", make_state(i))
+
+        n = PRELOAD
+        sequential = []
+        for _ in range(500):
+            sequential.append(await timed(store, n))
+            n += 1
+
+        burst = []
+        for _ in range(50):
+            burst += await asyncio.gather(*[timed(store, n + j) for j in range(16)])
+            n += 16
+
+        duplicate = [await timed(store, i) for i in range(200)]
+
+        lookups = []
+        for i in range(500):
+            start = time.perf_counter()
+            await store.find(phone=f"98{i:08d}")
+            lookups.append(time.perf_counter() - start)
+        store.close()
+
+    print(f"{'case':<22} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+    for name, samples in (("place (sequential)", sequential), ("place (16 concurrent)", burst),
+                          ("place (duplicate key)", duplicate), ("find by phone", lookups)):
+        print(f"{name:<22} {pct(samples, 0.5):>8.2f} {pct(samples, 0.99):>8.2f} "
+              f"{statistics.mean(samples) * 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
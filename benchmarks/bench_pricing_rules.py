@@ -0,0 +1,93 @@
+"""
+Price 100k synthetic orders against parsed_menu.json with a rule set that
+exercises every rule type (category discounts, quantity breaks, coupons,
+delivery zones, per-shop tax).
+
+Orders have 1-5 lines drawn from the real menu with one of each item's
+real sizes; a third carry a coupon and half a zoned address. Reported:
+line resolution (PricingAgent.price_lines), rule evaluation alone
+(PricingRules.price) and the pre-rules hardcoded formula for reference.
+
+    python -m benchmarks.bench_pricing_rules [orders]
+"""
+import random
+import sys
+import time
+from typing import Any, Dict, List
+from agents.pricing import PricingAgent
+from models.order import OrderItem
+from services.menu_index import get_menu_index
+from services.pricing_rules import PricingRulebook
+
+SPEC = {
+    "version": "bench",
+    "default": {
+        "tax_rate": 0.05,
+        "delivery": {"fee": 40, "free_above": 1000, "zones": [
+            {"name": "Adajan", "pincodes": ["395009"], "keywords": ["adajan"], "fee": 30, "free_above": 800},
+            {"name": "Vesu", "pincodes": ["395007"], "keywords": ["vesu"], "fee": 50},
+        ]},
+        "category_discounts": [{"category": "Peda", "percent": 10}, {"category": "Laddu", "percent": 5}],
+        "quantity_breaks": [
+            {"categories": ["24 CARATS MITHAI MAGIC GIFT BOX", "Assorted Boxes"], "min_qty": 10, "percent": 5},
+            {"categories": ["24 CARATS MITHAI MAGIC GIFT BOX", "Assorted Boxes"], "min_qty": 25, "percent": 8},
+        ],
+        "coupons": {"DIWALI10": {"percent": 10, "min_subtotal": 500, "max_discount": 300},
+                    "FLAT50": {"amount": 50}},
+    },
+    "shops": {"1833": {"tax_rate": 0.05}},
+}
+ADDRESSES = ["12 Shanti Kunj, Adajan, Surat 395009", "Vesu Main Road, Surat", "Ring Road, Surat 395002"]
+COUPONS = [None, None, None, None, "DIWALI10", "FLAT50"]
+
+
+def make_orders(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    index = get_menu_index()
+    menu = [(item["ItemName"], index.sizes(item)) for item in index.items]
+    orders = []
+    for _ in range(count):
+        items = []
+        for name, sizes in rng.sample(menu, rng.randint(1, 5)):
+            items.append(OrderItem(name=name, qty=rng.choice([1, 1, 2, 3, 5, 12, 30]),
+                                   size_or_weight=rng.choice(sizes) if sizes else None))
+        orders.append({"items": items, "coupon": rng.choice(COUPONS), "address": rng.choice(ADDRESSES)})
+    return orders
+
+
+def legacy_totals(subtotal: int) -> int:
+    taxes = round(subtotal * 0.05)
+    delivery = 40 if subtotal < 1000 else 0
+    return subtotal + taxes + delivery
+
+
+def run(count: int = 100_000) -> None:
+    orders = make_orders(count)
+    agent = PricingAgent()
+    rules = PricingRulebook(SPEC).for_shop()
+
+    start = time.perf_counter()
+    priced = [agent.price_lines(order["items"]) for order in orders]
+    resolve_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for (lines, subtotal, misses) in priced:
+        legacy_totals(subtotal)
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    discounted = 0
+    for order, (lines, _, misses) in zip(orders, priced):
+        result = rules.price(lines, order["coupon"], order["address"])
+        discounted += result["discounts"] > 0
+    rules_s = time.perf_counter() - start
+
+    print(f"{count} orders, {sum(len(o['items']) for o in orders)} lines, {discounted} with discounts")
+    print(f"{'stage':<24} {'total s':>8} {'us/order':>9} {'orders/s':>10}")
+    for name, seconds in (("resolve lines", resolve_s), ("rules (compiled)", rules_s),
+                          ("legacy formula", legacy_s)):
+        print(f"{name:<24} {seconds:>8.2f} {seconds / count * 1e6:>9.1f} {count / seconds:>10.0f}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,119 @@
+"""
+Quality and speed of the description/category search
+(services/semantic_search.py).
+
+Quality: vague requests from real chats ("dry fruit sweets", "something
+sugar free", "bread for sandwiches") with the items or categories a
+person would accept; reports hit@1 and hit@k and lists the misses.
+
+Speed: one query at a time vs the same queries as one batch, a full
+index build, and an incremental rebuild after a few items' descriptions
+change (only those are re-tokenised).
+
+    python -m benchmarks.bench_semantic_search [--k 5] [--compare old.json]
+"""
+import argparse
+import time
+from typing import Dict, List, Tuple
+
+from benchmarks.results import compare, load_results, write_results
+from services.menu_index import MenuIndex, load_menu_index
+from services.semantic_search import SemanticIndex
+
+# (request, acceptable item-name substrings or "category:<name>")
+CASES: List[Tuple[str, Tuple[str, ...]]] = [
+    ("dry fruit sweets", ("category:Dryfruit Sweets", "category:HANDCRAFTED DRYFRUITS SWEETS", "Dryfruit")),
+    ("something sugar free", ("Sugar Free",)),
+    ("chocolate cake", ("CHOCOLATE CAKE", "CHOCO LAVA CAKE", "CHOCOCHIP CAKE")),
+    ("something with cashew", ("Kaju", "KAJU")),
+    ("desi ghee sweets", ("category:Desi Ghee Sweets",)),
+    ("bread for sandwiches", ("BREAD",)),
+    ("fig roll", ("Anjir Roll", "Anjeer Roll")),
+    ("khoya sweets", ("category:Mawa Sweets", "MAWA")),
+    ("pistachio mithai", ("Pista",)),
+    ("laddoo", ("LADDU",)),
+    ("cookies", ("COOKIES", "Buscuit")),
+    ("gift box for diwali", ("GIFT BOX", "Gift Box")),
+    ("almond sweets", ("Badam", "BADAM")),
+    ("peda", ("PEDA",)),
+]
+
+
+def accepted(item: Dict, wanted: Tuple[str, ...]) -> bool:
+    for w in wanted:
+        if w.startswith("category:"):
+            if item.get("CategoryName", "").strip().lower() == w[9:].lower():
+                return True
+        elif w.lower() in item["ItemName"].lower():
+            return True
+    return False
+
+
+def quality(index: SemanticIndex, menu: MenuIndex, k: int) -> Tuple[float, float]:
+    by_name = {item["ItemName"]: item for item in menu.items}
+    results = index.search([q for q, _ in CASES], k)
+    hit1 = hitk = 0
+    for (query, wanted), hits in zip(CASES, results):
+        ok = [accepted(by_name[name], wanted) for name, _ in hits]
+        hit1 += bool(ok[:1] and ok[0])
+        hitk += any(ok)
+        if not any(ok):
+            print(f"  miss {query!r} → {[name for name, _ in hits]}")
+    return hit1 / len(CASES), hitk / len(CASES)
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--changed", type=int, default=5, help="items edited before the incremental rebuild")
+    parser.add_argument("--out", help="result file (default benchmarks/results/semantic_search-<time>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    menu = load_menu_index()
+    index = SemanticIndex(menu)
+    queries = [q for q, _ in CASES]
+    hit1, hitk = quality(index, menu, args.k)
+
+    single = best_of(lambda: [index.search([q], args.k) for q in queries], args.repeat) / len(queries)
+    batched = best_of(lambda: index.search(queries, args.k), args.repeat) / len(queries)
+    full = best_of(lambda: SemanticIndex(menu), args.repeat)
+
+    edited = [dict(item) for item in menu.items]
+    for item in edited[:args.changed]:
+        item["Description"] = (item.get("Description") or "") + " Now with extra saffron."
+    changed_menu = MenuIndex(edited)
+    incremental = best_of(lambda: SemanticIndex(changed_menu, index), args.repeat)
+
+    metrics = {
+        "items": index.size,
+        "features": len(index.postings),
+        "hit_at_1": round(hit1, 3),
+        f"hit_at_{args.k}": round(hitk, 3),
+        "single_query_us": round(single * 1e6, 1),
+        "batched_query_us": round(batched * 1e6, 1),
+        "full_build_ms": round(full * 1e3, 2),
+        "incremental_build_ms": round(incremental * 1e3, 2),
+    }
+    for key, value in metrics.items():
+        print(f"{key:<22} {value}")
+
+    params = {k: v for k, v in vars(args).items() if k not in ("out", "compare")}
+    path = write_results("semantic_search", metrics, params, args.out)
+    print(f"wrote {path}")
+    if args.compare:
+        compare(load_results(args.compare), load_results(path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Worker start-up cost: how long a fresh process takes to import `main`,
+run the app lifespan (graph compile, optional pre-warm) and answer its
+first chat turn, with STARTUP_PREWARM off and on.
+
+Every run is a new interpreter (`--runs` of each, median reported):
+- import_ms: `import main`
+- startup_ms: lifespan start-up (what uvicorn waits for before serving)
+- first_request_ms / second_request_ms: the first two chat turns
+- time_to_first_request_ms: process spawn → first response, interpreter
+  start included
+Also prints the slowest imports under `main` from `python -X importtime`.
+The LLM is FakeModel (swapped in after the real model, and so the Gemini
+SDK, is loaded), so turns measure only local work.
+
+    python -m benchmarks.bench_startup [--runs 5] [--compare old.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+from benchmarks.results import compare, load_results, write_results
+
+MESSAGE = "Hi, I want 2 x 500 gm kaju katri"
+
+
+def child() -> None:
+    """One measured start-up, printed as JSON (runs in the spawned process)."""
+    start = time.perf_counter()
+    import asyncio
+
+    import httpx
+
+    import main
+    from benchmarks.fake_llm import FakeModel
+    from services.llm_client import get_gemini_client
+    imported = time.perf_counter()
+
+    async def run() -> Dict[str, float]:
+        transport = httpx.ASGITransport(app=main.app)
+        async with main.lifespan(main.app):
+            ready = time.perf_counter()
+            async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+                first_start = time.perf_counter()
+                # A real first turn imports the Gemini SDK unless the pre-warm did
+                get_gemini_client().model
+                get_gemini_client().model = FakeModel()
+                (await client.post("/api/startup-1", json={"user_message": MESSAGE})).raise_for_status()
+                first_done = time.perf_counter()
+                wall_first = time.time()
+                (await client.post("/api/startup-2", json={"user_message": MESSAGE})).raise_for_status()
+                second_done = time.perf_counter()
+        return {
+            "import_ms": (imported - start) * 1000,
+            "startup_ms": (ready - imported) * 1000,
+            "first_request_ms": (first_done - first_start) * 1000,
+            "second_request_ms": (second_done - first_done) * 1000,
+            "first_response_at": wall_first,
+        }
+
+    print(json.dumps(asyncio.run(run())))
+
+
+def spawn(prewarm: bool, tmp: str) -> Dict[str, float]:
+    env = dict(os.environ, STARTUP_PREWARM="1" if prewarm else "0", MENU_REFRESH_SECONDS="0",
+               ORDER_LOG_DIR=os.path.join(tmp, "order_log"), ORDER_DB_PATH=os.path.join(tmp, "orders.db"),
+               SESSION_BACKEND="memory", PYTHONWARNINGS="ignore")
+    spawned = time.time()
+    out = subprocess.run([sys.executable, "-m", "benchmarks.bench_startup", "--child"], env=env,
+                         capture_output=True, text=True, check=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    result["time_to_first_request_ms"] = (result.pop("first_response_at") - spawned) * 1000
+    return result
+
+
+def slowest_imports(top: int) -> List[Tuple[str, float]]:
+    """(module, cumulative ms) of the slowest direct and second-level imports under main."""
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                         env=dict(os.environ, PYTHONWARNINGS="ignore"),
+                         capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth <= 2:
+            rows.append((name.strip(), int(cumulative) / 1000))
+    return sorted(rows, key=lambda r: -r[1])[:top]
+
+
+def main() -> None:
+    if "--child" in sys.argv:
+        child()
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per setting")
+    parser.add_argument("--top", type=int, default=12, help="slowest imports to list")
+    parser.add_argument("--out", help="result file (default benchmarks/results/startup-<time>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    print(f"{'module':<40} {'cumulative ms':>14}")
+    for name, ms in slowest_imports(args.top):
+        print(f"{name:<40} {ms:>14.1f}")
+    print()
+
+    metrics: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory(prefix="order-startup-") as tmp:
+        for prewarm in (False, True):
+            runs = [spawn(prewarm, tmp) for _ in range(args.runs)]
+            label = "prewarm" if prewarm else "cold"
+            for key in runs[0]:
+                metrics[f"{label}_{key}"] = round(statistics.median(r[key] for r in runs), 1)
+
+    for key, value in metrics.items():
+        print(f"{key:<40} {value:>10}")
+    params = {k: v for k, v in vars(args).items() if k not in ("out", "compare")}
+    path = write_results("startup", metrics, params, args.out)
+    print(f"wrote {path}")
+    if args.compare:
+        compare(load_results(args.compare), load_results(path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Deterministic stand-in for `genai.GenerativeModel` used by the benchmarks.
+
+Latency is modelled as `base_latency + per_kb_latency * prompt_kb`, so that
+prompt size shows up in turn latency the way prefill cost does upstream.
+"""
+import asyncio
+from types import SimpleNamespace
+from typing import Callable, List, Optional
+
+
+def _response(text: str) -> SimpleNamespace:
+    part = SimpleNamespace(text=text)
+    return SimpleNamespace(text=text, candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+
+class FakeModel:
+    def __init__(self, responder: Optional[Callable[[str], str]] = None,
+                 base_latency: float = 0.0, per_kb_latency: float = 0.0,
+                 failures: int = 0, error: Exception = ConnectionError("fake upstream down")):
+        self.responder = responder or (lambda prompt: "{}")
+        self.base_latency = base_latency
+        self.per_kb_latency = per_kb_latency
+        # The first `failures` calls raise `error` (retry / breaker testing)
+        self.failures = failures
+        self.error = error
+        self.prompt_bytes: List[int] = []
+
+    async def generate_content_async(self, prompt: str, stream: bool = False, **kwargs):
+        size = len(prompt.encode("utf-8"))
+        self.prompt_bytes.append(size)
+        delay = self.base_latency + self.per_kb_latency * size / 1024
+        if delay:
+            await asyncio.sleep(delay)
+        if self.failures > 0:
+            self.failures -= 1
+            raise self.error
+        text = self.responder(prompt)
+        if stream:
+            return self._stream(text)
+        return _response(text)
+
+    async def _stream(self, text: str):
+        """Yield the response word by word, like a streamed generation."""
+        for word in text.split(" "):
+            await asyncio.sleep(0)
+            yield SimpleNamespace(text=word + " ")
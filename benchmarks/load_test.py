@@ -0,0 +1,206 @@
+"""
+End-to-end load test: many concurrent multi-turn conversations against
+main.app in-process (httpx ASGITransport, app lifespan running), with the
+shared GeminiClient's model swapped for FakeModel.
+
+Each conversation orders 1-3 random sized items from parsed_menu.json and
+then gives a delivery date, payment method, name + phone and address, one
+per turn, and replies CONFIRM to the order summary, so it runs extraction
+(LLM and rule fast path), clarification, pricing, confirmation and
+fulfillment like a real customer. The fake model
+answers from the scripted conversation, after `--latency` seconds plus
+`--per-kb` seconds per KiB of prompt.
+
+Reported: turns/sec, p50/p95/p99 turn latency, completed orders, and
+memory per retained session (tracemalloc, measured in a separate pass so
+it does not slow the timed run) next to its serialized state size.
+Results go to benchmarks/results/ as JSON (see benchmarks/results.py).
+
+The order log and order DB go to a temporary directory unless
+ORDER_LOG_DIR / ORDER_DB_PATH are set.
+
+    python -m benchmarks.load_test --sessions 200 --concurrency 50 --latency 0.05
+"""
+import argparse
+import os
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="order-load-")
+os.environ.setdefault("ORDER_LOG_DIR", os.path.join(_TMP, "order_log"))
+os.environ.setdefault("ORDER_DB_PATH", os.path.join(_TMP, "orders.db"))
+os.environ.setdefault("MENU_REFRESH_SECONDS", "0")
+
+import asyncio
+import gc
+import json
+import random
+import re
+import time
+import tracemalloc
+from typing import Dict, List, Tuple
+
+import httpx
+
+import main
+from benchmarks.fake_llm import FakeModel
+from benchmarks.results import compare, load_results, write_results
+from routers.chat import SESSIONS
+from services.llm_client import get_gemini_client
+from services.menu_index import get_menu_index
+
+FIRST_NAMES = ["Riya", "Amit", "Neha", "Karan", "Pooja", "Vikram", "Sneha", "Rahul"]
+LAST_NAMES = ["Shah", "Patel", "Mehta", "Desai", "Joshi", "Iyer"]
+AREAS = ["Adajan", "Vesu", "Ring Road", "Athwa Lines", "Piplod", "Citylight"]
+PAYMENTS = ["cash on delivery", "UPI please", "I will pay by card"]
+MONTHS = ["october", "november", "december"]
+
+_USER_RE = re.compile(r"^\s*User: (.*)$", re.MULTILINE)
+
+
+def make_conversation(rng: random.Random, menu: List[Tuple[str, Tuple[str, ...]]]) -> List[Tuple[str, Dict]]:
+    """(user message, what the LLM would extract from it) for each turn."""
+    picks = rng.sample(menu, rng.randint(1, 3))
+    items = [{"name": name, "qty": rng.randint(1, 5), "size_or_weight": rng.choice(sizes)} for name, sizes in picks]
+    opener = "Hi, I want " + " and ".join(
+        f"{it['qty']} x {it['size_or_weight']} {it['name'].lower() if rng.random() < 0.5 else it['name']}"
+        for it in items)
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    phone = f"9{rng.randrange(10 ** 8, 10 ** 9)}"
+    address = f"{rng.randint(1, 300)} {rng.choice(['Shanti Kunj', 'Green Park', 'Sai Darshan'])}, " \
+              f"{rng.choice(AREAS)}, Surat 3950{rng.randint(0, 9):02d}"
+    return [
+        (opener, {"add_items": items}),
+        (f"deliver on {rng.randint(1, 28)} {rng.choice(MONTHS)}", {}),
+        (rng.choice(PAYMENTS), {}),
+        (f"my name is {name}, phone {phone}", {}),
+        (f"Deliver to {address}", {"contact": {"address": address}}),
+        ("CONFIRM", {}),
+    ]
+
+
+class ScriptedResponder:
+    """Answers extraction prompts from the scripted conversations (by user message)."""
+
+    def __init__(self):
+        self.answers: Dict[str, Dict] = {}
+
+    def add(self, conversation: List[Tuple[str, Dict]]) -> None:
+        for message, delta in conversation:
+            self.answers[message] = delta
+
+    def __call__(self, prompt: str) -> str:
+        match = _USER_RE.search(prompt)
+        delta = self.answers.get(match.group(1).strip(), {}) if match else {}
+        if "add_items" in prompt or not match:
+            return json.dumps(delta) if match else "Could you share the remaining details?"
+        # Full-transcript extraction expects a whole order
+        return json.dumps({"items": delta.get("add_items", []), "contact": delta.get("contact", {})})
+
+
+def pct(samples: List[float], q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))] * 1000 if samples else 0.0
+
+
+async def run_conversation(client: httpx.AsyncClient, session_id: str,
+                           conversation: List[Tuple[str, Dict]], latencies: List[float]) -> str:
+    status = None
+    for message, _ in conversation:
+        start = time.perf_counter()
+        response = await client.post(f"/api/{session_id}", json={"user_message": message})
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+        status = response.json()["state"].get("status")
+    return status
+
+
+async def drive(client: httpx.AsyncClient, conversations: Dict[str, List], concurrency: int,
+                latencies: List[float]) -> List[str]:
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(session_id: str, conversation: List) -> str:
+        async with gate:
+            return await run_conversation(client, session_id, conversation, latencies)
+
+    return await asyncio.gather(*(one(sid, conv) for sid, conv in conversations.items()))
+
+
+async def run(args: argparse.Namespace) -> Dict[str, float]:
+    rng = random.Random(args.seed)
+    index = get_menu_index()
+    menu = [(item["ItemName"], sizes) for item in index.items
+            if (sizes := index.sizes(item))]
+
+    responder = ScriptedResponder()
+    gemini = get_gemini_client()
+    gemini.model = FakeModel(responder, base_latency=args.latency, per_kb_latency=args.per_kb)
+
+    def conversations(prefix: str, count: int) -> Dict[str, List]:
+        convs = {f"{prefix}-{i}": make_conversation(rng, menu) for i in range(count)}
+        for conv in convs.values():
+            responder.add(conv)
+        return convs
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.lifespan(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=120) as client:
+            # Warm-up: menu index, fuzzy tables, SQLite, order log segment
+            await drive(client, conversations("warm", min(10, args.sessions)), args.concurrency, [])
+
+            latencies: List[float] = []
+            timed = conversations("load", args.sessions)
+            start = time.perf_counter()
+            statuses = await drive(client, timed, args.concurrency, latencies)
+            elapsed = time.perf_counter() - start
+
+            # Memory: sessions retained in the store after a second, untimed pass
+            gc.collect()
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            kept = conversations("mem", args.memory_sessions)
+            await drive(client, kept, args.concurrency, [])
+            gc.collect()
+            after = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            state_bytes = [len(json.dumps(SESSIONS.get(sid), default=str)) for sid in kept]
+
+    turns = len(latencies)
+    return {
+        "sessions": args.sessions,
+        "turns": turns,
+        "orders_fulfilled": sum(1 for s in statuses if s == "fulfilled"),
+        "elapsed_s": round(elapsed, 3),
+        "turns_per_sec": round(turns / elapsed, 1),
+        "p50_ms": round(pct(latencies, 0.50), 2),
+        "p95_ms": round(pct(latencies, 0.95), 2),
+        "p99_ms": round(pct(latencies, 0.99), 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+        "memory_per_session_kb": round((after - before) / max(1, len(kept)) / 1024, 2),
+        "state_bytes_per_session": round(sum(state_bytes) / max(1, len(state_bytes))),
+    }
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake LLM seconds per call")
+    parser.add_argument("--per-kb", type=float, default=0.0, help="extra fake LLM seconds per prompt KiB")
+    parser.add_argument("--memory-sessions", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="result file (default benchmarks/results/load_test-<time>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    metrics = asyncio.run(run(args))
+    for key, value in metrics.items():
+        print(f"{key:<26} {value}")
+    params = {k: v for k, v in vars(args).items() if k not in ("out", "compare")}
+    path = write_results("load_test", metrics, params, args.out)
+    print(f"wrote {path}")
+    if args.compare:
+        compare(load_results(args.compare), load_results(path))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,97 @@
+"""
+Local HTTP stand-in for the FoodChow menu API.
+
+Serves a FoodChow-shaped payload (menu JSON encoded as a string in the
+'data' field) rebuilt from data/parsed_menu.json, or from a captured
+response file, with ETag / If-None-Match support.
+
+    python -m benchmarks.menu_stub --port 8765
+    MENU_API_URL is fixed per SHOP_ID, so point MenuFetcher(url=...) at
+    http://127.0.0.1:8765/ when testing.
+"""
+import argparse
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import groupby
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from utils.file_manager import read_json, MENU_DATA
+
+
+def build_foodchow_payload(items: List[Dict[str, Any]]) -> bytes:
+    """Inverse of extract_required_items: nest items back under CategoryList."""
+    categories = []
+    for (cat_id, cat_name), group in groupby(items, key=lambda it: (it["CategoryId"], it["CategoryName"])):
+        categories.append({
+            "CategryId": cat_id,
+            "CategryName": cat_name,
+            "ItemListWidget": [
+                {k: it[k] for k in ("ItemId", "ItemName", "Description", "Price", "SizeId", "SizeListWidget")}
+                for it in group
+            ],
+        })
+    return json.dumps({"success": True, "data": json.dumps({"CategoryList": categories})}).encode("utf-8")
+
+
+class MenuStub:
+    """Threaded HTTP server; `body` can be swapped to simulate a menu change."""
+
+    def __init__(self, body: bytes, port: int = 0):
+        self.body = body
+        self.requests = 0
+        self.not_modified = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests += 1
+                etag = '"' + hashlib.sha256(stub.body).hexdigest()[:16] + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    stub.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(stub.body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(stub.body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+    def start(self) -> "MenuStub":
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--payload", type=Path, help="captured FoodChow response to serve as-is")
+    args = parser.parse_args()
+
+    body = args.payload.read_bytes() if args.payload else build_foodchow_payload(read_json(MENU_DATA) or [])
+    stub = MenuStub(body, args.port)
+    print(f"Serving FoodChow stub at {stub.url}")
+    stub.server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+JSON result files for the benchmark suite, so runs can be compared.
+
+Each file holds the benchmark name, run metadata (git commit, Python,
+platform, arguments) and a flat {metric: number} dict. `compare` prints
+the relative change per metric against an earlier file.
+
+    python -m benchmarks.results old.json new.json
+"""
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=Path(__file__).parent, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def write_results(name: str, metrics: Dict[str, float], params: Optional[Dict[str, Any]] = None,
+                  out: Optional[Union[str, Path]] = None) -> Path:
+    """Write one run to `out` (default benchmarks/results/{name}-{timestamp}.json)."""
+    path = Path(out) if out else RESULTS_DIR / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "benchmark": name,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": params or {},
+        "metrics": metrics,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    return path
+
+
+def load_results(path: Union[str, Path]) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> None:
+    """Print each metric of two runs side by side with the relative change."""
+    print(f"{old['benchmark']}: {old.get('commit')} → {new.get('commit')}")
+    print(f"{'metric':<36} {'old':>12} {'new':>12} {'change':>8}")
+    for metric, value in new["metrics"].items():
+        before = old["metrics"].get(metric)
+        change = f"{(value - before) / before * 100:+.1f}%" if before else ""
+        before = "" if before is None else f"{before:.4g}"
+        print(f"{metric:<36} {before:>12} {value:>12.4g} {change:>8}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m benchmarks.results OLD.json NEW.json")
+    compare(load_results(sys.argv[1]), load_results(sys.argv[2]))
@@ -1,13 +1,70 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from routers import menu, chat
+from fastapi.responses import PlainTextResponse
+from routers import menu, chat, shops, orders
+from agents.orchestration import get_graph
+from services.fuzzy_service import fuzzy_match_item
+from services.llm_client import get_gemini_client
+from services.menu_index import get_menu_index
+from services.menu_service import MenuRefresher
+from services.batch_orders import shutdown_batch_pool
+from services.order_store import close_order_store
+from services.semantic_search import get_semantic_index
+from utils.config import SEMANTIC_SEARCH_ENABLED, STARTUP_PREWARM
+from utils.logger import get_logger
+from utils.metrics import render_metrics
+from utils.order_log import get_order_log
 
-app = FastAPI(title="Order Engine API")
+logger = get_logger(__name__)
+
+
+def prewarm() -> None:
+    """Load what the first turn would otherwise load: menu, match indexes, Gemini SDK."""
+    index = get_menu_index()
+    if index:
+        fuzzy_match_item(index.names[0])
+    if SEMANTIC_SEARCH_ENABLED:
+        get_semantic_index()
+    get_gemini_client().model
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile the graph (imports langgraph) before taking traffic
+    start = time.perf_counter()
+    await asyncio.to_thread(get_graph)
+    if STARTUP_PREWARM:
+        await asyncio.to_thread(prewarm)
+    logger.info(f"Startup work done in {time.perf_counter() - start:.2f}s (prewarm={STARTUP_PREWARM})")
+    # Keep the menu fresh in the background (MENU_REFRESH_SECONDS=0 disables)
+    refresher = MenuRefresher()
+    refresher.start()
+    order_log = get_order_log()
+    order_log.start()
+    yield
+    await refresher.stop()
+    # Flush queued order/session records before exiting
+    await order_log.stop()
+    close_order_store()
+    shutdown_batch_pool()
+
+
+app = FastAPI(title="Order Engine API", lifespan=lifespan)
 
 # Include routes
 app.include_router(menu.router, prefix="/api", tags=["Menu"])
+app.include_router(shops.router, prefix="/api/shops", tags=["Shops"])
+app.include_router(orders.router, prefix="/api", tags=["Orders"])
 app.include_router(chat.router, prefix="/api", tags=["Order"])
 # app.include_router(fuzzy_routes.router, prefix="/api", tags=["Fuzzy"])
 
 @app.get("/")
 def home():
     return {"message": "Order Engine API Running!"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Turn, node and LLM/fuzzy/menu-I/O latency histograms (Prometheus text format)."""
+    return render_metrics()
@@ -16,6 +16,17 @@ class Order(PBase):
     delivery_date: Optional[str] = None
     payment_method: Optional[str] = None
     contact: Contact = Field(default_factory=Contact)
+    coupon_code: Optional[str] = None
+
+class OrderDelta(PBase):
+    """Changes to an existing order extracted from a single user message."""
+    add_items: List[OrderItem] = Field(default_factory=list)
+    update_items: List[OrderItem] = Field(default_factory=list)
+    remove_items: List[str] = Field(default_factory=list)
+    delivery_date: Optional[str] = None
+    payment_method: Optional[str] = None
+    contact: Contact = Field(default_factory=Contact)
+    coupon_code: Optional[str] = None
 
 STATE: Dict[str, Any] = {
     "status": "new",
@@ -37,4 +48,6 @@ class ChatRequest(PBase):
 
 class ChatResponse(PBase):
     assistant_message: str
-    state: Dict[str, Any]
\ No newline at end of file
+    state: Dict[str, Any]
+    # Correlates the turn with its timings in the logs (see utils/metrics.py)
+    trace_id: Optional[str] = None
\ No newline at end of file
@@ -1,12 +1,22 @@
-from fastapi import APIRouter
-from models.order import ChatResponse, ChatRequest, STATE
-from agents.orchestration import GRAPH
-from typing import Dict
+import json
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from fastapi import APIRouter, Header, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from models.order import ChatResponse, ChatRequest, Order
+from agents.orchestration import extract, get_graph
+from services.llm_client import LLMUnavailable, get_gemini_client
+from services.question_templates import build_question
+from services.session_store import create_session_store
+from utils.config import CLARIFY_LOCALE
+from utils.logger import get_logger
+from utils.metrics import Trace, trace_turn
+from utils.order_log import get_order_log
 
 router = APIRouter()
+logger = get_logger(__name__)
 
 # Store session states separately
-SESSIONS: Dict[str, Dict] = {}
+SESSIONS = create_session_store()
 
 
 # from services.fuzzy_service import fuzzy_match_item
@@ -36,24 +46,174 @@ SESSIONS: Dict[str, Dict] = {}
 #         }
 
 
-@router.post("/{session_id}", response_model=ChatResponse)
-async def chat(session_id: str, req: ChatRequest):
-    # Get session state (or create fresh copy)
-    state = SESSIONS.get(session_id, STATE.copy())
-    
-    # Add new user message
-    # state["user_message"] = req.user_message
-    # state.setdefault("transcript", []).append(req.user_message)
+def _load_session(session_id: str, shop_id: Optional[str] = None,
+                  idempotency_key: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    Session state plus its store key. Shop-scoped sessions are keyed by
+    shop and carry `shop_id`, so every agent reads that shop's menu.
+    An Idempotency-Key is kept for this turn only (see FulfillmentAgent).
+    """
+    key = f"{shop_id}:{session_id}" if shop_id else session_id
+    state = SESSIONS.load(key)
+    state["session_id"] = session_id
+    if shop_id:
+        state["shop_id"] = shop_id
+    if idempotency_key:
+        state["idempotency_key"] = idempotency_key
+    return key, state
+
+
+def _save_session(key: str, state: Dict[str, Any]) -> None:
+    state.pop("idempotency_key", None)
+    SESSIONS.put(key, state)
+
 
-    STATE["transcript"].append(req.user_message)
+def _log_turn(state: Dict[str, Any], user_message: str, trace: Trace) -> None:
+    """Record the turn in the order log (queued, not awaited)."""
+    trace.status = state.get("status")
+    get_order_log().append("session.turn", {
+        "session_id": state.get("session_id"),
+        "shop_id": state.get("shop_id"),
+        "user_message": user_message,
+        "status": state.get("status"),
+        "trace_id": trace.trace_id,
+    })
+    logger.debug(f"Turn {trace.trace_id} ({trace.status}) timings ms: {trace.summary()}")
 
-    # Run graph
-    new_state = await GRAPH.ainvoke(STATE)
 
-    # Update session state
-    SESSIONS[session_id] = new_state
+async def run_turn(session_id: str, user_message: str, shop_id: Optional[str] = None,
+                   idempotency_key: Optional[str] = None) -> ChatResponse:
+    with trace_turn("chat") as trace:
+        # Get session state (or create a fresh, isolated one)
+        key, state = _load_session(session_id, shop_id, idempotency_key)
+
+        # Add new user message
+        state.setdefault("transcript", []).append(user_message)
+
+        # Run graph
+        new_state = await get_graph().ainvoke(state)
+
+        # Update session state
+        _save_session(key, new_state)
+        _log_turn(new_state, user_message, trace)
 
     return ChatResponse(
         assistant_message=new_state.get("assistant_message", ""),
-        state=new_state
+        state=new_state,
+        trace_id=trace.trace_id,
     )
+
+
+@router.post("/{session_id}", response_model=ChatResponse)
+async def chat(session_id: str, req: ChatRequest,
+               idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    return await run_turn(session_id, req.user_message, idempotency_key=idempotency_key)
+
+
+@router.get("/fast-path/stats")
+def fast_path_stats():
+    """Hit/miss counters of the rule-based extraction fast path."""
+    rules = extract.rules
+    return {"enabled": extract.fast_path, **rules.stats, "hit_rate": round(rules.hit_rate, 3)}
+
+
+def _template_question(state: Dict[str, Any]) -> str:
+    order = Order(**state.get("order", {}))
+    return build_question(order, state.get("missing_fields", []), state.get("locale", CLARIFY_LOCALE),
+                          state.get("shop_id"))
+
+
+async def _tokens(state: Dict[str, Any]) -> AsyncIterator[str]:
+    """
+    Text of the assistant reply, chunk by chunk. A clarification the graph
+    left unphrased is streamed from Gemini; local text is split on words.
+    If Gemini fails before its first chunk the template question is sent
+    instead; after that, LLMUnavailable is raised to the caller.
+    """
+    message = state.get("assistant_message")
+    if message is None and state.get("status") == "needs_clarification":
+        order = Order(**state.get("order", {}))
+        streamed = False
+        try:
+            async for chunk in get_gemini_client().clarify_stream(order, state.get("missing_fields", [])):
+                streamed = True
+                yield chunk
+            return
+        except LLMUnavailable:
+            if streamed:
+                # Part of a question is out; don't follow it with a different one
+                raise
+            message = _template_question(state)
+
+    words = (message or "").split(" ")
+    for i, word in enumerate(words):
+        yield word if i == len(words) - 1 else word + " "
+
+
+async def turn_events(session_id: str, user_message: str, shop_id: Optional[str] = None,
+                      idempotency_key: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run one chat turn and yield events as they happen:
+      node  – a graph node finished (name + status)
+      token – a piece of the assistant reply
+      error – the reply broke off mid-stream; `done` carries a complete one
+      done  – final reply, state and trace id, after the session is saved
+    """
+    with trace_turn("stream") as trace:
+        key, state = _load_session(session_id, shop_id, idempotency_key)
+        state.setdefault("transcript", []).append(user_message)
+        state["stream_clarify"] = True
+
+        final = state
+        async for update in get_graph().astream(state, stream_mode="updates"):
+            for node, node_state in update.items():
+                final = node_state
+                yield {"event": "node", "node": node, "status": node_state.get("status")}
+
+        parts = []
+        try:
+            async for token in _tokens(final):
+                parts.append(token)
+                yield {"event": "token", "text": token}
+        except LLMUnavailable as e:
+            logger.warning(f"Clarification stream broke off for {session_id}: {e}")
+            yield {"event": "error", "detail": "The reply was interrupted"}
+            parts = [_template_question(final)]
+
+        final.pop("stream_clarify", None)
+        final["assistant_message"] = "".join(parts).strip()
+        _save_session(key, final)
+        _log_turn(final, user_message, trace)
+    yield {"event": "done", "assistant_message": final["assistant_message"], "state": final,
+           "trace_id": trace.trace_id}
+
+
+def sse_response(events: AsyncIterator[Dict[str, Any]]) -> StreamingResponse:
+    """Format turn events as server-sent events."""
+    async def sse() -> AsyncIterator[str]:
+        async for event in events:
+            name = event.pop("event")
+            yield f"event: {name}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(sse(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.post("/{session_id}/stream")
+async def chat_stream(session_id: str, req: ChatRequest,
+                      idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    """Server-sent events version of the chat endpoint."""
+    return sse_response(turn_events(session_id, req.user_message, idempotency_key=idempotency_key))
+
+
+@router.websocket("/{session_id}/ws")
+async def chat_ws(websocket: WebSocket, session_id: str):
+    """WebSocket option: send {"user_message": ...}, receive the same events as JSON."""
+    await websocket.accept()
+    try:
+        while True:
+            req = ChatRequest(**await websocket.receive_json())
+            async for event in turn_events(session_id, req.user_message):
+                await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
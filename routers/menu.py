@@ -1,13 +1,25 @@
-from fastapi import APIRouter
-from services.menu_service import refresh_and_store_menu, get_item_names
+from typing import Optional
+from fastapi import APIRouter, Query
+from services.menu_service import refresh_menu_async, get_menu_fetcher, get_item_names
+from services.menu_index import get_menu_index
+from services.semantic_search import search_items
+from utils.config import SEMANTIC_TOP_K, SHOP_ID_PATTERN
 
 router = APIRouter()
 
 @router.get("/menu/refresh")
-def refresh_menu():
-    data = refresh_and_store_menu()
-    return {"message": "Menu updated", "total_items": len(data)}
+async def refresh_menu():
+    changed = await refresh_menu_async(get_menu_fetcher())
+    message = "Menu updated" if changed else "Menu unchanged"
+    return {"message": message, "total_items": len(get_menu_index())}
 
 @router.get("/menu/items")
 def list_items():   
     return {"items": get_item_names()}
+
+@router.get("/menu/search")
+def search_menu(q: str = Query(..., min_length=1), k: int = Query(SEMANTIC_TOP_K, ge=1, le=50),
+                shop_id: Optional[str] = Query(None, pattern=SHOP_ID_PATTERN)):
+    """Items matching a free-text request by name, category and description."""
+    hits = search_items([q], k, shop_id)[0]
+    return {"query": q, "items": [{"name": name, "score": score} for name, score in hits]}
@@ -0,0 +1,40 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from services.batch_orders import BatchError, BatchTooLarge, process_batch
+from services.order_store import get_order_store
+from utils.config import SHOP_ID_PATTERN
+
+router = APIRouter()
+
+@router.get("/orders")
+async def find_orders(phone: Optional[str] = None, date: Optional[str] = None,
+                      limit: int = Query(50, ge=1, le=500)):
+    """Placed orders, newest first, by customer phone and/or delivery date (YYYY-MM-DD)."""
+    if not phone and not date:
+        raise HTTPException(status_code=400, detail="Filter by phone and/or date")
+    orders = await get_order_store().find(phone=phone, delivery_date=date, limit=limit)
+    return {"count": len(orders), "orders": orders}
+
+@router.post("/orders/batch")
+async def batch_orders(request: Request, format: Optional[str] = Query(None, pattern="^(csv|jsonl)$"),
+                       shop_id: Optional[str] = Query(None, pattern=SHOP_ID_PATTERN)):
+    """
+    Price a CSV or JSONL upload of order lines (format in
+    services/batch_orders.py). The format comes from ?format= or the
+    Content-Type (JSON/NDJSON types mean JSONL, anything else CSV).
+    """
+    content_type = request.headers.get("content-type", "")
+    fmt = format or ("jsonl" if "json" in content_type else "csv")
+    try:
+        return await process_batch(request.stream(), fmt, shop_id)
+    except BatchTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except BatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/orders/{order_id}")
+async def get_order(order_id: str):
+    order = await get_order_store().get(order_id)
+    if order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order
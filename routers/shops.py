@@ -0,0 +1,43 @@
+from typing import Annotated, Optional
+from fastapi import APIRouter, Header, Path
+from models.order import ChatResponse, ChatRequest
+from routers.chat import run_turn, turn_events, sse_response
+from services.menu_service import refresh_menu_async, get_menu_fetcher, get_item_names
+from services.menu_index import get_menu_index, resident_shops
+from utils.config import MAX_RESIDENT_SHOPS, SHOP_ID_PATTERN
+
+# Validated before it reaches a menu file path or the FoodChow URL
+ShopId = Annotated[str, Path(pattern=SHOP_ID_PATTERN)]
+
+router = APIRouter()
+
+@router.get("/stats")
+def shop_stats():
+    """How many shop menus are resident in memory, and their sizes."""
+    shops = resident_shops()
+    return {
+        "resident_shops": len(shops),
+        "max_resident_shops": MAX_RESIDENT_SHOPS,
+        "resident_items": sum(shops.values()),
+        "shops": shops,
+    }
+
+@router.get("/{shop_id}/menu/refresh")
+async def refresh_shop_menu(shop_id: ShopId):
+    changed = await refresh_menu_async(get_menu_fetcher(shop_id), shop_id=shop_id)
+    message = "Menu updated" if changed else "Menu unchanged"
+    return {"message": message, "shop_id": shop_id, "total_items": len(get_menu_index(shop_id))}
+
+@router.get("/{shop_id}/menu/items")
+def list_shop_items(shop_id: ShopId):
+    return {"shop_id": shop_id, "items": get_item_names(shop_id)}
+
+@router.post("/{shop_id}/chat/{session_id}", response_model=ChatResponse)
+async def shop_chat(shop_id: ShopId, session_id: str, req: ChatRequest,
+                    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    return await run_turn(session_id, req.user_message, shop_id, idempotency_key)
+
+@router.post("/{shop_id}/chat/{session_id}/stream")
+async def shop_chat_stream(shop_id: ShopId, session_id: str, req: ChatRequest,
+                           idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    return sse_response(turn_events(session_id, req.user_message, shop_id, idempotency_key))
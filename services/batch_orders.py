@@ -0,0 +1,264 @@
+"""
+Bulk order ingestion for POST /api/orders/batch.
+
+Uploads are CSV (with a header row) or JSONL, one line item per row:
+
+    order_ref,item,qty,size,coupon_code,address
+    ACME-1,Kaju Katri,20,500 gm,DIWALI10,"Acme Ltd, Adajan, Surat 395009"
+    ACME-1,Royal Special Gift Box,50,1 kg,,
+    ACME-2,Mysore Pak,10,250 gm,,
+
+Rows sharing an order_ref form one order (coupon/address are read from its
+first row that has them); rows without one are orders of their own. The
+body is parsed as it streams in, item names are matched per chunk with one
+batched fuzzy call, and chunks of whole orders are priced on a process
+pool with the same PricingAgent lines and shop pricing rules as chat.
+"""
+import asyncio
+import codecs
+import csv
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+from agents.pricing import PricingAgent
+from models.order import OrderItem
+from services.fuzzy_service import fuzzy_match_items
+from services.menu_index import get_menu_index, load_menu_index, menu_path, set_menu_index
+from services.pricing_rules import get_pricing_rules
+from utils.config import BATCH_WORKERS, BATCH_CHUNK_ROWS, BATCH_MAX_ROWS, BATCH_START_METHOD
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Accepted header spellings → canonical column
+COLUMNS = {
+    "order_ref": "order_ref", "order": "order_ref", "order_id": "order_ref", "ref": "order_ref",
+    "item": "item", "item_name": "item", "name": "item", "product": "item",
+    "qty": "qty", "quantity": "qty",
+    "size": "size", "size_or_weight": "size", "weight": "size",
+    "coupon_code": "coupon_code", "coupon": "coupon_code",
+    "address": "address", "delivery_address": "address",
+}
+
+
+class BatchError(ValueError):
+    """The upload cannot be processed as a whole (bad format)."""
+
+
+class BatchTooLarge(BatchError):
+    """The upload has more than BATCH_MAX_ROWS rows."""
+
+
+# ---- Streaming parse ----
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines without buffering the whole body."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_rows(chunks: AsyncIterator[bytes], fmt: str = "csv") -> AsyncIterator[Dict[str, Any]]:
+    """Yield canonical row dicts ({item, qty, size, ...}) from a CSV or JSONL stream."""
+    header: Optional[List[str]] = None
+    record = ""
+    async for line in _lines(chunks):
+        if fmt == "jsonl":
+            if line.strip():
+                try:
+                    raw = json.loads(line)
+                except ValueError:
+                    raw = {"_error": "invalid_json"}
+                if not isinstance(raw, dict):
+                    raw = {"_error": "invalid_json"}
+                yield {COLUMNS.get(k.strip().lower(), k): v for k, v in raw.items()}
+            continue
+
+        # A quoted CSV field may contain newlines: wait for balanced quotes
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            continue
+        values, record = next(csv.reader([record]), []), ""
+        if not any(v.strip() for v in values):
+            continue
+        if header is None:
+            header = [COLUMNS.get(v.strip().lower(), v.strip().lower()) for v in values]
+            if "item" not in header:
+                raise BatchError("CSV header needs an item (or item_name) column")
+            continue
+        yield dict(zip(header, values))
+    if record:
+        raise BatchError("Unterminated quoted field at end of CSV")
+
+
+def group_orders(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Bundle rows into orders by order_ref, keeping first-seen order."""
+    orders: Dict[str, Dict[str, Any]] = {}
+    for number, row in enumerate(rows, start=1):
+        ref = str(row.get("order_ref") or "").strip() or f"row-{number}"
+        order = orders.setdefault(ref, {"order_ref": ref, "rows": [], "coupon_code": None, "address": None})
+        order["rows"].append({**row, "row": number})
+        for field in ("coupon_code", "address"):
+            if not order[field] and row.get(field):
+                order[field] = str(row[field]).strip()
+    return list(orders.values())
+
+
+def _chunks(orders: List[Dict[str, Any]], rows_per_chunk: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk, size = [], 0
+    for order in orders:
+        chunk.append(order)
+        size += len(order["rows"])
+        if size >= rows_per_chunk:
+            yield chunk
+            chunk, size = [], 0
+    if chunk:
+        yield chunk
+
+
+# ---- Pricing (runs in worker processes) ----
+def _parse_qty(value: Any) -> Optional[int]:
+    try:
+        qty = int(float(str(value).strip()))
+    except (TypeError, ValueError):
+        return None
+    return qty if qty > 0 else None
+
+
+def price_chunk(orders: List[Dict[str, Any]], shop_id: Optional[str], menu_hash: str) -> List[Dict[str, Any]]:
+    """
+    Match and price a chunk of orders. Module-level so it pickles for the
+    process pool; workers reload the menu when the parent's has changed.
+    """
+    index = get_menu_index(shop_id)
+    if index.content_hash != menu_hash:
+        index = load_menu_index(menu_path(shop_id))
+        set_menu_index(index, shop_id)
+
+    rows = [row for order in orders for row in order["rows"]]
+    # One cdist call for the whole chunk; this process is already one of many
+    matches = iter(fuzzy_match_items([str(r.get("item") or "") for r in rows if r.get("item")],
+                                     workers=1, shop_id=shop_id))
+    agent = PricingAgent()
+    rules = get_pricing_rules(shop_id)
+
+    results = []
+    for order in orders:
+        row_results, items, priced_rows = [], [], []
+        for row in order["rows"]:
+            result = {"row": row["row"], "order_ref": order["order_ref"], "item": row.get("item"),
+                      "qty": row.get("qty"), "size": row.get("size") or None,
+                      "matched": None, "match": None, "unit": None, "total": None, "error": None}
+            row_results.append(result)
+            if row.get("_error"):
+                result["error"] = row["_error"]
+                continue
+            if not row.get("item"):
+                result["error"] = "missing_item"
+                continue
+            status, best, suggestions = next(matches)
+            result["match"] = status
+            if suggestions:
+                result["suggestions"] = suggestions
+            qty = _parse_qty(row.get("qty"))
+            if status == "none":
+                result["error"] = "unknown_item"
+            elif status != "high_confidence":
+                # A best guess is not billed; the suggestions go back instead
+                result["error"] = "ambiguous_item"
+            elif qty is None:
+                result["error"] = "invalid_qty"
+            else:
+                result["matched"] = best
+                items.append(OrderItem(name=best, qty=qty, size_or_weight=result["size"]))
+                priced_rows.append(result)
+
+        lines, _, misses = agent.price_lines(items, shop_id)
+        # Misses come back in line order, one per unpriced line
+        unpriced = iter(misses)
+        for result, line in zip(priced_rows, lines):
+            result["qty"], result["size"] = line["qty"], line["size"]
+            result["unit"], result["total"] = line["unit"], line["total"]
+            if line["total"] is None:
+                miss = next(unpriced)
+                result["error"] = miss["reason"]
+                result["sizes"] = miss["sizes"]
+
+        summary = {"order_ref": order["order_ref"], "rows": [r["row"] for r in row_results]}
+        if any(r["error"] for r in row_results):
+            summary["status"] = "unresolved"
+        else:
+            pricing = rules.price(lines, order["coupon_code"], order["address"])
+            summary.update({"status": "priced", **{k: pricing[k] for k in (
+                "subtotal", "discounts", "taxes", "delivery", "grand_total", "coupon", "delivery_zone")}})
+        results.append({"order": summary, "rows": row_results})
+    return results
+
+
+# ---- Orchestration ----
+_POOL: Optional[ProcessPoolExecutor] = None
+
+
+def get_batch_pool() -> ProcessPoolExecutor:
+    global _POOL
+    if _POOL is None:
+        workers = BATCH_WORKERS or os.cpu_count() or 1
+        _POOL = ProcessPoolExecutor(max_workers=workers,
+                                    mp_context=multiprocessing.get_context(BATCH_START_METHOD))
+    return _POOL
+
+
+def shutdown_batch_pool() -> None:
+    global _POOL
+    if _POOL is not None:
+        _POOL.shutdown(wait=False, cancel_futures=True)
+        _POOL = None
+
+
+async def process_batch(chunks: AsyncIterator[bytes], fmt: str = "csv", shop_id: Optional[str] = None,
+                        rows_per_chunk: int = BATCH_CHUNK_ROWS, max_rows: int = BATCH_MAX_ROWS,
+                        executor: Optional[Executor] = None) -> Dict[str, Any]:
+    """Parse, match and price an upload; returns per-row and per-order results plus throughput."""
+    start = time.perf_counter()
+    rows = []
+    async for row in iter_rows(chunks, fmt):
+        rows.append(row)
+        if len(rows) > max_rows:
+            raise BatchTooLarge(f"Batch exceeds {max_rows} rows")
+    orders = group_orders(rows)
+    menu_hash = get_menu_index(shop_id).content_hash
+
+    loop = asyncio.get_running_loop()
+    parts = list(_chunks(orders, rows_per_chunk))
+    if executor is None and len(parts) > 1:
+        executor = get_batch_pool()
+    if executor is None:
+        # One chunk: a thread beats shipping it to another process
+        done = [await asyncio.to_thread(price_chunk, parts[0], shop_id, menu_hash)] if parts else []
+    else:
+        done = await asyncio.gather(*[
+            loop.run_in_executor(executor, price_chunk, part, shop_id, menu_hash) for part in parts
+        ])
+
+    results = [result for part in done for result in part]
+    row_results = sorted((r for result in results for r in result["rows"]), key=lambda r: r["row"])
+    elapsed = time.perf_counter() - start
+    summary = {
+        "rows": len(rows),
+        "orders": len(orders),
+        "rows_failed": sum(1 for r in row_results if r["error"]),
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "rows_per_sec": round(len(rows) / elapsed) if elapsed > 0 else None,
+    }
+    logger.info(f"Batch priced {summary['rows']} rows / {summary['orders']} orders "
+                f"at {summary['rows_per_sec']} rows/s")
+    return {**summary, "order_results": [r["order"] for r in results], "row_results": row_results}
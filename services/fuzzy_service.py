@@ -1,10 +1,120 @@
-from typing import Tuple, List, Dict, Any
-from fuzzywuzzy import process, fuzz
-from utils.file_manager import read_json, MENU_DATA
-from typing import Tuple, Dict, Any, List
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
 from rapidfuzz import fuzz, process
+from services.menu_index import MenuIndex, get_menu_index, preprocess_name
+from services.ngram_index import fold_spelling
+from utils.config import FUZZY_PRUNE_MIN_ITEMS, FUZZY_SHORTLIST_SIZE
+from utils.metrics import timed
 
-def fuzzy_match_item(query: str, high_threshold: int = 96, low_threshold: int = 80) -> Tuple[str, str, List[str]]:
+MatchResult = Tuple[str, str, List[str]]
+
+FOLDED_WEIGHT = 0.999
+
+# ---- Scorer strategy ----
+SCORERS: Dict[str, Callable[..., float]] = {
+    "WRatio": fuzz.WRatio,
+    "token_set_ratio": fuzz.token_set_ratio,
+    "partial_ratio": fuzz.partial_ratio,
+}
+
+# Query class → scorer name. Tuned with benchmarks/bench_fuzzy_scorers.py.
+SCORER_BY_CLASS: Dict[str, str] = {
+    "single_word": "WRatio",
+    "multi_word": "WRatio",
+    "long": "token_set_ratio",
+}
+
+
+def classify_query(query: str) -> str:
+    """Bucket a preprocessed query by word count."""
+    words = len(query.split())
+    if words <= 1:
+        return "single_word"
+    if words <= 4:
+        return "multi_word"
+    return "long"
+
+
+def get_scorer(query: str, scorer: Optional[str] = None) -> Callable[..., float]:
+    """Resolve the scorer for a preprocessed query (explicit name wins)."""
+    return SCORERS[scorer or SCORER_BY_CLASS[classify_query(query)]]
+
+
+def _classify(results: List[Tuple[str, float]], high_threshold: int, low_threshold: int) -> MatchResult:
+    """Turn ranked (name, score) pairs into a (status, best_match, suggestions) tuple."""
+    if not results:
+        return "none", "", []
+
+    best, score = results[0]
+
+    if score >= high_threshold:
+        return "high_confidence", best, []
+    elif score >= low_threshold:
+        # Menus can list the same name twice (e.g. two sizes of one sweet)
+        suggestions = list(dict.fromkeys(name for name, s in results if s >= low_threshold))
+        return "suggest", best, suggestions
+    else:
+        return "none", "", []
+
+
+def _union(shortlists: List[np.ndarray]) -> np.ndarray:
+    """Sorted distinct menu positions across shortlists."""
+    if len(shortlists) == 1:
+        return np.sort(shortlists[0])
+    return np.unique(np.concatenate(shortlists)) if shortlists else np.empty(0, dtype=np.int64)
+
+
+def score_candidates(index: MenuIndex, prepared: List[str], score_fn: Callable[..., float] = fuzz.WRatio,
+                     workers: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Score preprocessed queries against the menu names worth considering:
+    the union of their trigram shortlists on large menus, every name on
+    small ones. Queries without an exact match are also compared with
+    Hinglish spellings folded ("kaju katli" = "KAJU KATRI") against their
+    shortlist, keeping the better score.
+
+    Returns (scores, positions): scores[i, j] is query i against the
+    name at menu position positions[j]; positions are in menu order.
+    """
+    folded_queries = [fold_spelling(q) for q in prepared]
+    shortlists: Dict[int, np.ndarray] = {}
+    positions = np.empty(0, dtype=np.int64)
+    if len(index) >= FUZZY_PRUNE_MIN_ITEMS:
+        shortlists = {i: index.ngrams.shortlist(fq, FUZZY_SHORTLIST_SIZE) for i, fq in enumerate(folded_queries)}
+        positions = _union(list(shortlists.values()))
+    if len(positions):
+        choices = [index.choices[p] for p in positions]
+    else:
+        # Small menu, or no query shares a trigram with any name: scan all
+        positions, choices = np.arange(len(index)), index.choices
+    scores = process.cdist(prepared, choices, scorer=score_fn, processor=None, workers=workers)
+
+    # Folding cannot beat an exact match, so only the other queries are folded
+    rows = np.flatnonzero(scores.max(axis=1) < 100)
+    if len(rows):
+        for i in rows:
+            if i not in shortlists:
+                shortlists[i] = index.ngrams.shortlist(folded_queries[i], FUZZY_SHORTLIST_SIZE)
+        folded_positions = _union([shortlists[i] for i in rows])
+        if len(folded_positions):
+            folded = process.cdist([folded_queries[i] for i in rows], [index.folded[p] for p in folded_positions],
+                                   scorer=score_fn, processor=None, workers=workers)
+            # A hair under an exact score, so the menu's own spelling wins ties
+            block = np.ix_(rows, np.searchsorted(positions, folded_positions))
+            scores[block] = np.maximum(scores[block], folded * FOLDED_WEIGHT)
+    return scores, positions
+
+
+def best_match(index: MenuIndex, query: str) -> Tuple[int, float]:
+    """(menu position, WRatio score) of the single best name for a raw query."""
+    scores, positions = score_candidates(index, [preprocess_name(query)])
+    # argmax keeps the first of equal scores, i.e. menu order like extractOne
+    col = int(np.argmax(scores[0]))
+    return int(positions[col]), float(scores[0][col])
+
+
+def fuzzy_match_item(query: str, high_threshold: int = 96, low_threshold: int = 80,
+                     scorer: Optional[str] = None, shop_id: Optional[str] = None) -> MatchResult:
     """
     Fuzzy match a user-provided item name against menu items.
 
@@ -15,22 +125,40 @@ def fuzzy_match_item(query: str, high_threshold: int = 96, low_threshold: int =
     - status = "suggest" → ask user to confirm from suggestions
     - status = "none" → no good match found
     """
-    menu = read_json(MENU_DATA)
-    if not menu:
-        return "none", "", []
+    return fuzzy_match_items([query], high_threshold, low_threshold, workers=1,
+                             scorer=scorer, shop_id=shop_id)[0]
 
-    names = [it["ItemName"] for it in menu]
-    results = process.extract(query, names, limit=3)  # top 3 matches
 
-    if not results:
-        return "none", "", []
+@timed("fuzzy")
+def fuzzy_match_items(queries: List[str], high_threshold: int = 96, low_threshold: int = 80,
+                      limit: int = 3, workers: int = -1,
+                      scorer: Optional[str] = None, shop_id: Optional[str] = None) -> List[MatchResult]:
+    """
+    Batch version of `fuzzy_match_item` for every item in an order.
 
-    best, score, _ = results[0]
+    Queries are grouped by scorer and each group is scored against the
+    candidate menu names (see `score_candidates`) in a single
+    `process.cdist` call (spread over `workers` threads, -1 = all cores).
+    Returns one (status, best_match, suggestions) tuple per query, in
+    input order.
+    """
+    index = get_menu_index(shop_id)
+    if not queries:
+        return []
+    if not index:
+        return [("none", "", []) for _ in queries]
 
-    if score >= high_threshold:
-        return "high_confidence", best, []
-    elif score >= low_threshold:
-        suggestions = [name for name, s, _ in results if s >= low_threshold]
-        return "suggest", best, suggestions
-    else:
-        return "none", "", []
\ No newline at end of file
+    prepared = [preprocess_name(q) for q in queries]
+    groups: Dict[Callable[..., float], List[int]] = {}
+    for i, q in enumerate(prepared):
+        groups.setdefault(get_scorer(q, scorer), []).append(i)
+
+    matches: List[MatchResult] = [("none", "", [])] * len(queries)
+    for score_fn, members in groups.items():
+        scores, positions = score_candidates(index, [prepared[i] for i in members], score_fn, workers)
+        # Stable sort keeps menu order on ties, same as process.extract
+        top = np.argsort(-scores, axis=1, kind="stable")[:, :limit]
+        for i, row, cols in zip(members, scores, top):
+            ranked = [(index.names[positions[c]], float(row[c])) for c in cols]
+            matches[i] = _classify(ranked, high_threshold, low_threshold)
+    return matches
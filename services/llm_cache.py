@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class LLMCache:
+    """
+    Content-addressed cache for model responses.
+
+    Keys are a SHA-256 of model name + prompt. Lookups go memory LRU →
+    optional SQLite disk tier → upstream; concurrent misses for the same
+    key share one in-flight future, so identical prompts hit the model once.
+
+    Expired disk rows are deleted when read, and a sweep (at most every
+    `sweep_interval` seconds, on a write) drops the rest and trims the
+    table to the `max_disk_entries` most recently written rows.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: int = 3600,
+                 disk_path: Optional[Union[str, Path]] = None,
+                 max_disk_entries: int = 100000, sweep_interval: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self.sweep_interval = sweep_interval
+        self._next_sweep = 0.0
+        self.stats: Dict[str, int] = {"hits": 0, "disk_hits": 0, "misses": 0, "inflight_joins": 0}
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._disk: Optional[sqlite3.Connection] = None
+        if disk_path:
+            self._open_disk(Path(disk_path))
+
+    @staticmethod
+    def key(model: str, prompt: str) -> str:
+        return hashlib.sha256(f"{model}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    @property
+    def hit_rate(self) -> float:
+        hits = self.stats["hits"] + self.stats["disk_hits"] + self.stats["inflight_joins"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def metric_lines(self, name: str = "order_llm_cache_lookups_total") -> List[str]:
+        """The lookup counters in Prometheus text format (see utils/metrics.py)."""
+        lines = [f"# HELP {name} LLM response cache lookups by result.", f"# TYPE {name} counter"]
+        lines += [f'{name}{{result="{result}"}} {count}' for result, count in self.stats.items()]
+        return lines
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        """Return the cached response for `key`, calling `compute` at most once per miss."""
+        value = self._get_memory(key)
+        if value is not None:
+            self.stats["hits"] += 1
+            return value
+
+        value = self._get_disk(key)
+        if value is not None:
+            self.stats["disk_hits"] += 1
+            self._put_memory(key, value)
+            return value
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.stats["inflight_joins"] += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise  # this caller was cancelled
+                # The leading call was cancelled, not us: try again (and maybe lead)
+                return await self.get_or_compute(key, compute)
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            # Only this caller was cancelled; waiters retry instead of sharing it
+            future.cancel()
+            raise
+        except BaseException as e:
+            # Errors are shared with waiters but never cached
+            future.set_exception(e)
+            # Mark retrieved so an unobserved failure does not log a warning
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            self._put_memory(key, value)
+            self._put_disk(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._disk is not None:
+                with self._disk:
+                    self._disk.execute("DELETE FROM responses")
+
+    # ---- Memory tier ----
+    def _get_memory(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return value
+
+    def _put_memory(self, key: str, value: str, expires_at: Optional[float] = None) -> None:
+        with self._lock:
+            self._memory[key] = (expires_at or time.time() + self.ttl, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    # ---- Disk tier ----
+    def _open_disk(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._disk = sqlite3.connect(str(path), check_same_thread=False)
+        with self._disk:
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            self._disk.execute("CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)")
+        logger.info(f"LLM response cache on disk at {path}")
+
+    def _get_disk(self, key: str) -> Optional[str]:
+        if self._disk is None:
+            return None
+        with self._lock:
+            row = self._disk.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        if row[1] < time.time():
+            with self._lock, self._disk:
+                self._disk.execute("DELETE FROM responses WHERE key = ? AND expires_at < ?", (key, time.time()))
+            return None
+        return row[0]
+
+    def _put_disk(self, key: str, value: str) -> None:
+        if self._disk is None:
+            return
+        with self._lock, self._disk:
+            self._disk.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + self.ttl),
+            )
+            if time.monotonic() >= self._next_sweep:
+                self._sweep_disk()
+
+    def _sweep_disk(self) -> None:
+        """Drop expired rows, then the oldest ones beyond `max_disk_entries` (lock held)."""
+        self._next_sweep = time.monotonic() + self.sweep_interval
+        self._disk.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+        excess = self._disk.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_disk_entries
+        if excess > 0:
+            # expires_at is write time + ttl, so the smallest are least recently written
+            self._disk.execute(
+                "DELETE FROM responses WHERE key IN"
+                " (SELECT key FROM responses ORDER BY expires_at LIMIT ?)", (excess,)
+            )
@@ -1,31 +1,226 @@
-import re
 import os
-import json
-import google.generativeai as genai
-from models.order import Order
-from dotenv import load_dotenv
+import time
+import random
+import asyncio
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple, Type, TypeVar
+from pydantic import BaseModel, ValidationError
+from models.order import Order, OrderDelta
+from services.llm_cache import LLMCache
+from utils.config import (
+    LLM_CACHE_ENABLED, LLM_CACHE_SIZE, LLM_CACHE_TTL_SECONDS, LLM_CACHE_DISK_PATH,
+    LLM_CACHE_DISK_MAX_ENTRIES,
+    LLM_MAX_CONCURRENCY, LLM_TIMEOUT_SECONDS, LLM_MAX_RETRIES, LLM_BACKOFF_SECONDS,
+    LLM_BREAKER_THRESHOLD, LLM_BREAKER_RESET_SECONDS, LLM_JSON_MODE,
+)
+from utils.json_extract import extract_json_object
+from utils.logger import get_logger
+from utils.metrics import register_collector, timed
 
-load_dotenv()
+logger = get_logger(__name__)
 
+# .env is loaded once, by utils.config
 GEMINI_API_KEY=os.getenv("GEMINI_API_KEY")
 MODEL = "gemini-1.5-flash"
 
+
+# The Gemini SDK takes most of a second to import, so it is loaded on the
+# first model call (or by the startup pre-warm), not when this module is.
+@lru_cache(maxsize=None)
+def load_genai():
+    import google.generativeai as genai
+    if GEMINI_API_KEY:
+        genai.configure(api_key=GEMINI_API_KEY)
+    return genai
+
+
+@lru_cache(maxsize=None)
+def transient_errors() -> Tuple[Type[BaseException], ...]:
+    """Errors worth retrying: timeouts, rate limits, 5xx and dropped connections."""
+    from google.api_core import exceptions as google_exceptions
+    return (
+        asyncio.TimeoutError,
+        ConnectionError,
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.InternalServerError,
+    )
+
+
+class LLMUnavailable(Exception):
+    """
+    The model could not be reached (breaker open or retries exhausted) or
+    its answer could not be used.
+    """
+
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def parse_model_output(model: Type[ModelT], text: str) -> ModelT:
+    """
+    Validate the JSON object in `text` as `model`. List members that don't
+    validate (e.g. an item cut off before its name in a repaired, truncated
+    answer) are dropped; anything else invalid raises LLMUnavailable.
+    """
+    data = extract_json_object(text)
+    try:
+        return model.model_validate(data)
+    except ValidationError as e:
+        errors = e.errors()
+    bad = {err["loc"][:2] for err in errors if len(err["loc"]) > 1 and isinstance(err["loc"][1], int)}
+    data = {k: [m for i, m in enumerate(v) if (k, i) not in bad] if isinstance(v, list) else v
+            for k, v in data.items()}
+    try:
+        parsed = model.model_validate(data)
+    except ValidationError as e:
+        raise LLMUnavailable(f"Unusable {model.__name__} from the model: {e}") from e
+    logger.warning(f"Dropped {len(bad)} invalid list member(s) from the model's {model.__name__}")
+    return parsed
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failed calls and rejects calls for
+    `reset_timeout` seconds; after that calls are tried again (half-open)
+    and the first success closes it.
+    """
+
+    def __init__(self, threshold: int = LLM_BREAKER_THRESHOLD,
+                 reset_timeout: float = LLM_BREAKER_RESET_SECONDS):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        return self.state != "open"
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        # A failed trial call in half-open re-opens immediately
+        if self.state == "half_open" or self.failures >= self.threshold:
+            logger.warning(f"LLM circuit breaker open after {self.failures} failures")
+            self.opened_at = time.monotonic()
+
+# Shared by every client so agents reuse each other's responses
+RESPONSE_CACHE = LLMCache(
+    max_entries=LLM_CACHE_SIZE,
+    ttl=LLM_CACHE_TTL_SECONDS,
+    disk_path=LLM_CACHE_DISK_PATH or None,
+    max_disk_entries=LLM_CACHE_DISK_MAX_ENTRIES,
+) if LLM_CACHE_ENABLED else None
+if RESPONSE_CACHE is not None:
+    register_collector(RESPONSE_CACHE.metric_lines)
+
 class GeminiClient:
-    def __init__(self, model=MODEL):
-        self.model = genai.GenerativeModel(model)
-
-    def clean_json(self, raw: str) -> str:
-        # Remove markdown fences
-        raw = re.sub(r"```json|```", "", raw).strip()
-        match = re.search(r"\{.*\}", raw, re.DOTALL)
-        if not match:
-            return "{}"
-        try:
-            parsed = json.loads(match.group(0))
-            return json.dumps(parsed)
-        except json.JSONDecodeError:
-            return "{}"
+    def __init__(self, model=MODEL, cache: Optional[LLMCache] = RESPONSE_CACHE,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY, timeout: float = LLM_TIMEOUT_SECONDS,
+                 max_retries: int = LLM_MAX_RETRIES, backoff: float = LLM_BACKOFF_SECONDS,
+                 breaker: Optional[CircuitBreaker] = None, json_mode: bool = LLM_JSON_MODE):
+        self.model_name = model
+        self._model = None
+        self.cache = cache
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.json_mode = json_mode
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @property
+    def model(self):
+        """The genai model, created (and the SDK imported) on first use."""
+        if self._model is None:
+            self._model = load_genai().GenerativeModel(self.model_name)
+        return self._model
+
+    @model.setter
+    def model(self, model) -> None:
+        self._model = model
+
+    async def _generate(self, prompt: str, as_json: bool = False,
+                        validate: Optional[Callable[[str], Any]] = None) -> str:
+        """
+        Return the model's text for `prompt`, served from cache when possible.
+        `validate` runs on a fresh answer before it is cached, so one that
+        raises (e.g. LLMUnavailable for unusable JSON) is never cached.
+        """
+        generation_config = {"response_mime_type": "application/json"} if as_json and self.json_mode else None
+
+        async def compute() -> str:
+            text = await self._call_model(prompt, generation_config)
+            if validate is not None:
+                validate(text)
+            return text
+
+        if self.cache is None:
+            return await compute()
+        model_key = f"{self.model_name}:json" if generation_config else self.model_name
+        key = LLMCache.key(model_key, prompt)
+        return await self.cache.get_or_compute(key, compute)
+
+    async def _generate_model(self, prompt: str, model: Type[ModelT]) -> ModelT:
+        """The model's JSON answer validated as `model`; unusable answers are not cached."""
+        fresh: Dict[str, ModelT] = {}
+
+        def validate(text: str) -> None:
+            fresh[text] = parse_model_output(model, text)
+
+        text = await self._generate(prompt, as_json=True, validate=validate)
+        logger.debug(f"Raw Gemini output: {text}")
+        # A fresh answer was parsed before caching; a cached one is parsed here
+        return fresh[text] if text in fresh else parse_model_output(model, text)
+
+    async def _call_model(self, prompt: str, generation_config: Optional[dict] = None) -> str:
+        """
+        One logical model call: bounded by the shared semaphore, each attempt
+        capped at `timeout` seconds, transient errors retried with jittered
+        exponential backoff. Raises LLMUnavailable when the breaker is open,
+        every attempt failed, or the call failed in a way not worth retrying
+        (e.g. permission denied, a blocked or empty response).
+        """
+        if not self.breaker.allow():
+            raise LLMUnavailable("LLM circuit breaker is open")
 
+        with timed("llm"):
+            for attempt in range(self.max_retries + 1):
+                try:
+                    async with self._semaphore:
+                        resp = await asyncio.wait_for(
+                            self.model.generate_content_async(prompt, generation_config=generation_config),
+                            timeout=self.timeout,
+                        )
+                    text = resp.candidates[0].content.parts[0].text
+                except transient_errors() as e:
+                    logger.warning(f"LLM call failed (attempt {attempt + 1}/{self.max_retries + 1}): {e!r}")
+                    if attempt == self.max_retries:
+                        self.breaker.record_failure()
+                        raise LLMUnavailable(str(e) or type(e).__name__) from e
+                    # Sleep outside the semaphore so waiting retries don't hold slots
+                    await asyncio.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+                except Exception as e:
+                    # Permission/argument errors, blocked or empty responses:
+                    # retrying won't help, but callers still fall back locally
+                    logger.warning(f"LLM call failed (not retried): {e!r}")
+                    self.breaker.record_failure()
+                    raise LLMUnavailable(str(e) or type(e).__name__) from e
+                else:
+                    self.breaker.record_success()
+                    return text
 
     async def extract_order(self, user_message: str) -> Order:
         prompt = f"""
@@ -35,6 +230,7 @@ class GeminiClient:
             "items": [{{"name": "...", "qty": int, "size_or_weight": "..."}}],
             "delivery_date": "...",
             "payment_method": "...",
+            "coupon_code": "<only if the user gives a coupon/promo code>",
             "contact": {{"name": "...", "phone": "...", "address": "..."}}
         }}
 
@@ -42,20 +238,38 @@ class GeminiClient:
         JSON only. No text explanation.
         """
 
-        resp = await self.model.generate_content_async(prompt)
-        text = resp.candidates[0].content.parts[0].text
+        return await self._generate_model(prompt, Order)
 
-        print("RAW Gemini output:\n", text)
+    async def extract_order_delta(self, order: Order, user_message: str) -> OrderDelta:
+        """
+        Incremental extraction: only the current order and the latest
+        message are sent, so the prompt no longer grows with the transcript.
+        """
+        prompt = f"""
+        Current order (JSON):
+        {order.model_dump_json(exclude_none=True)}
 
-        text = self.clean_json(text)
-        return Order.model_validate_json(text)
+        Extract only the CHANGES the new user message makes to this order.
+        Return strictly this JSON structure, leaving out anything unchanged:
+        {{
+            "add_items": [{{"name": "...", "qty": int, "size_or_weight": "..."}}],
+            "update_items": [{{"name": "<existing item name>", "qty": int, "size_or_weight": "..."}}],
+            "remove_items": ["<existing item name>"],
+            "delivery_date": "...",
+            "payment_method": "...",
+            "coupon_code": "<only if the user gives a coupon/promo code>",
+            "contact": {{"name": "...", "phone": "...", "address": "..."}}
+        }}
 
-    async def clarify(self, order: Order, missing: list[str]) -> str:
-        """
-        Ask the user for missing order details in a natural way.
+        User: {user_message}
+        JSON only. No text explanation.
         """
+
+        return await self._generate_model(prompt, OrderDelta)
+
+    def _clarify_prompt(self, order: Order, missing: list[str]) -> str:
         missing_fields = ", ".join(missing)
-        prompt = f"""
+        return f"""
         The current extracted order is:
         {order.model_dump_json(indent=2)}
 
@@ -64,5 +278,45 @@ class GeminiClient:
         Write a polite, short question to the user asking for this info.
         Example: "Could you please tell me your delivery date?"
         """
-        resp = await self.model.generate_content_async(prompt)
-        return resp.candidates[0].content.parts[0].text.strip()
\ No newline at end of file
+
+    async def clarify(self, order: Order, missing: list[str]) -> str:
+        """
+        Ask the user for missing order details in a natural way.
+        """
+        text = await self._generate(self._clarify_prompt(order, missing))
+        return text.strip()
+
+    async def clarify_stream(self, order: Order, missing: list[str]) -> AsyncIterator[str]:
+        """
+        Same question as `clarify`, yielded chunk by chunk as the model
+        produces it (stream=True). Not cached; shares the semaphore and
+        breaker, and raises LLMUnavailable if the stream fails.
+        """
+        if not self.breaker.allow():
+            raise LLMUnavailable("LLM circuit breaker is open")
+
+        prompt = self._clarify_prompt(order, missing)
+        with timed("llm"):
+            async with self._semaphore:
+                try:
+                    resp = await asyncio.wait_for(
+                        self.model.generate_content_async(prompt, stream=True), timeout=self.timeout
+                    )
+                    async for chunk in resp:
+                        if chunk.text:
+                            yield chunk.text
+                except Exception as e:
+                    self.breaker.record_failure()
+                    raise LLMUnavailable(str(e) or type(e).__name__) from e
+        self.breaker.record_success()
+
+
+_CLIENT: Optional[GeminiClient] = None
+
+
+def get_gemini_client() -> GeminiClient:
+    """Process-wide client shared by all agents (one semaphore, one breaker)."""
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = GeminiClient()
+    return _CLIENT
@@ -0,0 +1,285 @@
+import re
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from utils.config import SHOP_ID, SHOP_ID_PATTERN, MENUS_DIR, MAX_RESIDENT_SHOPS, MENU_SNAPSHOT_ENABLED
+from utils.file_manager import read_json, MENU_DATA
+from services.ngram_index import NgramIndex, fold_spelling
+from services.units import size_key
+from utils.logger import get_logger
+from utils.metrics import timed
+
+logger = get_logger(__name__)
+
+
+_PUNCT_RE = re.compile(r"[()\[\]/,\-]")
+_UNIT_RE = re.compile(r"\b\d+(?:\.\d+)?\s*(?:KGS?|GMS?|GRAMS?|G|ML|LTRS?|L|PCS?|PIECES?)\b")
+
+
+def normalize_name(name: str) -> str:
+    """Normalize an item name for dictionary lookups."""
+    return " ".join(name.split()).lower()
+
+
+def preprocess_name(name: str) -> str:
+    """
+    Normalize text for fuzzy scoring: uppercase, drop brackets/punctuation
+    and strip pack sizes such as "1 kg", "500 gm" or "(200 GM)".
+    Applied once to menu names at index build and to every query.
+    """
+    text = _PUNCT_RE.sub(" ", name.upper())
+    stripped = " ".join(_UNIT_RE.sub(" ", text).split())
+    # Names that are nothing but a size keep their text
+    return stripped or " ".join(text.split())
+
+
+def menu_content_hash(items: List[Dict[str, Any]]) -> str:
+    """Stable hash of a parsed menu, used to skip rewrites of unchanged menus."""
+    canonical = json.dumps(items, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class PriceLookup(NamedTuple):
+    """
+    Result of resolving (item, size) to a price. `price` is None on a miss
+    and `miss` says why: "unknown_item", "unknown_size", "size_required"
+    or "no_price". `sizes` lists the item's menu sizes for follow-ups.
+    """
+    price: Optional[Any]
+    item_name: Optional[str] = None
+    size: Optional[str] = None
+    miss: Optional[str] = None
+    sizes: Tuple[str, ...] = ()
+    category: Optional[str] = None
+
+
+class MenuIndex:
+    """
+    Compiled, read-only view of the parsed menu.
+
+    Built once per menu load and shared by pricing and fuzzy matching:
+      - by_name:  normalized item name → item
+      - by_id:    ItemId → item
+      - prices:   (ItemId, size_key) → (SizeName, price); size_key folds
+                  "half kg", "0.5 kg" and "500 gm" into one key
+      - size_names: ItemId → SizeNames in menu order
+      - size_labels: size_key → SizeName, across all items
+      - names:    ItemName list in menu order
+      - choices:  `preprocess_name` of each name, aligned with `names`
+                  (rapidfuzz choices)
+      - folded:   `fold_spelling` of each choice (Hinglish variants folded)
+      - ngrams:   trigram index over `folded`, for candidate shortlists
+    """
+
+    def __init__(self, items: List[Dict[str, Any]], content_hash: Optional[str] = None):
+        self.items = items
+        self.content_hash = content_hash or menu_content_hash(items)
+        self.by_name: Dict[str, Dict[str, Any]] = {}
+        self.by_id: Dict[Any, Dict[str, Any]] = {}
+        self.prices: Dict[Tuple[Any, str], Tuple[str, Any]] = {}
+        self.size_names: Dict[Any, Tuple[str, ...]] = {}
+        self.size_labels: Dict[str, str] = {}
+        self.names: List[str] = []
+
+        for item in items:
+            name = item.get("ItemName")
+            if not name:
+                continue
+            # Keep the first occurrence, like the old linear scan did
+            self.by_name.setdefault(normalize_name(name), item)
+            item_id = item.get("ItemId")
+            self.by_id[item_id] = item
+            labels = []
+            for s in item.get("SizeListWidget", []):
+                label = s.get("SizeName")
+                key = size_key(label) if label else None
+                if not key:
+                    continue
+                labels.append(label)
+                self.prices.setdefault((item_id, key), (label, s.get("Price")))
+                self.size_labels.setdefault(key, label)
+            self.size_names[item_id] = tuple(labels)
+            self.names.append(name)
+        self._index_names()
+        # Description/category search index, built on first use by
+        # services/semantic_search.py; evicted together with this menu
+        self.semantic: Optional[Any] = None
+
+    def _index_names(self) -> None:
+        """Fuzzy-matching columns derived from `names`."""
+        self.choices = [preprocess_name(name) for name in self.names]
+        self.folded = [fold_spelling(choice) for choice in self.choices]
+        self.ngrams = NgramIndex(self.folded)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def get(self, item_name: str) -> Optional[Dict[str, Any]]:
+        """Exact (case/whitespace-insensitive) item lookup."""
+        return self.by_name.get(normalize_name(item_name))
+
+    def item_texts(self) -> Iterator[Tuple[str, str, str]]:
+        """(ItemName, CategoryName, Description) of every named item, for semantic search."""
+        for item in self.items:
+            if item.get("ItemName"):
+                yield item["ItemName"], item.get("CategoryName") or "", item.get("Description") or ""
+
+    def sizes(self, item: Dict[str, Any]) -> Tuple[str, ...]:
+        """An item's SizeNames in menu order."""
+        return self.size_names.get(item.get("ItemId"), ())
+
+    def _size_price(self, item: Dict[str, Any], key: str) -> Optional[Tuple[str, Any]]:
+        return self.prices.get((item.get("ItemId"), key))
+
+    def resolve(self, item: Dict[str, Any], size: Optional[str] = None) -> PriceLookup:
+        """
+        Price of an item in `size`, one dict lookup. Items without a size
+        list are priced by their base Price whatever size was asked for.
+        """
+        name, category = item.get("ItemName"), item.get("CategoryName")
+        sizes = self.sizes(item)
+        if sizes:
+            if not size:
+                return PriceLookup(None, name, None, "size_required", sizes, category)
+            entry = self._size_price(item, size_key(size))
+            if entry is None:
+                return PriceLookup(None, name, size, "unknown_size", sizes, category)
+            label, price = entry
+            if price is None:
+                return PriceLookup(None, name, label, "no_price", sizes, category)
+            return PriceLookup(price, name, label, category=category)
+        price = item.get("Price")
+        if price is None:
+            return PriceLookup(None, name, size, "no_price", category=category)
+        return PriceLookup(price, name, size, category=category)
+
+    def price_for(self, item: Dict[str, Any], size: Optional[str] = None) -> int:
+        """Price of an item in `size`, or 0 when it cannot be resolved."""
+        return self.resolve(item, size).price or 0
+
+    def size_label(self, spoken: str) -> Optional[str]:
+        """SizeName on this menu for a spoken size ("half kg" → "500 gm"), if any."""
+        key = size_key(spoken)
+        return self.size_labels.get(key) if key else None
+
+
+# ---- Per-shop indexes ----
+def menu_path(shop_id: Optional[str] = None) -> Path:
+    """
+    Menu file for a shop: MENUS_DIR/{shop_id}.json. The default shop keeps
+    using the legacy data/parsed_menu.json until a per-shop file exists.
+    """
+    shop_id = shop_id or SHOP_ID
+    if not re.match(SHOP_ID_PATTERN, shop_id):
+        raise ValueError(f"Invalid shop id: {shop_id!r}")
+    path = Path(MENUS_DIR) / f"{shop_id}.json"
+    if shop_id == SHOP_ID and not path.exists() and MENU_DATA.exists():
+        return MENU_DATA
+    return path
+
+
+@timed("menu_io")
+def load_menu_index(file_path: Path = MENU_DATA) -> MenuIndex:
+    """
+    Read the menu from disk and compile a fresh index. Prefers the binary
+    snapshot next to the JSON file when it is at least as new: the index
+    then stays backed by the mapping (SnapshotMenuIndex) and decodes items
+    only as they are looked up. A missing or unreadable snapshot falls back
+    to the JSON.
+    """
+    if MENU_SNAPSHOT_ENABLED:
+        index = _load_snapshot_index(Path(file_path))
+        if index is not None:
+            return index
+    items = read_json(file_path) or []
+    logger.info(f"Loaded menu index with {len(items)} items from {file_path}")
+    return MenuIndex(items)
+
+
+def _load_snapshot_index(file_path: Path) -> Optional[MenuIndex]:
+    # Imported here: the snapshot module depends on normalize_name above
+    from services.menu_snapshot import MenuSnapshot, SnapshotError, SnapshotMenuIndex, snapshot_path
+
+    snapshot = snapshot_path(file_path)
+    if not snapshot.exists():
+        return None
+    if file_path.exists() and file_path.stat().st_mtime > snapshot.stat().st_mtime:
+        logger.info(f"Menu snapshot {snapshot} is older than {file_path}, using JSON")
+        return None
+    try:
+        # Left open: the index reads from the mapping for as long as it lives
+        index = SnapshotMenuIndex(MenuSnapshot.open(snapshot))
+    except (OSError, SnapshotError) as e:
+        logger.warning(f"Ignoring menu snapshot {snapshot}: {e}")
+        return None
+    logger.info(f"Loaded menu index with {len(index)} items from {snapshot}")
+    return index
+
+
+class MenuIndexCache:
+    """Bounded LRU of compiled menu indexes, loaded lazily per shop."""
+
+    def __init__(self, max_shops: int = MAX_RESIDENT_SHOPS):
+        self.max_shops = max_shops
+        self._indexes: "OrderedDict[str, MenuIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, shop_id: str) -> MenuIndex:
+        with self._lock:
+            index = self._indexes.get(shop_id)
+            if index is not None:
+                self._indexes.move_to_end(shop_id)
+                return index
+        # Load outside the lock so one slow shop does not block the others
+        path = menu_path(shop_id)
+        index = load_menu_index(path)
+        if not index and shop_id != SHOP_ID and not path.exists():
+            # Unknown shop: don't let it push a real menu out of the LRU
+            # (or get refreshed in the background) until a menu is stored
+            return index
+        with self._lock:
+            current = self._indexes.get(shop_id)
+            if current is not None:
+                return current
+            self._put(shop_id, index)
+        return index
+
+    def set(self, shop_id: str, index: MenuIndex) -> None:
+        with self._lock:
+            self._put(shop_id, index)
+
+    def _put(self, shop_id: str, index: MenuIndex) -> None:
+        self._indexes[shop_id] = index
+        self._indexes.move_to_end(shop_id)
+        while len(self._indexes) > self.max_shops:
+            evicted, _ = self._indexes.popitem(last=False)
+            logger.info(f"Evicted menu index for shop {evicted}")
+
+    def resident(self) -> Dict[str, int]:
+        """shop_id → item count for every index currently in memory."""
+        with self._lock:
+            return {shop_id: len(index) for shop_id, index in self._indexes.items()}
+
+
+_CACHE = MenuIndexCache()
+
+
+def get_menu_index(shop_id: Optional[str] = None) -> MenuIndex:
+    """Return a shop's index (default shop if None), loading it on first use."""
+    return _CACHE.get(shop_id or SHOP_ID)
+
+
+def set_menu_index(index: MenuIndex, shop_id: Optional[str] = None) -> None:
+    """
+    Swap in a new index for a shop. Readers grab the reference once per
+    lookup, so they always see either the old or the new menu, never a mix.
+    """
+    _CACHE.set(shop_id or SHOP_ID, index)
+
+
+def resident_shops() -> Dict[str, int]:
+    """Shops whose menus are currently loaded, with their item counts."""
+    return _CACHE.resident()
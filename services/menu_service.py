@@ -1,64 +1,69 @@
 import json
+import random
+import asyncio
 from pathlib import Path
 from typing import Any, Dict, List, Optional,Tuple
-import requests
-from rapidfuzz import process
-from utils.config import MENU_API_URL
+import httpx
+from utils.config import (
+    MENU_API_URL, MENU_REFRESH_SECONDS, MENU_REFRESH_JITTER, SHOP_ID, MENU_SNAPSHOT_ENABLED,
+    SEMANTIC_SEARCH_ENABLED, menu_api_url,
+)
 from utils.logger import get_logger
-from utils.file_manager import write_json, read_json
-from rapidfuzz import process
+from utils.file_manager import write_json, MENU_DATA
+from utils.metrics import timed
+from services.menu_index import (
+    MenuIndex, PriceLookup, get_menu_index, set_menu_index, menu_content_hash,
+    menu_path, resident_shops,
+)
+from services.fuzzy_service import best_match
+from services.menu_snapshot import SnapshotError, snapshot_path, write_snapshot
+from services.semantic_search import semantic_index_for
 
 logger = get_logger(__name__)
-MENU_DATA = Path("data/parsed_menu.json")
 
 
 
-def find_price(item_name: str, size: Optional[str] = None) -> int:
+def resolve_price(item_name: str, size: Optional[str] = None, shop_id: Optional[str] = None,
+                  fuzzy: bool = True) -> PriceLookup:
     """
-    Look up item price from parsed_menu.json.
-    Uses fuzzy matching for item name and optional size.
+    Resolve an item name (exact, then fuzzy unless `fuzzy` is off) and size
+    against the shop's menu index. Misses come back as PriceLookup.miss
+    instead of a price.
     """
-    menu = read_json(MENU_DATA)
-    if not menu:
-        return 0
+    index = get_menu_index(shop_id)
+    if not index:
+        return PriceLookup(None, miss="unknown_item")
 
     # First try exact match
-    for item in menu:
-        if item_name.lower() == item["ItemName"].lower():
-            if size:
-                for s in item.get("SizeListWidget", []):
-                    if size.lower() == s["SizeName"].lower():
-                        return s["Price"] or 0
-            return item.get("Price", 0)
-
-    # If exact match not found, use fuzzy matching
-    names = [it["ItemName"] for it in menu]
-    best, score, _ = process.extractOne(item_name, names)
-    if score < 80:  # threshold
-        return 0
-
-    # Found fuzzy match → fetch price
-    for item in menu:
-        if item["ItemName"] == best:
-            if size:
-                for s in item.get("SizeListWidget", []):
-                    if size.lower() == s["SizeName"].lower():
-                        return s["Price"] or 0
-            return item.get("Price", 0)
-
-    return 0
-
-def get_item_names():
-    menu_data = read_json(MENU_DATA)
-    if not menu_data:
+    item = index.get(item_name)
+    if item is None:
+        if not fuzzy:
+            return PriceLookup(None, miss="unknown_item", size=size)
+        # If exact match not found, use fuzzy matching
+        with timed("fuzzy"):
+            pos, score = best_match(index, item_name)
+        if score < 80:  # threshold
+            return PriceLookup(None, miss="unknown_item", size=size)
+        item = index.get(index.names[pos])
+
+    return index.resolve(item, size)
+
+def find_price(item_name: str, size: Optional[str] = None, shop_id: Optional[str] = None) -> int:
+    """Price of an item/size, or 0 when it cannot be resolved (see resolve_price)."""
+    return resolve_price(item_name, size, shop_id).price or 0
+
+def get_item_names(shop_id: Optional[str] = None):
+    index = get_menu_index(shop_id)
+    if not index:
         print("No menu data found!")
         return []
-    
-    item_names = [item["ItemName"] for item in menu_data if "ItemName" in item]
-    return item_names
+
+    return list(index.names)
 
 def fetch_menu_data() -> Dict[str, Any]:
     """Fetch raw menu data from API and parse JSON inside 'data' field."""
+    import requests  # only the CLI refresh uses the blocking client
+
     logger.info("Fetching menu data from API...")
     try:
         response = requests.get(MENU_API_URL, timeout=10)
@@ -67,18 +72,27 @@ def fetch_menu_data() -> Dict[str, Any]:
         logger.error(f"Failed to fetch menu: {e}")
         raise
 
-    raw_json = response.json()
+    menu_json = decode_menu_payload(response.content)
+    logger.info("Menu data fetched and parsed successfully.")
+    return menu_json
+
+def decode_menu_payload(body: bytes) -> Dict[str, Any]:
+    """
+    Decode a FoodChow response. The menu sits in the 'data' field, normally
+    as a JSON string (decoded once more here) but accepted as an object too.
+    """
+    raw_json = json.loads(body)
     if "data" not in raw_json:
         raise ValueError("No 'data' field found in API response")
 
+    data = raw_json["data"]
+    if isinstance(data, dict):
+        return data
     try:
-        menu_json = json.loads(raw_json["data"])
-    except json.JSONDecodeError as e:
+        return json.loads(data)
+    except (TypeError, json.JSONDecodeError) as e:
         raise ValueError(f"Invalid JSON format inside 'data' field: {e}")
 
-    logger.info("Menu data fetched and parsed successfully.")
-    return menu_json
-
 def extract_required_items(menu_json: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Extract required fields from menu JSON into a clean list."""
     logger.info("Extracting required fields from menu data...")
@@ -114,14 +128,151 @@ def extract_required_items(menu_json: Dict[str, Any]) -> List[Dict[str, Any]]:
     return extracted_items
 
 
-def refresh_and_store_menu(file_path: Path = Path("data/parsed_menu.json")) -> List[Dict[str, Any]]:
+@timed("menu_io")
+def store_menu(file_path: Path, index: MenuIndex) -> None:
+    """Write the parsed menu as JSON, plus its binary snapshot when enabled."""
+    write_json(file_path, index.items)
+    if not MENU_SNAPSHOT_ENABLED:
+        return
+    try:
+        write_snapshot(snapshot_path(file_path), index.items, index.content_hash)
+    except (OSError, SnapshotError) as e:
+        # The JSON is authoritative; a stale snapshot is ignored by its mtime
+        logger.warning(f"Could not write menu snapshot for {file_path}: {e}")
+
+
+def refresh_and_store_menu(file_path: Path = MENU_DATA) -> List[Dict[str, Any]]:
     """Fetch menu from API, extract required data, and store in JSON file."""
     menu = fetch_menu_data()
     cleaned_menu = extract_required_items(menu)
-    write_json(file_path, cleaned_menu)
+
+    # Compile before swapping so lookups never see a half-built index
+    index = MenuIndex(cleaned_menu)
+    if SEMANTIC_SEARCH_ENABLED:
+        semantic_index_for(index, get_menu_index())
+    store_menu(file_path, index)
     logger.info(f"Menu saved to {file_path}")
+    set_menu_index(index)
     return cleaned_menu
 
+# ---- Async refresh ----
+class MenuFetcher:
+    """
+    Async FoodChow client on a pooled httpx connection. Remembers the last
+    ETag / Last-Modified and sends them back, so an unchanged menu costs a
+    304 instead of a full download.
+    """
+
+    def __init__(self, url: str = MENU_API_URL, client: Optional[httpx.AsyncClient] = None):
+        self.url = url
+        self.client = client or get_http_client()
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+
+    async def fetch(self) -> Optional[Dict[str, Any]]:
+        """Return the decoded menu JSON, or None if the server says it is unchanged."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+
+        response = await self.client.get(self.url, headers=headers)
+        if response.status_code == 304:
+            logger.info("Menu not modified (304).")
+            return None
+        response.raise_for_status()
+
+        self.etag = response.headers.get("ETag", self.etag)
+        self.last_modified = response.headers.get("Last-Modified", self.last_modified)
+        return decode_menu_payload(response.content)
+
+_HTTP_CLIENT: Optional[httpx.AsyncClient] = None
+_FETCHERS: Dict[str, MenuFetcher] = {}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """One connection pool for every shop's menu requests."""
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None or _HTTP_CLIENT.is_closed:
+        _HTTP_CLIENT = httpx.AsyncClient(timeout=10)
+    return _HTTP_CLIENT
+
+
+def get_menu_fetcher(shop_id: Optional[str] = None) -> MenuFetcher:
+    """Per-shop fetcher, so manual and background refreshes share its ETag."""
+    shop_id = shop_id or SHOP_ID
+    fetcher = _FETCHERS.get(shop_id)
+    if fetcher is None:
+        fetcher = _FETCHERS[shop_id] = MenuFetcher(menu_api_url(shop_id))
+    return fetcher
+
+
+async def refresh_menu_async(fetcher: MenuFetcher, file_path: Optional[Path] = None,
+                             shop_id: Optional[str] = None) -> bool:
+    """
+    Conditionally fetch a shop's menu; write it and swap the index only when
+    its content hash differs from the menu currently loaded. Returns True if
+    the menu changed.
+    """
+    menu = await fetcher.fetch()
+    if menu is None:
+        return False
+
+    cleaned_menu = extract_required_items(menu)
+    if menu_content_hash(cleaned_menu) == get_menu_index(shop_id).content_hash:
+        logger.info("Menu content unchanged, skipping write.")
+        return False
+
+    file_path = file_path or menu_path(shop_id)
+    index = MenuIndex(cleaned_menu)
+    if SEMANTIC_SEARCH_ENABLED:
+        # Re-tokenises only the items whose text changed
+        await asyncio.to_thread(semantic_index_for, index, get_menu_index(shop_id))
+    await asyncio.to_thread(store_menu, file_path, index)
+    set_menu_index(index, shop_id)
+    logger.info(f"Menu saved to {file_path} ({len(index)} items)")
+    return True
+
+
+class MenuRefresher:
+    """
+    Background task that refreshes menus every `interval` seconds (± jitter):
+    the default shop plus every shop whose menu is currently resident.
+    """
+
+    def __init__(self, interval: float = MENU_REFRESH_SECONDS, jitter: float = MENU_REFRESH_JITTER):
+        self.interval = interval
+        self.jitter = jitter
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await get_http_client().aclose()
+
+    async def _loop(self) -> None:
+        while True:
+            for shop_id in {SHOP_ID, *resident_shops()}:
+                try:
+                    await refresh_menu_async(get_menu_fetcher(shop_id), shop_id=shop_id)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Background menu refresh failed for shop {shop_id}: {e}")
+            # Jitter keeps many workers from hitting FoodChow in lockstep
+            delay = self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+            await asyncio.sleep(delay)
+
 # if __name__ == "__main__":
 #     refresh_and_store_menu()
 #     names = get_item_names()
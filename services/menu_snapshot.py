@@ -0,0 +1,376 @@
+import os
+import mmap
+import math
+import struct
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from services.menu_index import MenuIndex, normalize_name
+from services.units import size_key
+
+# ---- Format ----
+# Header (64 bytes, little-endian), then 8-byte aligned sections:
+#   string offsets  u32 × (n_strings + 1)   byte offsets into the blob
+#   string blob     UTF-8, every string NUL-terminated
+#   item columns    ItemId, CategoryId (i64); Price (f64);
+#                   ItemName, lookup key, Description, CategoryName, SizeId (u32 string refs);
+#                   size_start (u32 × n_items + 1) → range in the size columns
+#   size columns    SizeId, SizeName (u32 string refs); Price (f64)
+#   name_order      u32 × n_items, item positions sorted by lookup key
+# Missing values: string ref NULL_REF, id NULL_ID, price NaN.
+MAGIC = b"MNUS"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHIIII32s")
+HEADER_SIZE = 64
+NULL_REF = 0xFFFFFFFF
+NULL_ID = -(2 ** 63)
+
+_ITEM_STRINGS = ("ItemName", "key", "Description", "CategoryName", "SizeId")
+
+
+class SnapshotError(ValueError):
+    """The file is not a menu snapshot this version can read."""
+
+
+def snapshot_path(json_path: Union[str, Path]) -> Path:
+    """Snapshot written alongside a menu JSON file (parsed_menu.json → parsed_menu.snap)."""
+    return Path(json_path).with_suffix(".snap")
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def _layout(n_items: int, n_sizes: int, n_strings: int, blob_len: int) -> Dict[str, tuple]:
+    """Section name → (offset, typecode, count). Derived from the header alone."""
+    sections = [
+        ("string_offsets", "I", n_strings + 1),
+        ("blob", "B", blob_len),
+        ("ItemId", "q", n_items),
+        ("CategoryId", "q", n_items),
+        ("Price", "d", n_items),
+        *((name, "I", n_items) for name in _ITEM_STRINGS),
+        ("size_start", "I", n_items + 1),
+        ("size.SizeId", "I", n_sizes),
+        ("size.SizeName", "I", n_sizes),
+        ("size.Price", "d", n_sizes),
+        ("name_order", "I", n_items),
+    ]
+    layout, offset = {}, HEADER_SIZE
+    for name, code, count in sections:
+        layout[name] = (offset, code, count)
+        offset = _align(offset + count * array(code).itemsize)
+    layout["end"] = (offset, "B", 0)
+    return layout
+
+
+# ---- Writer ----
+def _price(value: Any) -> float:
+    return math.nan if value is None else float(value)
+
+
+def _number(value: float):
+    """Stored f64 back to the JSON value: None for NaN, int when whole."""
+    if math.isnan(value):
+        return None
+    return int(value) if value.is_integer() else value
+
+
+def _ident(value: int) -> Optional[int]:
+    """Stored i64 back to the JSON id."""
+    return None if value == NULL_ID else value
+
+
+def _id(value: Any) -> int:
+    if value is None:
+        return NULL_ID
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise SnapshotError(f"Non-integer id {value!r} cannot be stored in a snapshot")
+    return value
+
+
+def write_snapshot(file_path: Union[str, Path], items: List[Dict[str, Any]], content_hash: str) -> Path:
+    """
+    Compile parsed menu items into a snapshot. Written to a temporary file
+    and renamed into place, so readers never map a half-written snapshot.
+    """
+    strings: Dict[str, int] = {}
+
+    def ref(value: Any) -> int:
+        if value is None:
+            return NULL_REF
+        text = str(value).replace("\x00", "")
+        index = strings.get(text)
+        if index is None:
+            index = strings[text] = len(strings)
+        return index
+
+    columns = {name: array(code) for name, (_, code, _) in _layout(0, 0, 0, 0).items()
+               if name not in ("string_offsets", "blob", "end")}
+    keys: List[bytes] = []
+    for item in items:
+        columns["ItemId"].append(_id(item.get("ItemId")))
+        columns["CategoryId"].append(_id(item.get("CategoryId")))
+        columns["Price"].append(_price(item.get("Price")))
+        name = item.get("ItemName")
+        key = normalize_name(name) if name else None
+        keys.append((key or "").encode("utf-8"))
+        for field, value in zip(_ITEM_STRINGS, (name, key, item.get("Description"),
+                                                item.get("CategoryName"), item.get("SizeId"))):
+            columns[field].append(ref(value))
+        columns["size_start"].append(len(columns["size.Price"]))
+        for size in item.get("SizeListWidget", []):
+            columns["size.SizeId"].append(ref(size.get("SizeId")))
+            columns["size.SizeName"].append(ref(size.get("SizeName")))
+            columns["size.Price"].append(_price(size.get("Price")))
+    columns["size_start"].append(len(columns["size.Price"]))
+    # Stable sort: duplicate names keep menu order, so lookups find the first one
+    columns["name_order"].extend(sorted(range(len(items)), key=keys.__getitem__))
+
+    encoded = [s.encode("utf-8") + b"\x00" for s in strings]
+    offsets = array("I", [0])
+    for s in encoded:
+        offsets.append(offsets[-1] + len(s))
+    columns["string_offsets"] = offsets
+    columns["blob"] = array("B", b"".join(encoded))
+
+    layout = _layout(len(items), len(columns["size.Price"]), len(strings), len(columns["blob"]))
+    header = _HEADER.pack(MAGIC, VERSION, HEADER_SIZE, len(items), len(columns["size.Price"]),
+                          len(strings), len(columns["blob"]), bytes.fromhex(content_hash))
+
+    file_path = Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = file_path.with_name(file_path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(header.ljust(HEADER_SIZE, b"\x00"))
+        for name, (offset, _, _) in layout.items():
+            if name == "end":
+                break
+            f.seek(offset)
+            columns[name].tofile(f)
+        f.truncate(layout["end"][0])
+    os.replace(tmp_path, file_path)
+    return file_path
+
+
+# ---- Reader ----
+class MenuSnapshot:
+    """
+    Memory-mapped, read-only view of a compiled menu.
+
+    Columns are `memoryview`s over the mapping, so opening costs one header
+    read regardless of menu size and lookups touch only the pages they
+    need: `find` binary-searches the sorted name keys without decoding
+    the rest of the menu, and `item` decodes a single item. `items()`
+    materializes every parsed-menu dict for callers that want the list.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < HEADER_SIZE:
+                raise SnapshotError(f"{self.path} is too short to be a menu snapshot")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._open()
+        except Exception:
+            self._mmap.close()
+            raise
+
+    def _open(self) -> None:
+        magic, version, header_size, n_items, n_sizes, n_strings, blob_len, digest = \
+            _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise SnapshotError(f"{self.path} is not a menu snapshot")
+        if version != VERSION or header_size != HEADER_SIZE:
+            raise SnapshotError(f"{self.path} has snapshot version {version}, expected {VERSION}")
+
+        layout = _layout(n_items, n_sizes, n_strings, blob_len)
+        if len(self._mmap) < layout["end"][0]:
+            raise SnapshotError(f"{self.path} is truncated")
+
+        self.content_hash = digest.hex()
+        self._view = memoryview(self._mmap)
+        self._cols: Dict[str, memoryview] = {}
+        for name, (offset, code, count) in layout.items():
+            size = count * array(code).itemsize
+            self._cols[name] = self._view[offset:offset + size].cast(code)
+        self._blob = self._cols["blob"]
+        self._offsets = self._cols["string_offsets"]
+
+    @classmethod
+    def open(cls, path: Union[str, Path]) -> "MenuSnapshot":
+        return cls(path)
+
+    def close(self) -> None:
+        # Views must be released before the mapping can close
+        for view in self._cols.values():
+            view.release()
+        self._cols.clear()
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "MenuSnapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._cols["ItemId"])
+
+    # ---- Zero-copy lookups ----
+    def _bytes(self, ref: int) -> Optional[memoryview]:
+        if ref == NULL_REF:
+            return None
+        return self._blob[self._offsets[ref]:self._offsets[ref + 1] - 1]
+
+    def string(self, ref: int) -> Optional[str]:
+        raw = self._bytes(ref)
+        return None if raw is None else str(raw, "utf-8")
+
+    def name(self, pos: int) -> Optional[str]:
+        """ItemName of the item at `pos`."""
+        return self.string(self._cols["ItemName"][pos])
+
+    def text(self, pos: int, field: str) -> Optional[str]:
+        """A string column (ItemName, Description, CategoryName, SizeId) of the item at `pos`."""
+        return self.string(self._cols[field][pos])
+
+    def size_labels(self) -> Iterator[str]:
+        """Every SizeName in the size columns, in menu order."""
+        for ref in self._cols["size.SizeName"]:
+            if ref != NULL_REF:
+                yield self.string(ref)
+
+    def find(self, item_name: str) -> Optional[int]:
+        """Position of an item by exact (case/whitespace-insensitive) name."""
+        target = normalize_name(item_name).encode("utf-8")
+        if not target:
+            return None  # unnamed items have an empty key
+        order, keys = self._cols["name_order"], self._cols["key"]
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if bytes(self._bytes(keys[order[mid]]) or b"") < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(order) and bytes(self._bytes(keys[order[lo]]) or b"") == target:
+            return order[lo]
+        return None
+
+    def price(self, item_name: str, size: Optional[str] = None):
+        """Price of an item, or of one of its sizes when `size` matches; None if unknown."""
+        pos = self.find(item_name)
+        if pos is None:
+            return None
+        if size:
+            wanted = size_key(size)
+            start, end = self._cols["size_start"][pos], self._cols["size_start"][pos + 1]
+            for i in range(start, end):
+                label = self.string(self._cols["size.SizeName"][i])
+                if label is not None and size_key(label) == wanted:
+                    return _number(self._cols["size.Price"][i])
+        return _number(self._cols["Price"][pos])
+
+    def item(self, pos: int) -> Dict[str, Any]:
+        """The parsed-menu dict of the item at `pos` (same shape as `items()`)."""
+        cols = self._cols
+        start, end = cols["size_start"][pos], cols["size_start"][pos + 1]
+        return {
+            "ItemId": _ident(cols["ItemId"][pos]),
+            "ItemName": self.string(cols["ItemName"][pos]),
+            "Description": self.string(cols["Description"][pos]),
+            "Price": _number(cols["Price"][pos]),
+            "SizeId": self.string(cols["SizeId"][pos]),
+            "SizeListWidget": [
+                {"SizeId": self.string(cols["size.SizeId"][j]), "SizeName": self.string(cols["size.SizeName"][j]),
+                 "Price": _number(cols["size.Price"][j])}
+                for j in range(start, end)
+            ],
+            "CategoryId": _ident(cols["CategoryId"][pos]),
+            "CategoryName": self.string(cols["CategoryName"][pos]),
+        }
+
+    # ---- Materialization ----
+    def items(self) -> List[Dict[str, Any]]:
+        """Rebuild the parsed-menu list (same shape as extract_required_items)."""
+        strings = str(self._blob, "utf-8").split("\x00")
+
+        def text(ref: int) -> Optional[str]:
+            return None if ref == NULL_REF else strings[ref]
+
+        cols = {name: view.tolist() for name, view in self._cols.items()
+                if name not in ("blob", "string_offsets")}
+        size_ids, size_names, size_prices = (cols["size.SizeId"], cols["size.SizeName"],
+                                             cols["size.Price"])
+        starts = cols["size_start"]
+        items = []
+        for i in range(len(cols["ItemId"])):
+            items.append({
+                "ItemId": _ident(cols["ItemId"][i]),
+                "ItemName": text(cols["ItemName"][i]),
+                "Description": text(cols["Description"][i]),
+                "Price": _number(cols["Price"][i]),
+                "SizeId": text(cols["SizeId"][i]),
+                "SizeListWidget": [
+                    {"SizeId": text(size_ids[j]), "SizeName": text(size_names[j]),
+                     "Price": _number(size_prices[j])}
+                    for j in range(starts[i], starts[i + 1])
+                ],
+                "CategoryId": _ident(cols["CategoryId"][i]),
+                "CategoryName": text(cols["CategoryName"][i]),
+            })
+        return items
+
+
+class SnapshotMenuIndex(MenuIndex):
+    """
+    MenuIndex served from an open snapshot, which it keeps mapped. Exact
+    name lookups are `find` plus one decoded item, and sizes are resolved
+    from that item's own size rows; only the name column (for fuzzy
+    matching) and the size labels are decoded up front. The full `items`
+    list is built only if something asks for it.
+    """
+
+    def __init__(self, snapshot: MenuSnapshot):
+        self.snapshot = snapshot
+        self.content_hash = snapshot.content_hash
+        self._items: Optional[List[Dict[str, Any]]] = None
+        self.names = [name for name in map(snapshot.name, range(len(snapshot))) if name]
+        self.size_labels: Dict[str, str] = {}
+        for label in snapshot.size_labels():
+            key = size_key(label)
+            if key:
+                self.size_labels.setdefault(key, label)
+        self._index_names()
+        self.semantic: Optional[Any] = None
+
+    @property
+    def items(self) -> List[Dict[str, Any]]:
+        if self._items is None:
+            self._items = self.snapshot.items()
+        return self._items
+
+    def get(self, item_name: str) -> Optional[Dict[str, Any]]:
+        pos = self.snapshot.find(item_name)
+        return None if pos is None else self.snapshot.item(pos)
+
+    def item_texts(self) -> Iterator[Tuple[str, str, str]]:
+        snap = self.snapshot
+        for pos in range(len(snap)):
+            name = snap.name(pos)
+            if name:
+                yield name, snap.text(pos, "CategoryName") or "", snap.text(pos, "Description") or ""
+
+    def sizes(self, item: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(s["SizeName"] for s in item.get("SizeListWidget", [])
+                     if s.get("SizeName") and size_key(s["SizeName"]))
+
+    def _size_price(self, item: Dict[str, Any], key: str) -> Optional[Tuple[str, Any]]:
+        for s in item.get("SizeListWidget", []):
+            label = s.get("SizeName")
+            if label and size_key(label) == key:
+                return label, s.get("Price")
+        return None
@@ -0,0 +1,92 @@
+"""
+Character trigram inverted index over menu names, used to shortlist fuzzy
+match candidates on large catalogs before rapidfuzz rescoring.
+
+Names and queries are first passed through `fold_spelling`, which maps
+common Hinglish transliteration variants onto one spelling ("katli" and
+"katri", "barfi" and "burfi", "laddoo" and "laddu", "pedha" and "peda").
+Each folded name is split into padded trigrams; a query's candidates are
+the names sharing its trigrams, ranked by the summed IDF of the shared
+trigrams over the name's IDF norm, so rare grams ("KTR", "BAR") count
+more than ones every name has.
+"""
+import math
+import re
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# Applied in order to lowercased text. Conservative on purpose: folded
+# strings keep their length and shape, so rapidfuzz scores stay meaningful.
+_FOLDS = [
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"([bdgkpt])h"), r"\1"),         # aspirates: pedha → peda, khoya → koya
+    (re.compile(r"w"), "v"),
+    (re.compile(r"q"), "k"),
+    (re.compile(r"ck"), "k"),
+    (re.compile(r"ee|ii"), "i"),
+    (re.compile(r"oo|uu"), "u"),
+    (re.compile(r"aa"), "a"),
+    (re.compile(r"([a-z])\1+"), r"\1"),          # laddu → ladu, rasgulla → rasgula
+    (re.compile(r"ur(?=[^aeiou\s])"), "ar"),       # burfi → barfi
+    (re.compile(r"(?<=[bcdfgkpt])l"), "r"),       # katli → katri
+]
+
+
+def fold_spelling(text: str) -> str:
+    """Lowercase and fold Hinglish spelling variants onto one form."""
+    text = text.lower()
+    for pattern, repl in _FOLDS:
+        text = pattern.sub(repl, text)
+    return text
+
+
+def trigrams(text: str) -> List[str]:
+    """Distinct trigrams of each word, padded so short words still index."""
+    grams = []
+    for word in text.split():
+        padded = f" {word} "
+        grams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return list(dict.fromkeys(grams))
+
+
+class NgramIndex:
+    """Trigram → positions postings over folded names, with IDF weights."""
+
+    def __init__(self, folded: Sequence[str]):
+        self.size = len(folded)
+        postings: Dict[str, List[int]] = {}
+        for pos, name in enumerate(folded):
+            for gram in trigrams(name):
+                postings.setdefault(gram, []).append(pos)
+
+        self.postings: Dict[str, np.ndarray] = {}
+        self.idf: Dict[str, float] = {}
+        norms = np.zeros(self.size)
+        for gram, positions in postings.items():
+            idf = math.log(1 + self.size / len(positions))
+            self.postings[gram] = np.asarray(positions, dtype=np.int32)
+            self.idf[gram] = idf
+            norms[positions] += idf * idf
+        self.norms = np.sqrt(np.maximum(norms, 1e-9))
+
+    def shortlist(self, folded_query: str, limit: int) -> np.ndarray:
+        """
+        Positions of up to `limit` names sharing the most (IDF-weighted)
+        trigrams with the query, best first. Empty when nothing is shared.
+        """
+        scores = np.zeros(self.size)
+        hit = False
+        for gram in trigrams(folded_query):
+            positions = self.postings.get(gram)
+            if positions is not None:
+                scores[positions] += self.idf[gram]
+                hit = True
+        if not hit:
+            return np.empty(0, dtype=np.int64)
+        scores /= self.norms
+        matched = np.flatnonzero(scores)
+        if len(matched) <= limit:
+            return matched[np.argsort(-scores[matched], kind="stable")]
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        return top[np.argsort(-scores[top], kind="stable")]
@@ -0,0 +1,216 @@
+import asyncio
+import json
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+from utils.config import ORDER_DB_PATH, ORDER_DB_POOL_SIZE, ORDER_DB_SYNCHRONOUS
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Money columns are NUMERIC so whole rupees come back as ints
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS orders ("
+    " order_id TEXT PRIMARY KEY,"
+    " idempotency_key TEXT NOT NULL UNIQUE,"
+    " session_id TEXT,"
+    " shop_id TEXT,"
+    " customer_name TEXT,"
+    " phone TEXT,"
+    " address TEXT,"
+    " delivery_date TEXT,"
+    " payment_method TEXT,"
+    " subtotal NUMERIC,"
+    " taxes NUMERIC,"
+    " delivery NUMERIC,"
+    " grand_total NUMERIC,"
+    " pricing TEXT NOT NULL,"
+    " created_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS order_items ("
+    " order_id TEXT NOT NULL REFERENCES orders(order_id),"
+    " line_no INTEGER NOT NULL,"
+    " name TEXT NOT NULL,"
+    " size TEXT,"
+    " qty INTEGER,"
+    " unit_price NUMERIC,"
+    " total NUMERIC,"
+    " PRIMARY KEY (order_id, line_no))",
+    "CREATE INDEX IF NOT EXISTS idx_orders_phone ON orders (phone, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_delivery_date ON orders (delivery_date)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders (created_at)",
+]
+
+# Constant SQL, so each connection's statement cache keeps them prepared
+_INSERT_ORDER = (
+    "INSERT INTO orders (order_id, idempotency_key, session_id, shop_id, customer_name, phone,"
+    " address, delivery_date, payment_method, subtotal, taxes, delivery, grand_total, pricing,"
+    " created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+    " ON CONFLICT (idempotency_key) DO NOTHING"
+)
+_INSERT_ITEM = (
+    "INSERT INTO order_items (order_id, line_no, name, size, qty, unit_price, total)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_BY_KEY = "SELECT order_id FROM orders WHERE idempotency_key = ?"
+_ORDER_COLUMNS = (
+    "order_id, session_id, shop_id, customer_name, phone, address, delivery_date,"
+    " payment_method, subtotal, taxes, delivery, grand_total, pricing, created_at"
+)
+_ITEMS = "SELECT name, size, qty, unit_price, total FROM order_items WHERE order_id = ? ORDER BY line_no"
+
+
+def phone_key(phone: Optional[str]) -> Optional[str]:
+    """Digits only, without the +91 prefix, so '+91 98765-43210' matches '9876543210'."""
+    if not phone:
+        return None
+    digits = re.sub(r"\D", "", phone)
+    if len(digits) == 12 and digits.startswith("91"):
+        digits = digits[2:]
+    return digits or None
+
+
+class OrderStore:
+    """
+    Placed orders in SQLite (WAL). Calls run on a small thread pool where
+    each worker owns one connection, so the event loop never blocks on
+    disk and readers do not wait for the writer.
+
+    `place` is idempotent: a second call with the same idempotency key
+    returns the order that was stored first.
+    """
+
+    def __init__(self, path: Union[str, Path] = ORDER_DB_PATH, pool_size: int = ORDER_DB_POOL_SIZE,
+                 synchronous: str = ORDER_DB_SYNCHRONOUS):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.synchronous = synchronous
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="order-store")
+        conn = self._connect()
+        with conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in _SCHEMA:
+                conn.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=10)
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+    # ---- Writes ----
+    async def place(self, order_id: str, idempotency_key: str, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Store a confirmed order from the graph state. Returns
+        {"order_id", "created"}; created is False when the key was seen before.
+        """
+        return await self._run(self._place, order_id, idempotency_key, state)
+
+    def _place(self, order_id: str, idempotency_key: str, state: Dict[str, Any]) -> Dict[str, Any]:
+        order = state.get("order") or {}
+        contact = order.get("contact") or {}
+        pricing = state.get("pricing") or {}
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(_INSERT_ORDER, (
+                order_id, idempotency_key, state.get("session_id"), state.get("shop_id"),
+                contact.get("name"), phone_key(contact.get("phone")), contact.get("address"),
+                order.get("delivery_date"), order.get("payment_method"),
+                pricing.get("subtotal"), pricing.get("taxes"), pricing.get("delivery"),
+                pricing.get("grand_total"), json.dumps(pricing, ensure_ascii=False), time.time(),
+            ))
+            if cursor.rowcount == 0:
+                existing = conn.execute(_BY_KEY, (idempotency_key,)).fetchone()
+                return {"order_id": existing[0], "created": False}
+            conn.executemany(_INSERT_ITEM, [
+                (order_id, i, line.get("name"), line.get("size"), line.get("qty"),
+                 line.get("unit"), line.get("total"))
+                for i, line in enumerate(pricing.get("lines", []))
+            ])
+        return {"order_id": order_id, "created": True}
+
+    # ---- Reads ----
+    async def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        return await self._run(self._get, order_id)
+
+    def _get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        row = conn.execute(f"SELECT {_ORDER_COLUMNS} FROM orders WHERE order_id = ?", (order_id,)).fetchone()
+        return self._row(conn, row) if row else None
+
+    async def find(self, phone: Optional[str] = None, delivery_date: Optional[str] = None,
+                   limit: int = 50) -> List[Dict[str, Any]]:
+        """Newest orders first, filtered by customer phone and/or delivery date (indexed)."""
+        return await self._run(self._find, phone, delivery_date, limit)
+
+    def _find(self, phone: Optional[str], delivery_date: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        clauses, params = [], []
+        if phone:
+            clauses.append("phone = ?")
+            params.append(phone_key(phone))
+        if delivery_date:
+            clauses.append("delivery_date = ?")
+            params.append(delivery_date)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        conn = self._connect()
+        rows = conn.execute(
+            f"SELECT {_ORDER_COLUMNS} FROM orders{where} ORDER BY created_at DESC LIMIT ?",
+            (*params, limit),
+        ).fetchall()
+        return [self._row(conn, row) for row in rows]
+
+    @staticmethod
+    def _row(conn: sqlite3.Connection, row: tuple) -> Dict[str, Any]:
+        (order_id, session_id, shop_id, name, phone, address, delivery_date, payment_method,
+         subtotal, taxes, delivery, grand_total, pricing, created_at) = row
+        items = [
+            {"name": n, "size": size, "qty": qty, "unit": unit, "total": total}
+            for n, size, qty, unit, total in conn.execute(_ITEMS, (order_id,))
+        ]
+        return {
+            "order_id": order_id, "session_id": session_id, "shop_id": shop_id,
+            "contact": {"name": name, "phone": phone, "address": address},
+            "delivery_date": delivery_date, "payment_method": payment_method,
+            "items": items,
+            "subtotal": subtotal, "taxes": taxes, "delivery": delivery, "grand_total": grand_total,
+            "pricing": json.loads(pricing), "created_at": created_at,
+        }
+
+
+_ORDER_STORE: Optional[OrderStore] = None
+
+
+def get_order_store() -> OrderStore:
+    """Process-wide store, opened on first use."""
+    global _ORDER_STORE
+    if _ORDER_STORE is None:
+        _ORDER_STORE = OrderStore()
+    return _ORDER_STORE
+
+
+def close_order_store() -> None:
+    global _ORDER_STORE
+    if _ORDER_STORE is not None:
+        _ORDER_STORE.close()
+        _ORDER_STORE = None
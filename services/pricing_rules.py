@@ -0,0 +1,256 @@
+"""
+Declarative pricing rules.
+
+The spec (PRICING_RULES_PATH, JSON) has a "default" rule set and optional
+per-shop overrides under "shops", merged key by key over the default:
+
+    {
+      "version": "2025-10-01",
+      "default": {
+        "tax_rate": 0.05,
+        "rounding": "rupee",                        # or "paise"
+        "delivery": {"fee": 40, "free_above": 1000,
+                     "zones": [{"name": "Adajan", "pincodes": ["395009"],
+                                "keywords": ["adajan"], "fee": 30, "free_above": 800}]},
+        "category_discounts": [{"category": "Peda", "percent": 10}],
+        "quantity_breaks": [{"categories": ["Assorted Boxes"], "min_qty": 10, "percent": 5}],
+        "coupons": {"DIWALI10": {"percent": 10, "min_subtotal": 500, "max_discount": 200},
+                    "FLAT50": {"amount": 50}}
+      },
+      "shops": {"1833": {"tax_rate": 0.12}}
+    }
+
+Rules are compiled once into lookup tables (category → percent, category
+→ descending quantity breaks, coupon code → terms) and `PricingRules.price`
+prices a whole order in one pass over its lines. Per line, the better of
+the category discount and the quantity break applies (they do not stack);
+a coupon then applies to the discounted subtotal, tax to what remains, and
+delivery is charged by zone on the discounted subtotal. Every adjustment
+is recorded in the returned breakdown.
+"""
+import json
+import hashlib
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+from services.menu_index import normalize_name
+from utils.config import PRICING_RULES_PATH, SHOP_ID
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Used when no spec file exists: the rates PricingAgent always charged
+DEFAULT_RULES: Dict[str, Any] = {
+    "tax_rate": 0.05,
+    "rounding": "rupee",
+    "delivery": {"fee": 40, "free_above": 1000, "zones": []},
+    "category_discounts": [],
+    "quantity_breaks": [],
+    "coupons": {},
+}
+
+_PINCODE_RE = re.compile(r"\b\d{6}\b")
+
+
+class Coupon(NamedTuple):
+    code: str
+    percent: float = 0
+    amount: float = 0
+    min_subtotal: float = 0
+    max_discount: Optional[float] = None
+
+
+class Zone(NamedTuple):
+    name: str
+    pincodes: frozenset
+    keywords: Tuple[str, ...]
+    fee: float
+    free_above: Optional[float]
+
+
+class PricingRules:
+    """A compiled rule set for one shop."""
+
+    def __init__(self, spec: Dict[str, Any], version: Optional[str] = None):
+        self.version = version
+        self.tax_rate = float(spec.get("tax_rate", 0))
+        digits = 2 if spec.get("rounding") == "paise" else 0
+        self.round = (lambda x: round(x, 2)) if digits else round
+
+        self.category_discounts: Dict[str, float] = {
+            normalize_name(rule["category"]): float(rule["percent"])
+            for rule in spec.get("category_discounts", [])
+        }
+        # category → [(min_qty, percent)], largest threshold first
+        self.quantity_breaks: Dict[str, List[Tuple[int, float]]] = {}
+        for rule in spec.get("quantity_breaks", []):
+            for category in rule.get("categories", []):
+                self.quantity_breaks.setdefault(normalize_name(category), []).append(
+                    (int(rule["min_qty"]), float(rule["percent"])))
+        for breaks in self.quantity_breaks.values():
+            breaks.sort(reverse=True)
+
+        self.coupons: Dict[str, Coupon] = {
+            code.upper(): Coupon(code.upper(), float(terms.get("percent", 0)), float(terms.get("amount", 0)),
+                                 float(terms.get("min_subtotal", 0)), terms.get("max_discount"))
+            for code, terms in spec.get("coupons", {}).items()
+        }
+
+        delivery = spec.get("delivery", {})
+        self.delivery_fee = float(delivery.get("fee", 0))
+        self.free_above = delivery.get("free_above")
+        self.zones = [
+            Zone(zone["name"], frozenset(zone.get("pincodes", [])),
+                 tuple(k.lower() for k in zone.get("keywords", [])),
+                 float(zone.get("fee", self.delivery_fee)), zone.get("free_above", self.free_above))
+            for zone in delivery.get("zones", [])
+        ]
+
+    # ---- Evaluation ----
+    def _line_discount(self, category: Optional[str], qty: int) -> Tuple[float, Optional[str]]:
+        """Best percent off for a line and the rule that gave it."""
+        key = normalize_name(category) if category else ""
+        best, rule = self.category_discounts.get(key, 0.0), None
+        if best:
+            rule = f"category_discount:{category}"
+        for min_qty, percent in self.quantity_breaks.get(key, ()):
+            if qty >= min_qty:
+                if percent > best:
+                    best, rule = percent, f"quantity_break:{category}:{min_qty}+"
+                break
+        return best, rule
+
+    def _zone(self, address: Optional[str]) -> Tuple[str, float, Optional[float]]:
+        if address and self.zones:
+            text = address.lower()
+            pincodes = set(_PINCODE_RE.findall(text))
+            for zone in self.zones:
+                if pincodes & zone.pincodes or any(k in text for k in zone.keywords):
+                    return zone.name, zone.fee, zone.free_above
+        return "default", self.delivery_fee, self.free_above
+
+    def price(self, lines: List[Dict[str, Any]], coupon_code: Optional[str] = None,
+              address: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Price resolved lines ({name, size, qty, unit, total, category}) and
+        return the breakdown stored in state["pricing"].
+        """
+        adjustments: List[Dict[str, Any]] = []
+        out_lines = []
+        subtotal = line_discounts = 0
+        for line in lines:
+            total = line["total"]
+            percent, rule = self._line_discount(line.get("category"), line["qty"])
+            discount = self.round(total * percent / 100) if percent else 0
+            if discount:
+                adjustments.append({"rule": rule, "line": line["name"], "percent": percent, "amount": -discount})
+            subtotal += total
+            line_discounts += discount
+            out_lines.append({**line, "discount": discount, "net": total - discount})
+
+        discounted = subtotal - line_discounts
+        coupon_discount, coupon_info = 0, None
+        if coupon_code:
+            coupon = self.coupons.get(coupon_code.strip().upper())
+            if coupon is None:
+                coupon_info = {"code": coupon_code, "applied": False, "reason": "unknown_coupon"}
+            elif discounted < coupon.min_subtotal:
+                coupon_info = {"code": coupon.code, "applied": False, "reason": "below_min_subtotal",
+                               "min_subtotal": coupon.min_subtotal}
+            else:
+                coupon_discount = self.round(discounted * coupon.percent / 100 + coupon.amount)
+                if coupon.max_discount is not None:
+                    coupon_discount = min(coupon_discount, coupon.max_discount)
+                coupon_discount = min(coupon_discount, discounted)
+                coupon_info = {"code": coupon.code, "applied": True, "amount": -coupon_discount}
+                adjustments.append({"rule": f"coupon:{coupon.code}", "amount": -coupon_discount})
+
+        # Sums of rounded amounts still carry float noise (931.5600000000001)
+        taxable = self.round(discounted - coupon_discount)
+        taxes = self.round(taxable * self.tax_rate)
+        adjustments.append({"rule": "tax", "rate": self.tax_rate, "amount": taxes})
+
+        zone, fee, free_above = self._zone(address)
+        delivery = 0 if free_above is not None and discounted >= free_above else fee
+        delivery = self.round(delivery)
+        adjustments.append({"rule": f"delivery:{zone}", "amount": delivery})
+
+        return {
+            "lines": out_lines,
+            "subtotal": subtotal,
+            "discounts": self.round(line_discounts + coupon_discount),
+            "coupon": coupon_info,
+            "taxable": taxable,
+            "tax_rate": self.tax_rate,
+            "taxes": taxes,
+            "delivery_zone": zone,
+            "delivery": delivery,
+            "grand_total": self.round(taxable + taxes + delivery),
+            "adjustments": adjustments,
+            "rules_version": self.version,
+        }
+
+
+# ---- Loading ----
+def _merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict) and key != "coupons":
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+class PricingRulebook:
+    """All shops' compiled rule sets from one spec, compiled lazily per shop."""
+
+    def __init__(self, spec: Optional[Dict[str, Any]] = None):
+        spec = spec or {}
+        self.version = spec.get("version") or hashlib.sha256(
+            json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+        self.default = _merge(DEFAULT_RULES, spec.get("default", {}))
+        self.shops: Dict[str, Dict[str, Any]] = spec.get("shops", {})
+        self._compiled: Dict[str, PricingRules] = {}
+        self._lock = threading.Lock()
+
+    def for_shop(self, shop_id: Optional[str] = None) -> PricingRules:
+        shop_id = shop_id or SHOP_ID
+        rules = self._compiled.get(shop_id)
+        if rules is None:
+            with self._lock:
+                rules = self._compiled.get(shop_id)
+                if rules is None:
+                    spec = _merge(self.default, self.shops.get(shop_id, {}))
+                    rules = self._compiled[shop_id] = PricingRules(spec, self.version)
+        return rules
+
+
+def load_rulebook(file_path: Union[str, Path] = PRICING_RULES_PATH) -> PricingRulebook:
+    path = Path(file_path)
+    if not path.exists():
+        logger.info(f"No pricing rules at {path}, using defaults")
+        return PricingRulebook()
+    with open(path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    logger.info(f"Loaded pricing rules {spec.get('version', '')} from {path}")
+    return PricingRulebook(spec)
+
+
+_RULEBOOK: Optional[PricingRulebook] = None
+
+
+def get_pricing_rules(shop_id: Optional[str] = None) -> PricingRules:
+    """Compiled rules for a shop (default shop if None)."""
+    global _RULEBOOK
+    if _RULEBOOK is None:
+        _RULEBOOK = load_rulebook()
+    return _RULEBOOK.for_shop(shop_id)
+
+
+def reload_pricing_rules(file_path: Union[str, Path] = PRICING_RULES_PATH) -> PricingRulebook:
+    """Re-read the spec; later orders use the new rules."""
+    global _RULEBOOK
+    _RULEBOOK = load_rulebook(file_path)
+    return _RULEBOOK
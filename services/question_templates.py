@@ -0,0 +1,119 @@
+from typing import Any, Dict, List, Optional
+from models.order import Order, OrderItem
+from services.menu_index import get_menu_index
+
+# ---- Phrase table ----
+# Noun phrases are joined into one question; item questions are asked on
+# their own because they refer to a specific line of the order.
+PHRASES: Dict[str, Dict[str, str]] = {
+    "en": {
+        "delivery_date": "your delivery date",
+        "payment_method": "how you'd like to pay (cash on delivery, UPI or card)",
+        "contact.name": "your name",
+        "contact.phone": "your phone number",
+        "contact.address": "the delivery address",
+        "ask": "Could you please share {fields}?",
+        "and": "and",
+        "items": "What would you like to order today?",
+        "items.name": "Which item from our menu would you like?",
+        "qty": "How many of **{item}** would you like?",
+        "size": "Which size of **{item}** would you like{sizes}?",
+        "qty_size": "How many of **{item}** would you like, and in which size{sizes}?",
+        "sizes": " ({sizes})",
+        "price.unknown_item": "We couldn't find **{item}** on our menu.",
+        "price.unknown_size": "**{item}** isn't available in {size}{sizes}.",
+        "price.size_required": "Which size of **{item}** would you like{sizes}?",
+        "price.no_price": "**{item}** ({size}) has no price listed right now.",
+        "price.available": " (available: {sizes})",
+    },
+    "hi": {
+        "delivery_date": "delivery ki date",
+        "payment_method": "payment ka tareeka (cash on delivery, UPI ya card)",
+        "contact.name": "aapka naam",
+        "contact.phone": "aapka phone number",
+        "contact.address": "delivery address",
+        "ask": "Kripya {fields} bata dijiye.",
+        "and": "aur",
+        "items": "Aaj aap kya order karna chahenge?",
+        "items.name": "Menu mein se kaunsa item chahiye?",
+        "qty": "**{item}** kitne chahiye?",
+        "size": "**{item}** kaunse size mein chahiye{sizes}?",
+        "qty_size": "**{item}** kitne aur kaunse size mein chahiye{sizes}?",
+        "sizes": " ({sizes})",
+        "price.unknown_item": "**{item}** humare menu mein nahi mila.",
+        "price.unknown_size": "**{item}** {size} mein available nahi hai{sizes}.",
+        "price.size_required": "**{item}** kaunse size mein chahiye{sizes}?",
+        "price.no_price": "**{item}** ({size}) ka price abhi listed nahi hai.",
+        "price.available": " (available: {sizes})",
+    },
+}
+
+DEFAULT_LOCALE = "en"
+
+# Order in which grouped fields are mentioned
+FIELD_ORDER = ["delivery_date", "payment_method", "contact.name", "contact.phone", "contact.address"]
+
+
+def _join(parts: List[str], conjunction: str) -> str:
+    if len(parts) <= 1:
+        return "".join(parts)
+    return f"{', '.join(parts[:-1])} {conjunction} {parts[-1]}"
+
+
+def _item_question(item: OrderItem, table: Dict[str, str], shop_id: Optional[str] = None) -> str:
+    """Ask for whatever the first incomplete line is missing."""
+    index = get_menu_index(shop_id)
+    menu_item = index.get(item.name) if index else None
+    sizes = [s["SizeName"] for s in (menu_item or {}).get("SizeListWidget", [])]
+    sizes_text = table["sizes"].format(sizes=", ".join(sizes)) if sizes else ""
+
+    if item.qty is None and not item.size_or_weight and sizes:
+        key = "qty_size"
+    elif item.qty is None:
+        key = "qty"
+    else:
+        key = "size"
+    return table[key].format(item=item.name, sizes=sizes_text)
+
+
+def build_question(order: Order, missing: List[str], locale: Optional[str] = None,
+                   shop_id: Optional[str] = None) -> str:
+    """
+    Phrase one clarification message for the `missing` fields without an LLM.
+
+    Rules:
+      - item problems come first, one question for the first incomplete line
+      - the remaining fields are combined into a single "could you share
+        A, B and C?" sentence in FIELD_ORDER
+    """
+    table = PHRASES.get(locale or DEFAULT_LOCALE, PHRASES[DEFAULT_LOCALE])
+    sentences = []
+
+    if "items" in missing or not order.items:
+        sentences.append(table["items"])
+    elif "items.name" in missing:
+        sentences.append(table["items.name"])
+    elif "items.qty/size_or_weight" in missing:
+        incomplete = next((i for i in order.items if i.qty is None or i.size_or_weight is None), None)
+        if incomplete is not None:
+            sentences.append(_item_question(incomplete, table, shop_id))
+
+    fields = [table[f] for f in FIELD_ORDER if f in missing]
+    if fields:
+        sentences.append(table["ask"].format(fields=_join(fields, table["and"])))
+
+    return " ".join(sentences)
+
+
+def build_price_issues(misses: List[Dict[str, Any]], locale: Optional[str] = None) -> str:
+    """One sentence per line the pricing step could not resolve (see PriceLookup.miss)."""
+    table = PHRASES.get(locale or DEFAULT_LOCALE, PHRASES[DEFAULT_LOCALE])
+    sentences = []
+    for miss in misses:
+        sizes = miss.get("sizes") or []
+        sizes_text = table["price.available"].format(sizes=", ".join(sizes)) if sizes else ""
+        if miss["reason"] == "size_required":
+            sizes_text = table["sizes"].format(sizes=", ".join(sizes)) if sizes else ""
+        sentences.append(table[f"price.{miss['reason']}"].format(
+            item=miss["name"], size=miss.get("size") or "", sizes=sizes_text))
+    return " ".join(sentences)
@@ -0,0 +1,251 @@
+import re
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+from models.order import Order, OrderDelta, OrderItem
+from services.menu_index import get_menu_index
+from services.units import WEIGHT_PATTERN
+
+# ---- Dictionaries ----
+PAYMENT_KEYWORDS = [
+    (re.compile(r"\b(?:cash on delivery|cod|cash)\b"), "Cash on Delivery"),
+    (re.compile(r"\b(?:upi|gpay|google pay|phonepe|phone pe|paytm|bhim)\b"), "UPI"),
+    (re.compile(r"\b(?:credit card|debit card|card)\b"), "Card"),
+    (re.compile(r"\b(?:net banking|netbanking|online)\b"), "Online"),
+]
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+
+MONTHS = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3,
+    "apr": 4, "april": 4, "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7,
+    "aug": 8, "august": 8, "sep": 9, "sept": 9, "september": 9, "oct": 10, "october": 10,
+    "nov": 11, "november": 11, "dec": 12, "december": 12,
+}
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+# Words that may surround a value without changing its meaning. Anything
+# else left over means the message says more than the rules understand.
+FILLER = {
+    "a", "an", "the", "it", "its", "it's", "is", "my", "me", "i", "we", "will", "would",
+    "please", "pls", "plz", "ok", "okay", "yes", "sure", "thanks", "thank", "you", "hi",
+    "on", "by", "for", "of", "in", "at", "to", "and", "with", "via", "through", "using",
+    "pay", "payment", "mode", "method", "deliver", "delivery", "date", "send",
+    "phone", "mobile", "number", "no", "contact", "call", "whatsapp",
+    "qty", "quantity", "size", "weight", "pack", "box", "boxes", "pcs", "pieces", "piece",
+    "make", "need", "want", "just", "only", "this", "next", "coming", "be", "do",
+    "apply", "use",
+}
+
+_PHONE_RE = re.compile(r"(?:\+?91[\s-]?)?\b([6-9]\d{4}[\s-]?\d{5})\b")
+_ISO_DATE_RE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+_NUMERIC_DATE_RE = re.compile(r"\b(\d{1,2})[/.-](\d{1,2})(?:[/.-](\d{2,4}))?\b")
+_DAY_MONTH_RE = re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?(" + "|".join(MONTHS) + r")\b")
+_MONTH_DAY_RE = re.compile(r"\b(" + "|".join(MONTHS) + r")\s+(\d{1,2})(?:st|nd|rd|th)?\b")
+_RELATIVE_RE = re.compile(r"\b(day after tomorrow|tomorrow|today|" + "|".join(WEEKDAYS) + r")\b")
+_QTY_RE = re.compile(r"\b(?:x\s*)?(\d{1,3}|" + "|".join(NUMBER_WORDS) + r")\b")
+_COUPON_RE = re.compile(r"\b(?:coupon|promo)(?:\s*code)?\s*[:\-]?\s*((?=[a-z0-9]*[a-z])[a-z0-9]{3,20})\b")
+_NAME_RE = re.compile(r"\b(?:my name is|name is|name\s*:)\s*([a-z][a-z .']{1,40}?)\s*(?:[,;]|$|\band\b)")
+
+
+class RuleExtractor:
+    """
+    Deterministic fast path for short follow-up messages.
+
+    Recognises phone numbers, quantities, sizes from the menu's
+    SizeListWidget, payment keywords, relative/explicit dates, coupon
+    codes and "my name is ..." and returns an OrderDelta. Only fields
+    listed in `missing` are filled. Returns None (fall back to the LLM)
+    when nothing matched, when a value is given for a field that was not
+    pending (a correction the rules can't place), or when words are left
+    over that the rules do not understand.
+    """
+
+    def __init__(self):
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "fallbacks": 0}
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def extract(self, message: str, order: Order, missing: Optional[List[str]] = None,
+                today: Optional[date] = None, shop_id: Optional[str] = None) -> Optional[OrderDelta]:
+        delta = self._extract(message, order, missing or [], today or date.today(), shop_id=shop_id)
+        self.stats["hits" if delta is not None else "misses"] += 1
+        return delta
+
+    def extract_best_effort(self, message: str, order: Order, missing: Optional[List[str]] = None,
+                            today: Optional[date] = None, shop_id: Optional[str] = None) -> OrderDelta:
+        """
+        Whatever the rules recognise, ignoring words they don't. Used when
+        the LLM is unavailable, so a partial answer beats none.
+        """
+        self.stats["fallbacks"] += 1
+        delta = self._extract(message, order, missing or [], today or date.today(),
+                              strict=False, shop_id=shop_id)
+        return delta or OrderDelta()
+
+    def _extract(self, message: str, order: Order, missing: List[str], today: date,
+                 strict: bool = True, shop_id: Optional[str] = None) -> Optional[OrderDelta]:
+        text = " " + " ".join(message.lower().split()) + " "
+        delta = OrderDelta()
+        found = False
+
+        def consume(match: re.Match) -> None:
+            nonlocal text
+            text = text[:match.start()] + " " + text[match.end():]
+
+        # Name first: it swallows free text that other rules would misread
+        match = _NAME_RE.search(text)
+        if match:
+            if self._pending(missing, "contact.name"):
+                delta.contact.name = match.group(1).strip().title()
+                found = True
+            elif strict:
+                return None
+            consume(match)
+
+        match = _COUPON_RE.search(text)
+        if match:
+            delta.coupon_code = match.group(1).upper()
+            consume(match)
+            found = True
+
+        match = _PHONE_RE.search(text)
+        if match:
+            if self._pending(missing, "contact.phone"):
+                delta.contact.phone = re.sub(r"[\s-]", "", match.group(1))
+                found = True
+            elif strict:
+                return None
+            consume(match)
+
+        # Sizes before dates, so "1/2 kg" is never read as 1 February
+        size = None
+        match = WEIGHT_PATTERN.search(text)
+        if match:
+            size = self._menu_size(match.group(0), shop_id)
+            if size is None and strict:
+                return None
+            consume(match)
+
+        delivery = self._match_date(text, today)
+        if delivery:
+            value, match = delivery
+            if value is None:
+                return None
+            if self._pending(missing, "delivery_date"):
+                delta.delivery_date = value
+                found = True
+            elif strict:
+                return None
+            consume(match)
+
+        for pattern, method in PAYMENT_KEYWORDS:
+            match = pattern.search(text)
+            if match:
+                if self._pending(missing, "payment_method"):
+                    delta.payment_method = method
+                    found = True
+                elif strict:
+                    return None
+                consume(match)
+                break
+
+        qty = None
+        match = _QTY_RE.search(text)
+        if match:
+            raw = match.group(1)
+            qty = NUMBER_WORDS.get(raw) or int(raw)
+            consume(match)
+
+        if size or qty:
+            # A bare number only means a quantity while one is pending
+            pending = self._pending(missing, "items.qty/size_or_weight")
+            update = self._item_update(order, qty, size) if pending else None
+            if update is None and strict:
+                return None
+            if update is not None:
+                delta.update_items.append(update)
+                found = True
+
+        leftover = [w for w in re.findall(r"[a-z0-9']+", text) if w not in FILLER]
+        if not found and missing[:1] == ["contact.name"] and 0 < len(leftover) <= 4 \
+                and all(w.isalpha() for w in leftover):
+            # A bare name in reply to "what's your name?"
+            delta.contact.name = " ".join(leftover).title()
+            return delta
+        if not found or (leftover and strict):
+            return None
+        return delta
+
+    # ---- Helpers ----
+    @staticmethod
+    def _pending(missing: List[str], field: str) -> bool:
+        """Whether `field` (or its whole group, e.g. "contact") is still missing."""
+        return field in missing or field.split(".")[0] in missing
+
+    def _menu_size(self, spoken: str, shop_id: Optional[str] = None) -> Optional[str]:
+        """Map a spoken weight onto a SizeName that exists on the shop's menu."""
+        return get_menu_index(shop_id).size_label(spoken)
+
+    def _item_update(self, order: Order, qty: Optional[int], size: Optional[str]) -> Optional[OrderItem]:
+        """Fill qty/size on the first item still missing them."""
+        for item in order.items:
+            if (qty and item.qty is None) or (size and not item.size_or_weight):
+                return OrderItem(
+                    name=item.name,
+                    qty=qty if qty and item.qty is None else None,
+                    size_or_weight=size if size and not item.size_or_weight else None,
+                )
+        return None
+
+    def _match_date(self, text: str, today: date):
+        """Return (ISO date, match) for the first date-like phrase, if any."""
+        match = _RELATIVE_RE.search(text)
+        if match:
+            word = match.group(1)
+            if word == "today":
+                return today.isoformat(), match
+            if word == "tomorrow":
+                return (today + timedelta(days=1)).isoformat(), match
+            if word == "day after tomorrow":
+                return (today + timedelta(days=2)).isoformat(), match
+            ahead = (WEEKDAYS.index(word) - today.weekday()) % 7 or 7
+            return (today + timedelta(days=ahead)).isoformat(), match
+
+        match = _ISO_DATE_RE.search(text)
+        if match:
+            return self._date(today, int(match.group(3)), int(match.group(2)), int(match.group(1))), match
+
+        match = _DAY_MONTH_RE.search(text)
+        if match:
+            return self._date(today, int(match.group(1)), MONTHS[match.group(2)]), match
+
+        match = _MONTH_DAY_RE.search(text)
+        if match:
+            return self._date(today, int(match.group(2)), MONTHS[match.group(1)]), match
+
+        match = _NUMERIC_DATE_RE.search(text)
+        if match:
+            year = match.group(3)
+            if year and len(year) == 2:
+                year = "20" + year
+            return self._date(today, int(match.group(1)), int(match.group(2)),
+                              int(year) if year else None), match
+        return None
+
+    @staticmethod
+    def _date(today: date, day: int, month: int, year: Optional[int] = None) -> Optional[str]:
+        """Build an ISO date, rolling over to next year for past day/month pairs."""
+        try:
+            value = date(year or today.year, month, day)
+            if year is None and value < today:
+                value = date(today.year + 1, month, day)
+        except ValueError:
+            return None
+        return value.isoformat()
@@ -0,0 +1,195 @@
+"""
+Local, CPU-only search over what menu items are, not just what they are
+called: "dry fruit sweets", "something with cashew", "chocolate cake".
+
+Every item becomes a TF-IDF vector over its name (counted twice), category
+and description. Features are folded words (Hinglish spellings folded,
+plurals trimmed, English ingredient names mapped to the menu's Hindi ones)
+plus the character trigrams of each word, so "dryfruit" still meets "dry
+fruit". Vectors are L2-normalised and kept column-wise (feature → item
+positions and weights), so scoring a batch of queries is one pass over
+their features into a dense (queries × items) cosine matrix, then an
+argpartition top-k per row.
+
+Each index is attached to its shop's MenuIndex, so it shares the menu's
+LRU residency. On a refresh only items whose text changed are
+re-tokenised; IDF and weights are recomputed from the cached term counts.
+"""
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.menu_index import MenuIndex, get_menu_index
+from services.ngram_index import fold_spelling, trigrams
+from utils.config import SEMANTIC_MIN_SCORE, SEMANTIC_TOP_K
+from utils.logger import get_logger
+from utils.metrics import timed
+
+logger = get_logger(__name__)
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+STOPWORDS = frozenset("""
+a an the and or of with in on for to from that this these those is are be it its as at by
+you your we our i me my some something any anything want need like get give please just
+every one all kind made make very so but no not nothing than more most pure gm gms kg ml pcs
+""".split())
+
+# English (and alternate) words → the word the menu uses, after folding
+SYNONYMS = {
+    "cashew": "kaju", "cashews": "kaju", "almond": "badam", "almonds": "badam",
+    "pistachio": "pista", "pistachios": "pista", "fig": "anjir", "figs": "anjir",
+    "walnut": "akhrot", "walnuts": "akhrot", "saffron": "kesar", "cardamom": "elaichi",
+    "milk": "dudh", "doodh": "dudh", "kova": "mava", "koya": "mava", "mawa": "mava",
+    "sweet": "mithai", "sweets": "mithai", "mithai": "mithai", "dessert": "mithai",
+    "bakery": "bakery", "backery": "bakery", "biscuit": "cookie", "buscuit": "cookie",
+    "dryfruits": "dryfruit", "nuts": "dryfruit",
+}
+
+# Field weights: a word in the name says more than one in the description
+NAME_WEIGHT, CATEGORY_WEIGHT, DESCRIPTION_WEIGHT = 2, 1, 1
+
+
+def _words(text: str) -> List[str]:
+    words = []
+    raw = _WORD_RE.findall((text or "").lower())
+    # "dry fruit" is written as one word on the menu
+    for i, word in enumerate(raw):
+        if word == "dry" and i + 1 < len(raw) and raw[i + 1].startswith("fruit"):
+            continue
+        if word.startswith("fruit") and i and raw[i - 1] == "dry":
+            word = "dryfruit"
+        if word in STOPWORDS or len(word) < 2:
+            continue
+        word = SYNONYMS.get(word, word)
+        if len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        word = fold_spelling(word)
+        words.append(SYNONYMS.get(word, word))
+    return words
+
+
+def features(text: str) -> Counter:
+    """Word and character-trigram counts for one piece of text."""
+    counts: Counter = Counter()
+    for word in _words(text):
+        counts["w:" + word] += 1
+        for gram in trigrams(word):
+            counts["c:" + gram] += 1
+    return counts
+
+
+def item_features(name: str, category: str, description: str) -> Counter:
+    counts: Counter = Counter()
+    for text, weight in ((name, NAME_WEIGHT), (category, CATEGORY_WEIGHT), (description, DESCRIPTION_WEIGHT)):
+        for feature, n in features(text).items():
+            counts[feature] += n * weight
+    return counts
+
+
+class SemanticIndex:
+    """TF-IDF vectors of one menu's items, stored as per-feature postings."""
+
+    def __init__(self, menu: MenuIndex, previous: Optional["SemanticIndex"] = None):
+        self.content_hash = menu.content_hash
+        self.names: List[str] = []
+        # Term counts per item, keyed by its text so a rebuild can reuse them
+        self.counts: Dict[Tuple[str, str, str], Counter] = {}
+        reused = 0
+        doc_counts: List[Counter] = []
+        for key in menu.item_texts():
+            counts = previous.counts.get(key) if previous is not None else None
+            if counts is None:
+                counts = item_features(*key)
+            else:
+                reused += 1
+            self.counts[key] = counts
+            self.names.append(key[0])
+            doc_counts.append(counts)
+        self.size = len(doc_counts)
+        self.reused = reused
+
+        df: Counter = Counter()
+        for counts in doc_counts:
+            df.update(counts.keys())
+        self.idf = {f: math.log((1 + self.size) / (1 + n)) + 1 for f, n in df.items()}
+
+        postings: Dict[str, Tuple[List[int], List[float]]] = {}
+        for pos, counts in enumerate(doc_counts):
+            weights = {f: (1 + math.log(n)) * self.idf[f] for f, n in counts.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            for f, w in weights.items():
+                entry = postings.setdefault(f, ([], []))
+                entry[0].append(pos)
+                entry[1].append(w / norm)
+        self.postings = {f: (np.asarray(p, dtype=np.int32), np.asarray(w, dtype=np.float32))
+                         for f, (p, w) in postings.items()}
+
+    def query_vector(self, text: str) -> Dict[str, float]:
+        weights = {f: (1 + math.log(n)) * self.idf[f] for f, n in features(text).items() if f in self.idf}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        return {f: w / norm for f, w in weights.items()}
+
+    def search(self, queries: Sequence[str], k: int = SEMANTIC_TOP_K,
+               min_score: float = SEMANTIC_MIN_SCORE) -> List[List[Tuple[str, float]]]:
+        """Top-k (item name, cosine) per query, best first, scores ≥ min_score."""
+        scores = np.zeros((len(queries), self.size), dtype=np.float32)
+        for row, text in enumerate(queries):
+            for feature, weight in self.query_vector(text).items():
+                positions, values = self.postings[feature]
+                scores[row, positions] += weight * values
+
+        k = min(k, self.size)
+        results = []
+        for row in scores:
+            if k <= 0:
+                results.append([])
+                continue
+            top = np.argpartition(-row, k - 1)[:k]
+            top = top[np.argsort(-row[top], kind="stable")]
+            results.append([(self.names[i], round(float(row[i]), 4)) for i in top if row[i] >= min_score])
+        return results
+
+
+# ---- Per-shop indexes ----
+# Each index hangs off its MenuIndex (menu.semantic), so it is evicted with
+# the menu from the resident-shop LRU and replaced when the menu is swapped.
+_LOCK = threading.Lock()
+
+
+def semantic_index_for(menu: MenuIndex, previous: Optional[MenuIndex] = None) -> SemanticIndex:
+    """
+    A menu's index, built on first use. When `previous` (the menu it
+    replaces) has one, vectors of unchanged items are reused.
+    """
+    index = menu.semantic
+    if index is not None:
+        return index
+    with _LOCK:
+        if menu.semantic is None:
+            prior = previous.semantic if previous is not None else None
+            menu.semantic = index = SemanticIndex(menu, prior)
+            logger.info(f"Built semantic index: {index.size} items, "
+                        f"{index.reused} reused, {len(index.postings)} features")
+    return menu.semantic
+
+
+def get_semantic_index(shop_id: Optional[str] = None) -> SemanticIndex:
+    """The index of a shop's current menu."""
+    return semantic_index_for(get_menu_index(shop_id))
+
+
+@timed("semantic")
+def search_items(queries: Sequence[str], k: int = SEMANTIC_TOP_K, shop_id: Optional[str] = None,
+                 min_score: float = SEMANTIC_MIN_SCORE) -> List[List[Tuple[str, float]]]:
+    """
+    Items matching free-text requests by name, category and description,
+    one ranked list of (item name, score) per query.
+    """
+    if not queries:
+        return []
+    return get_semantic_index(shop_id).search(queries, k, min_score)
@@ -0,0 +1,174 @@
+import json
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+from models.order import STATE
+from utils.config import SESSION_BACKEND, SESSION_TTL_SECONDS, MAX_SESSIONS, SESSION_DB_PATH
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Frozen snapshot of the initial state; every session decodes its own copy,
+# so no nested dict or list is ever shared between sessions.
+_TEMPLATE = json.dumps(STATE)
+
+
+def new_session_state() -> Dict[str, Any]:
+    """Fresh, fully independent state for a new session."""
+    return json.loads(_TEMPLATE)
+
+
+class SessionStore(ABC):
+    """
+    Base class for session state backends. `get` always returns a private
+    copy: a turn mutates its copy freely and only `put` commits it, so a
+    failed turn leaves the stored session untouched and concurrent turns
+    never share one object.
+    """
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def put(self, session_id: str, state: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def load(self, session_id: str) -> Dict[str, Any]:
+        """Return the stored state for a session, or a new one."""
+        state = self.get(session_id)
+        return state if state is not None else new_session_state()
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    LRU of session states in process memory, kept as frozen JSON and
+    decoded per `get`. Entries expire `ttl` seconds after their last write
+    and the least recently used session is evicted once `max_sessions` is
+    reached.
+    """
+
+    def __init__(self, ttl: int = SESSION_TTL_SECONDS, max_sessions: int = MAX_SESSIONS):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._data.get(session_id)
+            if entry is None:
+                return None
+            expires_at, state = entry
+            if expires_at < time.monotonic():
+                del self._data[session_id]
+                return None
+            self._data.move_to_end(session_id)
+        return json.loads(state)
+
+    def put(self, session_id: str, state: Dict[str, Any]) -> None:
+        frozen = json.dumps(state, ensure_ascii=False)
+        with self._lock:
+            self._data[session_id] = (time.monotonic() + self.ttl, frozen)
+            self._data.move_to_end(session_id)
+            while len(self._data) > self.max_sessions:
+                self._data.popitem(last=False)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._data.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session states serialized as JSON rows in a local SQLite file.
+    Expired rows are swept at most every `sweep_interval` seconds (on a
+    write), and the same sweep trims the table to the `max_sessions` most
+    recently written sessions, so the cap can be exceeded briefly between
+    sweeps.
+    """
+
+    def __init__(self, path: Union[str, Path] = SESSION_DB_PATH, ttl: int = SESSION_TTL_SECONDS,
+                 max_sessions: int = MAX_SESSIONS, sweep_interval: float = 60.0):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.sweep_interval = sweep_interval
+        self._next_sweep = 0.0
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " session_id TEXT PRIMARY KEY,"
+                " state TEXT NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)")
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state, expires_at FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        if row[1] < time.time():
+            self.delete(session_id)
+            return None
+        return json.loads(row[0])
+
+    def put(self, session_id: str, state: Dict[str, Any]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, state, expires_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(state, ensure_ascii=False), time.time() + self.ttl),
+            )
+            if time.monotonic() >= self._next_sweep:
+                self._sweep()
+
+    def _sweep(self) -> None:
+        """Drop expired sessions, then the oldest ones beyond `max_sessions` (lock held)."""
+        self._next_sweep = time.monotonic() + self.sweep_interval
+        self._conn.execute("DELETE FROM sessions WHERE expires_at < ?", (time.time(),))
+        excess = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] - self.max_sessions
+        if excess > 0:
+            # expires_at is last write + ttl, so the smallest are least recently written
+            self._conn.execute(
+                "DELETE FROM sessions WHERE session_id IN"
+                " (SELECT session_id FROM sessions ORDER BY expires_at LIMIT ?)", (excess,)
+            )
+
+    def delete(self, session_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def create_session_store(backend: str = SESSION_BACKEND) -> SessionStore:
+    """Build the session store configured by SESSION_BACKEND."""
+    if backend == "memory":
+        return InMemorySessionStore()
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    raise ValueError(f"Unknown session backend: {backend}")
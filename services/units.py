@@ -0,0 +1,70 @@
+import re
+from typing import Optional
+
+# Spoken fractions of a kilo
+_KG_WORDS = {
+    "quarter kg": 250, "quarter kilo": 250,
+    "half kg": 500, "half kilo": 500, "adha kilo": 500, "aadha kilo": 500,
+    "1/4 kg": 250, "1/2 kg": 500, "3/4 kg": 750,
+}
+_KG_WORDS_RE = re.compile(r"\b(?:" + "|".join(re.escape(w) for w in _KG_WORDS) + r")\b")
+_WEIGHT_RE = re.compile(r"\b(\d+(?:\.\d+)?)\s*(kgs?|kilos?|kilograms?|g|gms?|grams?|gr)\b")
+
+WEIGHT_PATTERN = re.compile(_KG_WORDS_RE.pattern + "|" + _WEIGHT_RE.pattern)
+
+_COUNT_WORDS = {"half dozen": 6, "dozen": 12}
+_COUNT_WORDS_RE = re.compile(r"\b(?:" + "|".join(_COUNT_WORDS) + r")\b")
+_COUNT_RE = re.compile(r"\b(\d+)\s*(?:pcs?|pieces?|nos?|units?)\b")
+
+
+def weight_in_grams(text: str) -> Optional[int]:
+    """Parse the first weight in `text` ("1kg", "0.5 kg", "500g", "half kg") into grams."""
+    text = " ".join(text.lower().split())
+    match = _KG_WORDS_RE.search(text)
+    if match:
+        return _KG_WORDS[match.group(0)]
+    match = _WEIGHT_RE.search(text)
+    if not match:
+        return None
+    value, unit = float(match.group(1)), match.group(2)
+    grams = value * 1000 if unit.startswith("k") else value
+    return int(round(grams))
+
+
+def format_weight(grams: int) -> str:
+    """Render grams the way menu SizeNames are written ("1 kg", "500 gm")."""
+    if grams >= 1000 and grams % 1000 == 0:
+        return f"{grams // 1000} kg"
+    return f"{grams} gm"
+
+
+def normalize_size_label(text: str) -> Optional[str]:
+    """Canonical menu-style label for a spoken size, or None if it is not a weight."""
+    grams = weight_in_grams(text)
+    return format_weight(grams) if grams else None
+
+
+def count_in_units(text: str) -> Optional[int]:
+    """Parse a piece count ("6 pcs", "12 pieces", "half dozen") into a number."""
+    text = " ".join(text.lower().split())
+    match = _COUNT_WORDS_RE.search(text)
+    if match:
+        return _COUNT_WORDS[match.group(0)]
+    match = _COUNT_RE.search(text)
+    return int(match.group(1)) if match else None
+
+
+def size_key(text: str) -> Optional[str]:
+    """
+    Canonical key for a size, shared by menu SizeNames and spoken sizes:
+    "500g" for any weight ("half kg", "0.5 kg", "500 gm"), "6pcs" for
+    counts, otherwise the lowercased label ("regular").
+    """
+    grams = weight_in_grams(text)
+    if grams:
+        return f"{grams}g"
+    count = count_in_units(text)
+    if count:
+        return f"{count}pcs"
+    label = " ".join(text.lower().split())
+    return label or None
@@ -1,4 +1,5 @@
 import os
+import re
 from dotenv import load_dotenv
 
 # Load environment variables from a .env file (if exists)
@@ -11,5 +12,186 @@ load_dotenv()
 # Menu API
 SHOP_ID = os.getenv("SHOP_ID", "1833")  # Default to 3161 if not set
 
+# FoodChow shop ids are numeric; anything else is rejected before it can
+# reach a file path or the menu URL
+SHOP_ID_PATTERN = r"^\d{1,12}$"
+
+def menu_api_url(shop_id: str) -> str:
+    """FoodChow menu URL for a shop."""
+    if not re.match(SHOP_ID_PATTERN, shop_id):
+        raise ValueError(f"Invalid shop id: {shop_id!r}")
+    return f"https://www.foodchow.com/api/FoodChowWD/GetRestaurantMenuForPOSWithSoldOut?shop_id={shop_id}"
+
 # Construct the full API URL using the dynamic shop_id
-MENU_API_URL = f"https://www.foodchow.com/api/FoodChowWD/GetRestaurantMenuForPOSWithSoldOut?shop_id={SHOP_ID}"
\ No newline at end of file
+MENU_API_URL = menu_api_url(SHOP_ID)
+
+# Per-shop menus live in MENUS_DIR/{shop_id}.json; at most this many
+# compiled menu indexes are kept in memory (least recently used evicted)
+MENUS_DIR = os.getenv("MENUS_DIR", "data/menus")
+MAX_RESIDENT_SHOPS = int(os.getenv("MAX_RESIDENT_SHOPS", "32"))
+
+# Also write a memory-mapped binary snapshot next to each menu JSON and
+# load from it when present (see services/menu_snapshot.py). Resident menus
+# then stay mapped: exact lookups read the snapshot and only item names are
+# decoded up front.
+MENU_SNAPSHOT_ENABLED = os.getenv("MENU_SNAPSHOT_ENABLED", "1") == "1"
+
+# Menus with at least FUZZY_PRUNE_MIN_ITEMS items are fuzzy matched against
+# a trigram-index shortlist of FUZZY_SHORTLIST_SIZE names instead of every
+# name (see services/ngram_index.py)
+FUZZY_PRUNE_MIN_ITEMS = int(os.getenv("FUZZY_PRUNE_MIN_ITEMS", "100"))
+FUZZY_SHORTLIST_SIZE = int(os.getenv("FUZZY_SHORTLIST_SIZE", "50"))
+
+# Item names the fuzzy matcher can't place ("dry fruit sweets", "something
+# sugar free") are searched by name, category and description instead, and
+# up to SEMANTIC_TOP_K items scoring SEMANTIC_MIN_SCORE or more are
+# suggested (see services/semantic_search.py)
+SEMANTIC_SEARCH_ENABLED = os.getenv("SEMANTIC_SEARCH_ENABLED", "1") == "1"
+SEMANTIC_TOP_K = int(os.getenv("SEMANTIC_TOP_K", "5"))
+SEMANTIC_MIN_SCORE = float(os.getenv("SEMANTIC_MIN_SCORE", "0.15"))
+
+# ====================
+# SESSION STORE
+# ====================
+
+# "memory" (in-process LRU) or "sqlite" (on-disk, survives restarts).
+# Both keep at most MAX_SESSIONS sessions; sqlite trims to it when it
+# sweeps expired rows (about once a minute).
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "10000"))
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "data/sessions.db")
+
+
+# ====================
+# EXTRACTION
+# ====================
+
+# "incremental": send current order + latest message, merge the returned delta
+# "full": re-extract the whole order from the full transcript every turn
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "incremental")
+
+# Answer simple follow-ups (phone, qty, size, payment, date) without the LLM
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "1") == "1"
+
+
+# ====================
+# CLARIFICATION
+# ====================
+
+# Questions come from services/question_templates unless the LLM is opted in
+CLARIFY_WITH_LLM = os.getenv("CLARIFY_WITH_LLM", "0") == "1"
+CLARIFY_LOCALE = os.getenv("CLARIFY_LOCALE", "en")
+
+
+# ====================
+# LLM RESPONSE CACHE
+# ====================
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "1024"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+# Empty = memory only; a path (e.g. data/llm_cache.db) adds a SQLite tier
+LLM_CACHE_DISK_PATH = os.getenv("LLM_CACHE_DISK_PATH", "")
+# Row cap of the disk tier, enforced (with expiry) by a sweep at most once a minute
+LLM_CACHE_DISK_MAX_ENTRIES = int(os.getenv("LLM_CACHE_DISK_MAX_ENTRIES", "100000"))
+
+
+# ====================
+# LLM CLIENT LIMITS
+# ====================
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "20"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_SECONDS = float(os.getenv("LLM_BACKOFF_SECONDS", "0.5"))
+# Consecutive failed calls that open the breaker, and how long it stays open
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+# Ask Gemini for application/json output on extraction calls
+LLM_JSON_MODE = os.getenv("LLM_JSON_MODE", "1") == "1"
+
+
+# ====================
+# ORDER GRAPH
+# ====================
+
+# "sequential": extraction → clarification → validation → pricing → ...
+# "parallel": clarification and partial pricing run concurrently after extraction
+GRAPH_MODE = os.getenv("GRAPH_MODE", "sequential")
+
+
+# ====================
+# MENU REFRESH
+# ====================
+
+# Background refresh period in seconds (0 disables) and ± jitter fraction
+MENU_REFRESH_SECONDS = float(os.getenv("MENU_REFRESH_SECONDS", "900"))
+MENU_REFRESH_JITTER = float(os.getenv("MENU_REFRESH_JITTER", "0.1"))
+
+
+# ====================
+# ORDER LOG
+# ====================
+
+# Append-only JSONL log of placed orders and session events, split into
+# segments of about ORDER_LOG_SEGMENT_BYTES. Appends arriving within
+# ORDER_LOG_FLUSH_MS share one write + fsync (group commit).
+ORDER_LOG_DIR = os.getenv("ORDER_LOG_DIR", "data/order_log")
+ORDER_LOG_SEGMENT_BYTES = int(os.getenv("ORDER_LOG_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+ORDER_LOG_FLUSH_MS = float(os.getenv("ORDER_LOG_FLUSH_MS", "5"))
+ORDER_LOG_FSYNC = os.getenv("ORDER_LOG_FSYNC", "1") == "1"
+
+
+# ====================
+# ORDER STORE
+# ====================
+
+# Placed orders (with line items and a pricing snapshot) in SQLite/WAL,
+# served by ORDER_DB_POOL_SIZE worker threads with one connection each
+ORDER_DB_PATH = os.getenv("ORDER_DB_PATH", "data/orders.db")
+ORDER_DB_POOL_SIZE = int(os.getenv("ORDER_DB_POOL_SIZE", "4"))
+# NORMAL skips the fsync per commit in WAL mode; the order log is fsynced
+ORDER_DB_SYNCHRONOUS = os.getenv("ORDER_DB_SYNCHRONOUS", "NORMAL")
+
+
+# ====================
+# PRICING RULES
+# ====================
+
+# JSON spec of tax, discounts, quantity breaks, coupons and delivery zones
+# (format in services/pricing_rules.py); built-in defaults if missing
+PRICING_RULES_PATH = os.getenv("PRICING_RULES_PATH", "data/pricing_rules.json")
+
+
+# ====================
+# BATCH ORDERS
+# ====================
+
+# POST /api/orders/batch: rows are priced in chunks of whole orders on a
+# process pool of BATCH_WORKERS (0 = one per CPU); uploads up to
+# BATCH_CHUNK_ROWS rows are priced in a thread instead
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "0"))
+BATCH_CHUNK_ROWS = int(os.getenv("BATCH_CHUNK_ROWS", "500"))
+BATCH_MAX_ROWS = int(os.getenv("BATCH_MAX_ROWS", "50000"))
+BATCH_START_METHOD = os.getenv("BATCH_START_METHOD", "spawn")
+
+
+# ====================
+# METRICS
+# ====================
+
+# Per-turn, per-node and LLM/fuzzy/menu-I/O latency histograms, served at
+# /metrics (Prometheus text format)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+
+# ====================
+# STARTUP
+# ====================
+
+# The order graph is compiled when the app starts. With STARTUP_PREWARM the
+# menu index, fuzzy/semantic indexes and the Gemini SDK are loaded too, so
+# the first request doesn't pay for them (slower start, faster first turn).
+STARTUP_PREWARM = os.getenv("STARTUP_PREWARM", "1") == "1"
@@ -0,0 +1,104 @@
+# utils/json_extract.py
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+_CLOSERS = {"{": "}", "[": "]"}
+_DECODER = json.JSONDecoder()
+
+
+def _scan(raw: str, start: int) -> Tuple[Optional[int], List[Tuple[int, str]], str, bool]:
+    """
+    Walk `raw` from the '{' at `start`, tracking strings and escapes.
+
+    Returns (end, cut_points, open_stack, in_string):
+      - end: index just past the balancing '}', or None if the text ran out
+      - cut_points: (index of a top-level-safe ',', closers needed there)
+      - open_stack / in_string: state at end of text, for repairing truncation
+    """
+    stack: List[str] = []
+    cuts: List[Tuple[int, str]] = []
+    in_string = escaped = False
+
+    for i in range(start, len(raw)):
+        ch = raw[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+
+        if ch == '"':
+            in_string = True
+        elif ch in _CLOSERS:
+            stack.append(_CLOSERS[ch])
+        elif ch in "}]":
+            if not stack or stack[-1] != ch:
+                return None, [], "", False  # mismatched, not JSON
+            stack.pop()
+            if not stack:
+                return i + 1, cuts, "", False
+        elif ch == ",":
+            cuts.append((i, "".join(reversed(stack))))
+
+    return None, cuts, "".join(reversed(stack)), in_string
+
+
+def _repair(raw: str, start: int, cuts: List[Tuple[int, str]], closers: str,
+            in_string: bool, attempts: int = 4) -> Optional[Dict[str, Any]]:
+    """
+    Close a truncated object, dropping the last incomplete member if needed.
+    Text cut off inside a string is never closed and kept: a half-written
+    value ("Pe" of "Peda") could still fuzzy match a real item, so the
+    member holding it is always dropped.
+    """
+    candidates = []
+    if not in_string:
+        body = raw[start:].rstrip().rstrip(",")
+        if body.endswith(":"):
+            body += " null"
+        candidates.append(body + closers)
+    # Fall back to cutting at the last few commas (drops a half-written member)
+    for pos, needed in reversed(cuts[-attempts:]):
+        candidates.append(raw[start:pos] + needed)
+
+    for text in candidates:
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(value, dict):
+            return value
+    return None
+
+
+def extract_json_object(raw: str, allow_partial: bool = True) -> Dict[str, Any]:
+    """
+    Return the first JSON object embedded in model output, in one pass.
+
+    Handles markdown fences and prose around the object: the C decoder
+    parses straight from the first '{' and ignores whatever follows. Only
+    when that fails is the text scanned brace by brace (strings and escapes
+    respected) to skip a non-JSON '{...}' or to repair a truncated or
+    still-streaming response by closing the object and dropping the last
+    incomplete member (when `allow_partial` is set).
+    Returns {} when nothing usable is found.
+    """
+    start = raw.find("{")
+    while start != -1:
+        try:
+            value, _ = _DECODER.raw_decode(raw, start)
+            if isinstance(value, dict):
+                return value
+        except json.JSONDecodeError:
+            pass
+        end, cuts, closers, in_string = _scan(raw, start)
+        if end is None and closers:
+            # Ran out of text inside this object: nothing later can be complete
+            if not allow_partial:
+                return {}
+            return _repair(raw, start, cuts, closers, in_string) or {}
+        start = raw.find("{", start + 1)
+    return {}
@@ -0,0 +1,182 @@
+"""
+Latency histograms for chat turns and graph nodes, exported at /metrics in
+Prometheus text format together with any registered collectors (the LLM
+response cache's hit/miss counters).
+
+Each turn runs inside `trace_turn`, which gives it a trace id (returned in
+ChatResponse) and records its wall time. `instrument_node` wraps every
+graph node: the node's wall time goes to order_node_seconds, and any
+`timed(component)` block inside it (LLM calls, fuzzy matching, menu I/O)
+goes to order_component_seconds labelled with that node. The current trace
+and node travel in contextvars, so concurrent turns and the speculative
+fan-out never mix their timings.
+
+Recording is a perf_counter pair, a bisect and a locked list increment:
+a few µs per block and about 30 µs per turn (benchmarks/bench_metrics.py),
+cheap enough to leave on. METRICS_ENABLED=0 turns it off.
+"""
+import bisect
+import functools
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+from utils.config import METRICS_ENABLED
+
+# Seconds; LLM calls land in the upper half, rule/fuzzy work in the lower
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """A labelled Prometheus histogram with fixed buckets."""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # label values → [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value: float, *label_values: str) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(key, list(counts), total) for key, (counts, total) in sorted(self._series.items())]
+        for key, counts, total in snapshot:
+            labels = ",".join(f'{name}="{value}"' for name, value in zip(self.labels, key))
+            prefix = f"{labels}," if labels else ""
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {total:.6f}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+REGISTRY: List[Histogram] = []
+
+TURN_SECONDS = Histogram("order_turn_seconds", "Wall time of one chat turn.", ("endpoint", "status"))
+NODE_SECONDS = Histogram("order_node_seconds", "Wall time of one graph node run.", ("node",))
+COMPONENT_SECONDS = Histogram(
+    "order_component_seconds", "Time inside a node spent on LLM calls, fuzzy matching or menu I/O.",
+    ("node", "component"),
+)
+
+
+# Other exporters (e.g. the LLM cache's counters): callables returning exposition lines
+COLLECTORS: List[Callable[[], List[str]]] = []
+
+
+def register_collector(collect: Callable[[], List[str]]) -> None:
+    COLLECTORS.append(collect)
+
+
+def render_metrics() -> str:
+    lines = [line for histogram in REGISTRY for line in histogram.render()]
+    lines += [line for collect in COLLECTORS for line in collect()]
+    return "\n".join(lines) + "\n"
+
+
+# ---- Tracing ----
+class Trace:
+    """Timings of one turn: node → {"wall": s, "llm": s, ...}, plus the turn's final status."""
+
+    __slots__ = ("trace_id", "status", "nodes")
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex[:16]
+        self.status = "ok"
+        self.nodes: Dict[str, Dict[str, float]] = {}
+
+    def add(self, node: str, component: str, seconds: float) -> None:
+        timings = self.nodes.setdefault(node, {})
+        timings[component] = timings.get(component, 0.0) + seconds
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Milliseconds per node and component."""
+        return {node: {k: round(v * 1000, 2) for k, v in timings.items()} for node, timings in self.nodes.items()}
+
+
+_TRACE: ContextVar[Optional[Trace]] = ContextVar("order_trace", default=None)
+_NODE: ContextVar[str] = ContextVar("order_node", default="none")
+
+
+@contextmanager
+def trace_turn(endpoint: str, trace_id: Optional[str] = None) -> Iterator[Trace]:
+    """Trace one chat turn; set `trace.status` to the graph's final status before leaving."""
+    trace = Trace(trace_id)
+    token = _TRACE.set(trace)
+    start = time.perf_counter()
+    try:
+        yield trace
+    except BaseException:
+        trace.status = "error"
+        raise
+    finally:
+        try:
+            _TRACE.reset(token)
+        except ValueError:
+            # A streamed turn's generator was closed from another context
+            pass
+        if METRICS_ENABLED:
+            TURN_SECONDS.observe(time.perf_counter() - start, endpoint, trace.status or "none")
+
+
+def current_trace_id() -> Optional[str]:
+    trace = _TRACE.get()
+    return trace.trace_id if trace else None
+
+
+@contextmanager
+def timed(component: str) -> Iterator[None]:
+    """Time a block as `component` of the current node (also works as a decorator on sync functions)."""
+    if not METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        node = _NODE.get()
+        COMPONENT_SECONDS.observe(elapsed, node, component)
+        trace = _TRACE.get()
+        if trace is not None:
+            trace.add(node, component, elapsed)
+
+
+def instrument_node(name: str, fn: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]):
+    """Wrap an async graph node so its wall time (and timed() blocks inside it) are recorded."""
+    if not METRICS_ENABLED:
+        return fn
+
+    @functools.wraps(fn)
+    async def node(state: Dict[str, Any]) -> Dict[str, Any]:
+        token = _NODE.set(name)
+        start = time.perf_counter()
+        try:
+            return await fn(state)
+        finally:
+            elapsed = time.perf_counter() - start
+            _NODE.reset(token)
+            NODE_SECONDS.observe(elapsed, name)
+            trace = _TRACE.get()
+            if trace is not None:
+                trace.add(name, "wall", elapsed)
+
+    return node
@@ -0,0 +1,63 @@
+# utils/order_delta.py
+from typing import Optional
+from models.order import Order, OrderDelta, OrderItem
+
+
+def _key(name: str) -> str:
+    return " ".join(name.split()).lower()
+
+
+def _find(order: Order, name: str, size: Optional[str] = None) -> Optional[OrderItem]:
+    """First item with the same name (and size, when one is given)."""
+    for item in order.items:
+        if _key(item.name) != _key(name):
+            continue
+        if size and item.size_or_weight and _key(item.size_or_weight) != _key(size):
+            continue
+        return item
+    return None
+
+
+def apply_order_delta(order: Order, delta: OrderDelta) -> Order:
+    """
+    Deterministically apply an extracted delta to an order.
+
+    Order of operations: remove → update → add → scalar fields.
+    - Removals match item names case-insensitively.
+    - Updates match by name and only overwrite the fields the delta sets
+      (including the size); an update for an item that is not in the
+      order is treated as an add.
+    - Adding an item that is already present (same name and size) updates
+      it instead of duplicating the line.
+    - Empty scalar/contact fields never clear existing values.
+    """
+    merged = order.model_copy(deep=True)
+
+    removed = {_key(name) for name in delta.remove_items}
+    merged.items = [it for it in merged.items if _key(it.name) not in removed]
+
+    # Updates match on name alone, so an update can change the size;
+    # adds also match on size, so a second size becomes its own line
+    changes = [(change, None) for change in delta.update_items]
+    changes += [(change, change.size_or_weight) for change in delta.add_items]
+    for change, size in changes:
+        existing = _find(merged, change.name, size)
+        if existing is None:
+            merged.items.append(change.model_copy())
+            continue
+        if change.qty is not None:
+            existing.qty = change.qty
+        if change.size_or_weight:
+            existing.size_or_weight = change.size_or_weight
+
+    if delta.delivery_date:
+        merged.delivery_date = delta.delivery_date
+    if delta.payment_method:
+        merged.payment_method = delta.payment_method
+    if delta.coupon_code:
+        merged.coupon_code = delta.coupon_code
+    for field, value in delta.contact.model_dump().items():
+        if value:
+            setattr(merged.contact, field, value)
+
+    return merged
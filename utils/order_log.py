@@ -0,0 +1,353 @@
+"""
+Append-only order/event log.
+
+Records are JSON lines {"seq", "ts", "kind", "key", "data"} written to
+numbered segments (orders-000001.jsonl, ...) in ORDER_LOG_DIR. One writer
+task owns the files: appends are queued, and whatever arrives within the
+flush window is written and fsynced together, so appending costs the same
+at ten records or ten million.
+
+    python -m utils.order_log replay [--kind order.placed] [--dir DIR]
+    python -m utils.order_log compact [--drop-kind session.turn] [--dir DIR]
+"""
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import argparse
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from utils.config import ORDER_LOG_DIR, ORDER_LOG_SEGMENT_BYTES, ORDER_LOG_FLUSH_MS, ORDER_LOG_FSYNC
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_SEGMENT_RE = re.compile(r"^orders-(\d{6})\.jsonl$")
+MAX_BATCH = 1024
+
+
+def segment_name(number: int) -> str:
+    return f"orders-{number:06d}.jsonl"
+
+
+def list_segments(directory: Union[str, Path]) -> List[Tuple[int, Path]]:
+    """(number, path) of every segment, oldest first."""
+    directory = Path(directory)
+    if not directory.exists():
+        return []
+    found = []
+    for path in directory.iterdir():
+        match = _SEGMENT_RE.match(path.name)
+        if match:
+            found.append((int(match.group(1)), path))
+    return sorted(found)
+
+
+def _recover_tail(path: Path) -> Optional[int]:
+    """
+    Drop a half-written last line left by a crash and return the last
+    record's seq (None for an empty segment).
+    """
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return None
+        # Read back far enough to hold the last complete line
+        chunk = 64 * 1024
+        while True:
+            start = max(0, size - chunk)
+            f.seek(start)
+            tail = f.read()
+            end = tail.rfind(b"\n")
+            if end == -1 and start > 0:
+                chunk *= 2
+                continue
+            break
+        if end + 1 != len(tail):
+            logger.warning(f"Truncating partial record at the end of {path}")
+            f.truncate(start + end + 1)
+        if end == -1:
+            return None
+        line = tail[:end].rsplit(b"\n", 1)[-1]
+    try:
+        return json.loads(line)["seq"]
+    except (ValueError, KeyError):
+        return None
+
+
+class OrderLog:
+    """
+    Single-writer, group-committed JSONL log.
+
+    `append` queues a record and returns at once; `append_durable` also
+    waits until the batch holding it has been fsynced. Segments roll over
+    once they pass `segment_bytes`.
+    """
+
+    def __init__(self, directory: Union[str, Path] = ORDER_LOG_DIR,
+                 segment_bytes: int = ORDER_LOG_SEGMENT_BYTES,
+                 flush_interval: float = ORDER_LOG_FLUSH_MS / 1000,
+                 fsync: bool = ORDER_LOG_FSYNC):
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.stats: Dict[str, int] = {"records": 0, "batches": 0, "segments": 0}
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._file = None
+        self._segment = 0
+        self._size = 0
+        self._seq = 0
+
+    # ---- Lifecycle ----
+    def start(self) -> None:
+        """Open the newest segment and start the writer task (idempotent)."""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        # First start, or the previous writer's event loop is gone
+        if self._file is not None:
+            self._flush_stale()
+            self._file.close()
+        self._open()
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._writer())
+
+    async def stop(self) -> None:
+        """Flush everything queued, then close the segment."""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        segments = list_segments(self.directory)
+        for _, path in reversed(segments):
+            seq = _recover_tail(path)
+            if seq is not None:
+                self._seq = seq
+                break
+        self._segment = segments[-1][0] if segments else 1
+        self._open_segment()
+
+    def _open_segment(self) -> None:
+        path = self.directory / segment_name(self._segment)
+        self._file = open(path, "ab")
+        self._size = self._file.tell()
+        self.stats["segments"] += 1
+
+    # ---- Appending ----
+    def append(self, kind: str, data: Dict[str, Any], key: Optional[str] = None) -> asyncio.Future:
+        """
+        Queue a record. `key` identifies the entity (e.g. an order id) so
+        compaction can keep only its latest record. Returns a future that
+        resolves to the record's seq once it is on disk.
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(({"kind": kind, "key": key, "data": data}, future))
+        return future
+
+    async def append_durable(self, kind: str, data: Dict[str, Any], key: Optional[str] = None) -> int:
+        return await self.append(kind, data, key)
+
+    async def _writer(self) -> None:
+        batch: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        stopping = False
+        try:
+            while not stopping:
+                first = await self._queue.get()
+                stopping = first is None
+                if not stopping:
+                    batch.append(first)
+                # Group commit: let concurrent appends join this write
+                if not stopping and self.flush_interval > 0:
+                    await asyncio.sleep(self.flush_interval)
+                while not stopping and len(batch) < MAX_BATCH and not self._queue.empty():
+                    item = self._queue.get_nowait()
+                    if item is None:
+                        stopping = True
+                    else:
+                        batch.append(item)
+                if batch:
+                    # Handed off first: a write already in its thread is never repeated
+                    pending, batch = batch, []
+                    await self._commit(pending)
+        except asyncio.CancelledError:
+            # Event loop shutting down without stop(): keep what was queued
+            if batch:
+                self._write(self._encode(batch))
+            self._flush_stale()
+            raise
+
+    def _encode(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> bytes:
+        now = time.time()
+        lines = []
+        for record, _ in batch:
+            self._seq += 1
+            lines.append(json.dumps({"seq": self._seq, "ts": now, **record},
+                                    ensure_ascii=False, default=str).encode("utf-8") + b"\n")
+        return b"".join(lines)
+
+    def _flush_stale(self) -> None:
+        """Write records left queued by a writer whose event loop has closed."""
+        batch = []
+        while self._queue is not None and not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                batch.append(item)
+        if batch:
+            self._write(self._encode(batch))
+            self.stats["records"] += len(batch)
+            self.stats["batches"] += 1
+
+    async def _commit(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        try:
+            await asyncio.to_thread(self._write, self._encode(batch))
+        except Exception as e:
+            logger.error(f"Order log write failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()
+            return
+        first_seq = self._seq - len(batch) + 1
+        for i, (_, future) in enumerate(batch):
+            if not future.done():
+                future.set_result(first_seq + i)
+        self.stats["records"] += len(batch)
+        self.stats["batches"] += 1
+
+    def _write(self, payload: bytes) -> None:
+        if self._size and self._size + len(payload) > self.segment_bytes:
+            self._rotate()
+        self._file.write(payload)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._size += len(payload)
+
+    def _rotate(self) -> None:
+        self._file.close()
+        self._segment += 1
+        self._open_segment()
+        logger.info(f"Order log rotated to {segment_name(self._segment)}")
+
+
+# ---- Replay and compaction ----
+def replay(directory: Union[str, Path] = ORDER_LOG_DIR,
+           kinds: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Every record in seq order. Records already seen (left behind by an
+    interrupted compaction) and unreadable lines are skipped.
+    """
+    kinds = set(kinds) if kinds else None
+    last_seq = 0
+    for _, path in list_segments(directory):
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping unreadable record in {path}")
+                    continue
+                if record.get("seq", 0) <= last_seq:
+                    continue
+                last_seq = record["seq"]
+                if kinds is None or record.get("kind") in kinds:
+                    yield record
+
+
+def compact(directory: Union[str, Path] = ORDER_LOG_DIR,
+            drop_kinds: Iterable[str] = ()) -> Dict[str, int]:
+    """
+    Merge every closed segment (all but the newest) into one, keeping only
+    the latest record per (kind, key) and dropping `drop_kinds` entirely.
+    Run it while the writer is stopped or on a copy; the active segment is
+    never touched.
+    """
+    segments = list_segments(directory)
+    closed = segments[:-1]
+    if not closed:
+        return {"segments": 0, "records_in": 0, "records_out": 0}
+
+    drop = set(drop_kinds)
+    records: List[Dict[str, Any]] = []
+    latest: Dict[Tuple[str, str], int] = {}
+    last_seq = 0
+    for _, path in closed:
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("seq", 0) <= last_seq:
+                    continue
+                last_seq = record["seq"]
+                records.append(record)
+                if record.get("key") is not None:
+                    latest[(record.get("kind"), record["key"])] = record["seq"]
+
+    kept = [
+        r for r in records
+        if r.get("kind") not in drop
+        and (r.get("key") is None or latest[(r.get("kind"), r["key"])] == r["seq"])
+    ]
+
+    # Replace the newest closed segment, then delete the older ones: a crash
+    # in between only leaves duplicates, which replay skips by seq
+    target = closed[-1][1]
+    tmp = target.with_name(target.name + ".tmp")
+    with open(tmp, "wb") as f:
+        for record in kept:
+            f.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, target)
+    for _, path in closed[:-1]:
+        path.unlink()
+    return {"segments": len(closed), "records_in": len(records), "records_out": len(kept)}
+
+
+_ORDER_LOG: Optional[OrderLog] = None
+
+
+def get_order_log() -> OrderLog:
+    """Process-wide log, started on first append and stopped by the app lifespan."""
+    global _ORDER_LOG
+    if _ORDER_LOG is None:
+        _ORDER_LOG = OrderLog()
+    return _ORDER_LOG
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m utils.order_log")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_replay = sub.add_parser("replay", help="print records as JSON lines")
+    p_replay.add_argument("--kind", action="append", help="only records of this kind (repeatable)")
+    p_replay.add_argument("--dir", default=ORDER_LOG_DIR)
+    p_compact = sub.add_parser("compact", help="merge closed segments, keeping latest per key")
+    p_compact.add_argument("--drop-kind", action="append", default=[], help="discard this kind (repeatable)")
+    p_compact.add_argument("--dir", default=ORDER_LOG_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "replay":
+        for record in replay(args.dir, args.kind):
+            sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+    else:
+        print(json.dumps(compact(args.dir, args.drop_kind)))
+
+
+if __name__ == "__main__":
+    main()